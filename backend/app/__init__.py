@@ -1,6 +1,8 @@
 """
 Freelancer游戏 - Flask应用初始化
 """
+import logging
+
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -9,6 +11,8 @@ from flask_cors import CORS
 from datetime import timedelta
 
 from config import config
+from .utils.json_provider import FastJSONProvider
+from .utils.log import init_logging
 
 # 创建扩展实例
 db = SQLAlchemy()
@@ -26,8 +30,11 @@ def create_app(config_name='default'):
         配置好的Flask应用实例
     """
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)  # 有orjson时使用orjson编码JSON响应
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
+    init_logging(app)
+    logger = logging.getLogger('freelancer.auth')
     
     # JWT配置
     app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']
@@ -40,6 +47,26 @@ def create_app(config_name='default'):
     jwt.init_app(app)
     CORS(app)  # 允许跨域请求
     
+    # 密码哈希计算池：限制同时进行的PBKDF2计算数
+    from .services.password_pool import PasswordPoolBusy, init_password_pool
+    init_password_pool(app)
+    
+    # JWT撤销列表：退出登录、修改密码后令牌失效，检查在进程内完成
+    from .services.token_blocklist import init_token_blocklist
+    init_token_blocklist(app)
+    
+    # 游玩时间、统计计数等高频更新的延迟批量写入
+    from .services.activity_buffer import init_activity_buffer
+    init_activity_buffer(app)
+    
+    # 游戏事件日志：有界队列 + 后台批量写入，进程退出时写入剩余日志
+    from .services.game_log_service import init_game_log_service
+    init_game_log_service(app)
+    
+    # 任务到期调度：按截止时间批量标记超时任务（也可由mission_worker.py单独运行）
+    from .services.mission_scheduler import init_mission_scheduler
+    init_mission_scheduler(app)
+    
     # JWT错误处理
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -52,7 +79,7 @@ def create_app(config_name='default'):
     
     @jwt.invalid_token_loader
     def invalid_token_callback(error_string):
-        print(f"Invalid token error: {error_string}")  # 添加调试日志
+        logger.info('无效的令牌: %s', error_string)
         return jsonify({
             'status': 401,
             'sub_status': 43,
@@ -69,6 +96,46 @@ def create_app(config_name='default'):
             'message': '需要提供访问令牌'
         }), 401
     
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist_callback(jwt_header, jwt_payload):
+        return app.extensions['token_blocklist'].is_revoked(jwt_payload)
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'status': 401,
+            'sub_status': 46,
+            'error': '令牌已撤销',
+            'message': '请重新登录'
+        }), 401
+    
+    # 当前用户：信任已验证的令牌声明，用户存在状态走进程级缓存
+    from .services.current_user import load_current_user
+    
+    @jwt.user_lookup_loader
+    def user_lookup_callback(jwt_header, jwt_payload):
+        return load_current_user(jwt_payload)
+    
+    @jwt.user_lookup_error_loader
+    def user_lookup_error_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'status': 401,
+            'sub_status': 45,
+            'error': '无效的用户',
+            'message': '用户不存在，请重新登录'
+        }), 401
+    
+    # 登录、注册、修改密码时密码计算已达并发上限
+    @app.errorhandler(PasswordPoolBusy)
+    def password_pool_busy_callback(error):
+        response = jsonify({
+            'status': 'error',
+            'error': '服务繁忙',
+            'message': str(error)
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     # 注册蓝图
     from .api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -8,6 +8,8 @@ api_bp = Blueprint('api', __name__)
 # 从该包中导入路由模块
 from . import users
 from . import game_saves
+from . import trading
+from . import missions
 from .auth import auth_bp
 from .universe import universe_bp
 
@@ -16,4 +18,4 @@ api_bp.register_blueprint(auth_bp, url_prefix='/auth')
 api_bp.register_blueprint(universe_bp, url_prefix='/universe')
 
 # 以下模块将在后续开发中添加
-# from . import ships, trading, missions, factions
+# from . import ships, factions
@@ -3,10 +3,11 @@
 提供用户注册、登录、令牌刷新和个人资料管理等功能
 """
 from flask import request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token, decode_token
 
 from app.models.user import User
 from app.services.auth_service import AuthService
+from app.services.token_blocklist import get_token_blocklist
 from app.utils.security import is_valid_password, is_valid_email, is_valid_username
 from app import db
 
@@ -78,6 +79,40 @@ def login():
     tokens = user.generate_tokens()
     return jsonify(tokens), 200
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """
+    退出登录API
+    ---
+    请求头:
+        Authorization: Bearer <access_token 或 refresh_token>
+    请求体:
+        refresh_token: (可选) 同时撤销的刷新令牌
+    响应:
+        成功: 200 OK，请求使用的令牌（以及提供的刷新令牌）被撤销
+        失败: 400 Bad Request，刷新令牌无效或不属于当前用户
+    """
+    blocklist = get_token_blocklist()
+    payload = get_jwt()
+    revoked = [payload]
+    
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            refresh_payload = decode_token(data['refresh_token'])
+        except Exception:
+            return jsonify({'error': '无效的刷新令牌'}), 400
+        if str(refresh_payload.get('sub')) != str(payload['sub']):
+            return jsonify({'error': '无效的刷新令牌'}), 400
+        revoked.append(refresh_payload)
+    
+    for token in revoked:
+        if not blocklist.is_revoked(token):
+            blocklist.revoke_token(token)
+    db.session.commit()
+    return jsonify({'message': '已退出登录'}), 200
+
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
@@ -168,7 +203,7 @@ def change_password():
         current_password: 当前密码
         new_password: 新密码
     响应:
-        成功: 200 OK
+        成功: 200 OK，此前签发的令牌全部失效，返回新的访问令牌和刷新令牌
         失败: 400 Bad Request 或 401 Unauthorized，返回错误信息
     """
     current_user_id = int(get_jwt_identity())  # 将字符串ID转换为整数
@@ -186,8 +221,10 @@ def change_password():
         
         if not success:
             return jsonify({'error': '当前密码不正确'}), 401
-            
-        return jsonify({'message': '密码修改成功'}), 200
+        
+        # 此前签发的令牌已全部撤销，返回新的令牌
+        tokens = User.query.get(current_user_id).generate_tokens()
+        return jsonify(dict(tokens, message='密码修改成功')), 200
         
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -1,31 +1,42 @@
 """
 Freelancer游戏 - 游戏存档API路由
 """
-from flask import jsonify, request, current_app
+from flask import Response, jsonify, request, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from . import api_bp
 from ..models.game_save import GameSave
 from ..models.user import User
+from ..services.activity_buffer import get_activity_buffer
+from ..services.discovery_service import get_save_discoveries, record_discovery, forget_save_discoveries
+from ..services.game_save_service import create_new_game_save, copy_game_save
+from ..services.game_log_service import MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE, log_game_event, read_game_logs
+from ..services.game_state import load_game_state, parse_fields
+from ..services.save_archive import ArchiveError, export_game_save, import_game_save, resolve_compression
+from ..services.ship_stats import invalidate_game_ship_stats
+from ..services.universe_snapshot import get_universe_snapshot
+from ..utils.projection import Projection, isoformat
 from .. import db
 
-# 游戏存档初始化服务
-def initialize_new_game_save(game_id, user_id):
-    """初始化新游戏存档的基础数据
-    
-    此处应该创建玩家初始数据，如：
-    - 初始飞船
-    - 初始位置
-    - 初始势力关系
-    - 初始统计数据
-    等
-    
-    Todo: 完善此函数以创建完整的初始游戏状态
-    """
-    # 临时返回成功，后续会完善此函数
-    return True
-
+# 存档列表的列投影，字段与 GameSave.to_dict 一致
+GAME_SAVE_PROJECTION = Projection({
+    'game_id': GameSave.game_id,
+    'user_id': GameSave.user_id,
+    'save_name': GameSave.save_name,
+    'created_at': GameSave.created_at,
+    'last_played_at': GameSave.last_played_at,
+    'game_version': GameSave.game_version,
+    'total_playtime': GameSave.total_playtime,
+    'credits': GameSave.credits,
+    'current_system_id': GameSave.current_system_id,
+    'reputation': GameSave.reputation,
+    'faction_id': GameSave.faction_id,
+    'discovered_systems_count': GameSave.discovered_systems_count,
+    'completed_missions_count': GameSave.completed_missions_count,
+    'thumbnail_path': GameSave.thumbnail_path,
+    'status': GameSave.status
+}, converters={'created_at': isoformat, 'last_played_at': isoformat})
 
 @api_bp.route('/game-saves', methods=['GET'])
 @jwt_required()
@@ -34,35 +45,57 @@ def get_game_saves():
     current_user_id = get_jwt_identity()
     
     # 按最后游玩时间倒序排列
-    saves = GameSave.query.filter_by(user_id=current_user_id)\
-        .order_by(GameSave.last_played_at.desc())\
-        .all()
+    saves = GAME_SAVE_PROJECTION.fetch(
+        GAME_SAVE_PROJECTION.select()
+        .where(GameSave.user_id == int(current_user_id))
+        .order_by(GameSave.last_played_at.desc())
+    )
+    
+    # 叠加尚未写回的最后游玩时间后重新排序
+    buffer = get_activity_buffer()
+    for save in saves:
+        buffer.apply_pending(save)
+    saves.sort(key=lambda save: save['last_played_at'] or '', reverse=True)
     
     return jsonify({
         'status': 'success',
-        'game_saves': [save.to_dict() for save in saves]
+        'game_saves': saves
     }), 200
 
 
 @api_bp.route('/game-saves', methods=['POST'])
 @jwt_required()
 def create_game_save():
-    """创建新游戏存档"""
+    """创建新游戏存档
+    
+    存档和初始游戏数据（势力关系、市场、初始飞船、统计等）在同一个事务中创建。
+    faction_id 可选，必须是存在且允许玩家加入的势力
+    """
     current_user_id = get_jwt_identity()
     data = request.json or {}
     
-    # 创建新存档
-    new_save = GameSave(
-        user_id=current_user_id,
+    faction_id = data.get('faction_id')
+    if faction_id is not None:
+        if not isinstance(faction_id, int) or isinstance(faction_id, bool):
+            return jsonify({
+                'status': 'error',
+                'message': f'无效的faction_id: {faction_id}'
+            }), 400
+        faction = get_universe_snapshot().factions.get(faction_id)
+        if faction is None or not faction['is_player_accessible']:
+            return jsonify({
+                'status': 'error',
+                'message': f'势力不存在或不允许加入: {faction_id}'
+            }), 400
+    
+    new_save = create_new_game_save(
+        user_id=int(current_user_id),
         save_name=data.get('save_name', f"存档 {datetime.now().strftime('%Y-%m-%d %H:%M')}"),
-        game_version=current_app.config.get('GAME_VERSION', '1.0.0')
+        game_version=current_app.config.get('GAME_VERSION', '1.0.0'),
+        faction_id=faction_id
     )
     
-    db.session.add(new_save)
-    db.session.commit()
-    
-    # 初始化新存档的游戏数据
-    initialize_new_game_save(new_save.game_id, current_user_id)
+    log_game_event(int(current_user_id), new_save.game_id, 'save_created', f'创建存档：{new_save.save_name}')
     
     return jsonify({
         'status': 'success',
@@ -85,33 +118,43 @@ def get_game_save(game_id):
     
     return jsonify({
         'status': 'success',
-        'game_save': game_save.to_dict()
+        'game_save': get_activity_buffer().apply_pending(game_save.to_dict())
     }), 200
 
 
 @api_bp.route('/game-saves/<int:game_id>/load', methods=['POST'])
 @jwt_required()
 def load_game_save(game_id):
-    """加载指定的游戏存档"""
+    """加载指定的游戏存档
+    
+    返回进入游戏所需的完整状态（飞船、位置、势力关系、任务、发现、统计），
+    可用 fields= 参数（逗号分隔）只返回其中部分，见 GAME_STATE_SECTIONS
+    """
     current_user_id = get_jwt_identity()
     
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
     # 验证存档归属
     game_save = GameSave.query.filter_by(
         game_id=game_id, 
         user_id=current_user_id
     ).first_or_404()
     
-    # 更新最后游玩时间
-    game_save.last_played_at = datetime.utcnow()
-    db.session.commit()
+    # 最后游玩时间由活动缓冲区延迟写回，加载存档不提交事务
+    buffer = get_activity_buffer()
+    buffer.touch(game_id)
     
-    # 返回初始游戏数据
-    # TODO: 获取玩家在该存档中的完整状态
     return jsonify({
         'status': 'success',
         'message': '存档加载成功',
-        'game_save': game_save.to_dict(),
-        # 此处应该包含更多游戏状态数据
+        'game_save': buffer.apply_pending(game_save.to_dict()),
+        'game_state': load_game_state(game_save, fields)
     }), 200
 
 
@@ -137,7 +180,7 @@ def update_game_save(game_id):
     return jsonify({
         'status': 'success',
         'message': '存档信息更新成功',
-        'game_save': game_save.to_dict()
+        'game_save': get_activity_buffer().apply_pending(game_save.to_dict())
     }), 200
 
 
@@ -156,8 +199,293 @@ def delete_game_save(game_id):
     # 删除存档（依赖于数据库设置的级联删除，自动删除相关数据）
     db.session.delete(game_save)
     db.session.commit()
+    forget_save_discoveries(game_id)
+    invalidate_game_ship_stats(game_id)
+    get_activity_buffer().discard(game_id)
     
     return jsonify({
         'status': 'success',
         'message': '存档删除成功'
     }), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/clone', methods=['POST'])
+@jwt_required()
+def clone_game_save(game_id):
+    """复制存档（另存为）
+    
+    存档及其飞船、装备、货物、市场、势力关系、任务、发现和统计数据在同一个事务中
+    由数据库端 INSERT ... SELECT 复制
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    # 先写回源存档尚未写回的游玩时间和统计，副本才包含这些数据
+    # （在本请求的事务开始前写回，保证随后的读取能看到）
+    get_activity_buffer().flush([game_id])
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    save_name = data.get('save_name') or f"{game_save.save_name} (副本)"[:50]
+    new_save, counts = copy_game_save(game_save, save_name)
+    
+    return jsonify({
+        'status': 'success',
+        'message': '存档复制成功',
+        'game_save': new_save.to_dict(),
+        'copied_rows': counts
+    }), 201
+
+
+@api_bp.route('/game-saves/<int:game_id>/export', methods=['GET'])
+@jwt_required()
+def export_game_save_archive(game_id):
+    """以二进制归档流式导出存档（用于备份、迁移和离线游戏）
+    
+    可选参数 compression: none / zlib / lz4，默认为 SAVE_ARCHIVE_COMPRESSION
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 归档需要包含尚未写回的游玩时间和统计（在本请求的事务开始前写回）
+    get_activity_buffer().flush([game_id])
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    try:
+        compression = resolve_compression(request.args.get('compression'))
+    except ArchiveError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    return Response(
+        stream_with_context(export_game_save(game_save.game_id, compression)),
+        mimetype='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename=save-{game_id}.flsv'}
+    )
+
+
+@api_bp.route('/game-saves/import', methods=['POST'])
+@api_bp.route('/game-saves/<int:game_id>/import', methods=['POST'])
+@jwt_required()
+def import_game_save_archive(game_id=None):
+    """从二进制归档导入存档
+    
+    请求体为导出接口生成的归档数据。指定存档ID时覆盖该存档的全部数据，否则创建新存档
+    """
+    current_user_id = get_jwt_identity()
+    
+    game_save = None
+    if game_id is not None:
+        # 验证存档归属
+        game_save = GameSave.query.filter_by(
+            game_id=game_id, 
+            user_id=current_user_id
+        ).first_or_404()
+    
+    try:
+        game_save, counts = import_game_save(request.stream, int(current_user_id), game_save)
+    except ArchiveError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    # 覆盖导入时，原存档尚未写回的数据已不再适用
+    get_activity_buffer().discard(game_save.game_id)
+    
+    return jsonify({
+        'status': 'success',
+        'message': '存档导入成功',
+        'game_save': game_save.to_dict(),
+        'imported_rows': counts
+    }), 200 if game_id is not None else 201
+
+
+@api_bp.route('/game-saves/<int:game_id>/discoveries', methods=['POST'])
+@jwt_required()
+def create_discovery(game_id):
+    """记录存档中的新发现（星系、行星、空间站或异常点）"""
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    object_id = data.get('object_id')
+    if not isinstance(object_id, int) or isinstance(object_id, bool):
+        return jsonify({
+            'status': 'error',
+            'message': '缺少必要字段：object_id'
+        }), 400
+    if object_id <= 0:
+        return jsonify({
+            'status': 'error',
+            'message': f'无效的object_id: {object_id}'
+        }), 400
+    
+    try:
+        discovery = record_discovery(
+            game_save,
+            data.get('discovery_type', 'system'),
+            object_id
+        )
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    if discovery is None:
+        return jsonify({
+            'status': 'success',
+            'message': '已经发现过该目标'
+        }), 200
+    
+    return jsonify({
+        'status': 'success',
+        'message': '发现记录成功',
+        'discovery': discovery.to_dict(),
+        'game_save': get_activity_buffer().apply_pending(game_save.to_dict())
+    }), 201
+
+
+@api_bp.route('/game-saves/<int:game_id>/heartbeat', methods=['POST'])
+@jwt_required()
+def game_save_heartbeat(game_id):
+    """游戏进行中的心跳：上报游玩时长和统计增量
+    
+    数据在内存中按存档合并，由活动缓冲区定期批量写回，心跳本身不访问数据库。
+    请求体: {"playtime_seconds": 秒数, "statistics": {"enemies_defeated": 1, ...}}
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    # 验证存档归属（使用缓存的存档归属，不查询数据库）
+    discoveries = get_save_discoveries(game_id)
+    if discoveries is None or discoveries.user_id != int(current_user_id):
+        return jsonify({
+            'status': 'error',
+            'message': '存档不存在'
+        }), 404
+    
+    playtime = data.get('playtime_seconds', 0)
+    statistics = data.get('statistics') or {}
+    max_seconds = current_app.config.get('HEARTBEAT_MAX_SECONDS', 300)
+    if (not isinstance(playtime, (int, float)) or isinstance(playtime, bool)
+            or not 0 <= playtime <= max_seconds):
+        return jsonify({
+            'status': 'error',
+            'message': f'playtime_seconds 必须在 0 到 {max_seconds} 之间'
+        }), 400
+    max_delta = current_app.config.get('HEARTBEAT_MAX_STATISTIC_DELTA', 1000000)
+    if not isinstance(statistics, dict) or not all(
+        isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= max_delta
+        for value in statistics.values()
+    ):
+        return jsonify({
+            'status': 'error',
+            'message': f'statistics 必须是统计项到 0 到 {max_delta} 之间整数的映射'
+        }), 400
+    
+    buffer = get_activity_buffer()
+    try:
+        buffer.add_statistics(game_id, **statistics)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    if playtime:
+        buffer.add_playtime(game_id, playtime)
+    else:
+        buffer.touch(game_id)
+    
+    return jsonify({
+        'status': 'success'
+    }), 202
+
+
+@api_bp.route('/game-saves/<int:game_id>/logs', methods=['GET'])
+@jwt_required()
+def get_game_logs(game_id):
+    """按时间倒序分页获取存档的游戏日志
+    
+    参数: limit（默认50，最大200）、before（上一页返回的next_cursor）、log_type
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属（使用缓存的存档归属）
+    discoveries = get_save_discoveries(game_id)
+    if discoveries is None or discoveries.user_id != int(current_user_id):
+        return jsonify({
+            'status': 'error',
+            'message': '存档不存在'
+        }), 404
+    
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        logs, next_cursor = read_game_logs(
+            int(current_user_id), game_id,
+            limit=limit,
+            before=request.args.get('before'),
+            log_type=request.args.get('log_type')
+        )
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'logs': logs,
+        'next_cursor': next_cursor
+    }), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/logs', methods=['POST'])
+@jwt_required()
+def create_game_log(game_id):
+    """记录客户端上报的游戏事件日志
+    
+    日志进入队列后由后台批量写入，不等待数据库。请求体: {"log_type": "...", "message": "..."}
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    # 验证存档归属（使用缓存的存档归属）
+    discoveries = get_save_discoveries(game_id)
+    if discoveries is None or discoveries.user_id != int(current_user_id):
+        return jsonify({
+            'status': 'error',
+            'message': '存档不存在'
+        }), 404
+    
+    log_type = data.get('log_type')
+    if not isinstance(log_type, str) or not log_type:
+        return jsonify({
+            'status': 'error',
+            'message': '缺少必要字段：log_type'
+        }), 400
+    message = data.get('message')
+    
+    accepted = log_game_event(int(current_user_id), game_id, log_type,
+                              message if isinstance(message, str) else None)
+    
+    return jsonify({
+        'status': 'success',
+        'accepted': accepted
+    }), 202
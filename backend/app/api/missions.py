@@ -0,0 +1,170 @@
+"""
+Freelancer游戏 - 任务相关API路由
+任务板按 (存档, 空间站, 时间段) 即时生成，见 services/mission_board.py
+"""
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from . import api_bp
+from ..models.game_save import GameSave
+from ..models.mission import PlayerMission
+from ..services.game_log_service import log_game_event
+from ..services.mission_board import (MissionError, abandon_mission, accept_mission, complete_mission,
+                                      get_mission_board, list_player_missions)
+
+# 任务列表可筛选的状态
+MISSION_STATUSES = PlayerMission.__table__.c.status.type.enums
+
+
+@api_bp.route('/game-saves/<int:game_id>/stations/<int:station_id>/missions', methods=['GET'])
+@jwt_required()
+def get_station_missions(game_id, station_id):
+    """获取空间站当前的任务板
+    
+    查询参数:
+        min_difficulty: (可选) 最低难度
+        max_difficulty: (可选) 最高难度，不超过与空间站所属势力的关系允许的难度
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    try:
+        board = get_mission_board(
+            game_id, station_id,
+            min_difficulty=request.args.get('min_difficulty', type=int),
+            max_difficulty=request.args.get('max_difficulty', type=int)
+        )
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    
+    return jsonify(dict(board, status='success')), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/missions', methods=['GET'])
+@jwt_required()
+def get_player_missions(game_id):
+    """获取存档中的任务
+    
+    查询参数:
+        status: (可选) 任务状态，默认为 active；all 返回全部任务
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    status = request.args.get('status', 'active')
+    if status == 'all':
+        status = None
+    elif status not in MISSION_STATUSES:
+        return jsonify({'status': 'error', 'message': f"无效的任务状态: {status}"}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'missions': list_player_missions(game_id, status)
+    }), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/missions', methods=['POST'])
+@jwt_required()
+def accept_player_mission(game_id):
+    """接受任务板上的任务
+    
+    请求体:
+        station_id: 发布任务的空间站ID
+        offer_id: 任务板返回的 offer_id
+    """
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    station_id = data.get('station_id')
+    if not isinstance(station_id, int) or data.get('offer_id') is None:
+        return jsonify({'status': 'error', 'message': '请提供空间站ID和任务ID'}), 400
+    
+    try:
+        player_mission, mission = accept_mission(game_save, station_id, data['offer_id'])
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except MissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    log_game_event(game_save.user_id, game_id, 'mission_accepted', f'接受任务：{mission.title}')
+    
+    return jsonify({
+        'status': 'success',
+        'message': '任务已接受',
+        'player_mission': dict(player_mission.to_dict(), mission=mission.to_dict())
+    }), 201
+
+
+@api_bp.route('/game-saves/<int:game_id>/missions/<int:player_mission_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_player_mission(game_id, player_mission_id):
+    """完成进行中的任务（当前飞船需要位于任务目标），发放奖励"""
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    try:
+        result = complete_mission(game_save, player_mission_id)
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except MissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    return jsonify({
+        'status': 'success',
+        'message': '任务完成',
+        'reward_credits': result['reward_credits'],
+        'reward_reputation': result['reward_reputation'],
+        'standing_changes': [
+            {'faction_id': faction_id, 'change': change}
+            for faction_id, change in sorted(result['standing_changes'].items())
+        ]
+    }), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/missions/<int:player_mission_id>/abandon', methods=['POST'])
+@jwt_required()
+def abandon_player_mission(game_id, player_mission_id):
+    """放弃进行中的任务"""
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    try:
+        player_mission = abandon_mission(game_id, player_mission_id)
+    except LookupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except MissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    log_game_event(game_save.user_id, game_id, 'mission_abandoned', f'放弃任务：{player_mission.mission_id}')
+    
+    return jsonify({
+        'status': 'success',
+        'message': '任务已放弃',
+        'player_mission': player_mission.to_dict()
+    }), 200
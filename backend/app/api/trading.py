@@ -0,0 +1,81 @@
+"""
+Freelancer游戏 - 交易相关API路由
+"""
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from . import api_bp
+from ..models.game_save import GameSave
+from ..services.market_engine import evaluate_market
+from ..services.trade_finder import DEFAULT_MAX_JUMPS, find_trade_routes, get_ship_cargo_capacity
+
+
+@api_bp.route('/game-saves/<int:game_id>/stations/<int:station_id>/market', methods=['GET'])
+@jwt_required()
+def get_station_market(game_id, station_id):
+    """获取存档中某个空间站的当前市场价格
+    
+    价格在请求时按 last_updated 以来经过的时间推算到当前时刻，不修改数据库
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    state = evaluate_market(game_id, station_ids=[station_id])
+    
+    return jsonify({
+        'status': 'success',
+        'station_id': station_id,
+        'evaluated_at': state.as_of.isoformat() if state else None,
+        'market': state.station_prices(station_id) if state else []
+    }), 200
+
+
+@api_bp.route('/game-saves/<int:game_id>/trade-routes', methods=['GET'])
+@jwt_required()
+def get_trade_routes(game_id):
+    """查找每跳利润最高的往返贸易路线
+    
+    查询参数:
+        start_system_id: (可选) 起点星系ID，默认为存档当前所在星系
+        ship_id: (可选) 按该飞船的货舱容量（含货舱扩展装备）计算，默认为当前使用中的飞船
+        cargo_capacity: (可选) 直接指定货舱容量，优先于ship_id
+        limit: (可选) 返回的路线数量，默认5，最多50
+        max_jumps: (可选) 候选空间站距起点的最大跳数，默认6，最多12
+    """
+    current_user_id = get_jwt_identity()
+    
+    # 验证存档归属
+    game_save = GameSave.query.filter_by(
+        game_id=game_id, 
+        user_id=current_user_id
+    ).first_or_404()
+    
+    start_system_id = request.args.get('start_system_id', type=int) or game_save.current_system_id
+    if start_system_id is None:
+        return jsonify({'status': 'error', 'message': '请提供起点星系'}), 400
+        
+    cargo_capacity = request.args.get('cargo_capacity', type=int)
+    if cargo_capacity is None:
+        cargo_capacity = get_ship_cargo_capacity(game_id, request.args.get('ship_id', type=int))
+    if not cargo_capacity or cargo_capacity <= 0:
+        return jsonify({'status': 'error', 'message': '飞船不存在或没有货舱'}), 400
+        
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 50)
+    max_jumps = min(max(request.args.get('max_jumps', DEFAULT_MAX_JUMPS, type=int), 1), 12)
+    
+    try:
+        routes = find_trade_routes(game_id, start_system_id, cargo_capacity, limit=limit, max_jumps=max_jumps)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    
+    return jsonify({
+        'status': 'success',
+        'start_system_id': start_system_id,
+        'cargo_capacity': cargo_capacity,
+        'trade_routes': routes
+    }), 200
@@ -1,50 +1,131 @@
 """
 Freelancer游戏 - 宇宙相关API端点
 包括星系、空间站、跳跃点等的数据获取
+静态宇宙数据统一从进程内快照读取，不再访问数据库
 """
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.universe import StarSystem, SpaceStation, JumpGate, Planet, Faction
-from app.models.user import User
+import logging
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+from app.services.universe_snapshot import get_universe_snapshot, find_systems
+from app.services.route_planner import get_route_planner, ROUTE_MODES
+from app.services.discovery_service import get_visibility, get_save_discoveries
+from app.utils.response_cache import cached_json_response
+from app.utils.log import record_row_count
 
 # 创建蓝图
 universe_bp = Blueprint('universe', __name__)
 
+logger = logging.getLogger('freelancer.universe')
+
+def get_request_visibility(user_id):
+    """根据game_id查询参数获取星系可见性
+    
+    提供game_id时使用该存档自己的发现记录，否则使用星系表中的全局发现标记
+    
+    Raises:
+        LookupError: 存档不存在或不属于当前用户
+    """
+    return get_visibility(user_id, request.args.get('game_id', type=int))
+
+def universe_data_version():
+    """宇宙接口响应缓存使用的数据版本：快照版本，加上存档的发现版本
+    
+    未启用进程级快照，或存档不存在/不属于当前用户（由视图返回错误）时返回None，不使用缓存
+    """
+    if not current_app.config.get('UNIVERSE_SNAPSHOT_ENABLED', True):
+        return None
+    snapshot_version = get_universe_snapshot().version
+    
+    game_id = request.args.get('game_id', type=int)
+    if game_id is None:
+        return (snapshot_version,)
+    
+    discoveries = get_save_discoveries(game_id)
+    if discoveries is None or discoveries.user_id != current_user.user_id:
+        return None
+    return (snapshot_version, game_id, discoveries.version)
+
+def with_save_discovery(system, visibility):
+    """存档视角下用存档的发现状态替换星系记录中的全局is_discovered"""
+    if request.args.get('game_id') is None:
+        return system
+    return dict(system, is_discovered=system['system_id'] in visibility.discovered)
+
+# 星系列表可通过fields参数选择的字段
+SYSTEM_FIELDS = (
+    'system_id', 'name', 'description', 'difficulty_level', 'danger_level', 'type',
+    'controlling_faction_id', 'x_coord', 'y_coord', 'z_coord', 'is_discovered', 'planet_count'
+)
+
 @universe_bp.route('/systems', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_all_systems():
-    """获取所有星系的信息"""
+    """获取所有星系的信息
+    
+    查询参数:
+        game_id: (可选) 存档ID，按该存档的发现记录判断可见性
+        type: (可选) 只返回该区域类型的星系
+        show_all: (可选) 为true时包含未发现的星系
+        after: (可选) 键集分页游标，返回system_id大于该值的星系
+        limit: (可选) 每页数量，响应中的next_after为下一页游标
+        fields: (可选) 逗号分隔的字段列表，例如 system_id,x_coord,y_coord,z_coord
+    """
     try:
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
             
-        # 获取所有星系
-        systems = StarSystem.query.all()
-        
-        # 构造响应数据
-        systems_data = []
-        
         # 检查是否传入了type参数
         system_type = request.args.get('type', None)
         show_all = request.args.get('show_all', 'false').lower() == 'true'
         
-        for system in systems:
-            # 如果指定了类型过滤，则只返回该类型的星系
-            if system_type and system.type != system_type:
-                continue
-                
-            # 正常情况只返回已发现的或核心星系，但如果show_all=true则返回所有星系
-            if show_all or system.is_discovered or system.type == 'core' or system.type == 'mid':
-                systems_data.append(system.to_dict())
+        # 分页参数
+        after = request.args.get('after', type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit <= 0:
+            return jsonify({'error': 'limit必须为正整数'}), 400
+            
+        # 字段选择参数，system_id始终返回以便作为分页游标
+        fields = None
+        if request.args.get('fields'):
+            fields = ['system_id'] + [
+                field.strip() for field in request.args['fields'].split(',')
+                if field.strip() and field.strip() != 'system_id'
+            ]
+            unknown_fields = [field for field in fields if field not in SYSTEM_FIELDS]
+            if unknown_fields:
+                return jsonify({'error': f"未知字段: {', '.join(unknown_fields)}"}), 400
+        
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        
+        # 正常情况只返回已发现的或核心星系，但如果show_all=true则返回所有星系
+        systems_data = find_systems(
+            system_type=system_type,
+            listed=None if show_all else visibility.listed,
+            after=after,
+            limit=limit
+        )
+        
+        next_after = None
+        if limit is not None and len(systems_data) == limit:
+            next_after = systems_data[-1]['system_id']
+            
+        systems_data = [with_save_discovery(system, visibility) for system in systems_data]
+            
+        if fields:
+            systems_data = [{field: system[field] for field in fields} for system in systems_data]
+            
+        record_row_count(len(systems_data))
         
         return jsonify({
             'success': True,
             'count': len(systems_data),
-            'systems': systems_data
+            'systems': systems_data,
+            'next_after': next_after
         }), 200
         
     except Exception as e:
@@ -52,42 +133,46 @@ def get_all_systems():
 
 @universe_bp.route('/systems/<int:system_id>', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_system_details(system_id):
     """获取特定星系的详细信息"""
     try:
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
+            
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
             
         # 获取特定星系
-        system = StarSystem.query.get(system_id)
+        snapshot = get_universe_snapshot(system_id=system_id)
+        system = snapshot.systems.get(system_id)
         
         if not system:
             return jsonify({'error': '星系不存在'}), 404
             
         # 检查是否为玩家已发现的星系或初始星系
-        if not system.is_discovered and system.type != 'core':
+        if system_id not in visibility.visible:
             return jsonify({'error': '星系尚未发现'}), 403
             
-        # 获取系统详细信息
-        system_data = system.to_dict(include_relations=True)
+        # 获取系统详细信息（快照记录是共享的，需要复制后再添加关联数据）
+        system_data = dict(with_save_discovery(system, visibility))
+        system_data['stations'] = list(snapshot.stations_by_system.get(system_id, ()))
+        system_data['controlling_faction'] = snapshot.factions.get(system['controlling_faction_id'])
         
         # 获取星系中的行星
-        planets = Planet.query.filter_by(system_id=system_id).all()
-        system_data['planets'] = [planet.to_dict() for planet in planets]
+        system_data['planets'] = list(snapshot.planets_by_system.get(system_id, ()))
         
         # 获取从该星系出发的跳跃点
-        jump_gates = JumpGate.query.filter_by(source_system_id=system_id).all()
         system_data['jump_gates'] = []
         
-        for gate in jump_gates:
+        for gate in snapshot.gates_by_source.get(system_id, ()):
             # 检查目标星系是否已被发现
-            target_system = StarSystem.query.get(gate.target_system_id)
-            if target_system.is_discovered or target_system.type == 'core' or not gate.is_hidden:
-                system_data['jump_gates'].append(gate.to_dict())
+            if gate['target_system_id'] not in snapshot.systems:
+                continue
+            if gate['target_system_id'] in visibility.visible or not gate['is_hidden']:
+                system_data['jump_gates'].append(gate)
         
         return jsonify({
             'success': True,
@@ -99,6 +184,7 @@ def get_system_details(system_id):
 
 @universe_bp.route('/stations', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_all_stations():
     """获取所有空间站的信息"""
     try:
@@ -106,51 +192,41 @@ def get_all_stations():
         system_id = request.args.get('system_id', type=int)
         show_all = request.args.get('show_all', 'false').lower() == 'true'
         
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
+            
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
         
-        # 添加调试信息
-        print(f"查询空间站，参数：system_id={system_id}, show_all={show_all}")
+        logger.debug('查询空间站，参数：system_id=%s, show_all=%s', system_id, show_all)
             
-        # 构建查询
-        query = SpaceStation.query
-        
-        # 如果不显示所有空间站，需要检查星系是否被发现
-        if not show_all:
-            # 只显示已发现星系中的空间站
-            query = query.join(StarSystem, SpaceStation.system_id == StarSystem.system_id).filter(
-                db.or_(
-                    StarSystem.is_discovered == True,
-                    StarSystem.type == 'core'
-                )
-            )
+        snapshot = get_universe_snapshot(system_id=system_id)
         
         # 如果指定了system_id，只返回该星系中的空间站
         if system_id:
-            system = StarSystem.query.get(system_id)
+            system = snapshot.systems.get(system_id)
             if not system:
                 return jsonify({'error': '星系不存在'}), 404
                 
             # 检查是否为玩家已发现的星系或初始星系
-            if not show_all and not system.is_discovered and system.type != 'core':
+            if not show_all and system_id not in visibility.visible:
                 return jsonify({'error': '星系尚未发现'}), 403
                 
-            query = query.filter(SpaceStation.system_id == system_id)
-            
-        # 获取空间站
-        stations = query.all()
-        
-        # 打印数据库查询结果
-        print(f"查询到 {len(stations)} 个空间站")
-        for station in stations:
-            print(f"空间站ID: {station.station_id}, 名称: {station.name}, 所属星系: {station.system_id}")
+            stations = list(snapshot.stations_by_system.get(system_id, ()))
+        else:
+            stations = []
+            for station_system_id, system_stations in snapshot.stations_by_system.items():
+                # 如果不显示所有空间站，只显示已发现星系中的空间站
+                if not show_all and station_system_id not in visibility.visible:
+                    continue
+                stations.extend(system_stations)
+            stations.sort(key=lambda station: station['station_id'])
         
         # 构造响应数据
-        stations_data = [station.to_dict() for station in stations]
+        stations_data = stations
+        record_row_count(len(stations_data))
         
         return jsonify({
             'success': True,
@@ -163,44 +239,47 @@ def get_all_stations():
 
 @universe_bp.route('/stations/<int:station_id>', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_station_details(station_id):
     """获取特定空间站的详细信息"""
     try:
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
+            
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
             
         # 获取特定空间站
-        station = SpaceStation.query.get(station_id)
+        snapshot = get_universe_snapshot(station_id=station_id)
+        station = snapshot.stations.get(station_id)
         
         if not station:
             return jsonify({'error': '空间站不存在'}), 404
             
         # 获取所属星系
-        system = StarSystem.query.get(station.system_id)
+        system = snapshot.systems.get(station['system_id'])
         
         # 检查是否为玩家已发现的星系或初始星系
-        if not system.is_discovered and system.type != 'core':
+        if not system or station['system_id'] not in visibility.visible:
             return jsonify({'error': '所属星系尚未发现'}), 403
             
-        # 获取空间站详细信息
-        station_data = station.to_dict()
+        # 获取空间站详细信息（快照记录是共享的，需要复制后再添加关联数据）
+        station_data = dict(station)
         
         # 获取所属星系和行星信息
-        station_data['system'] = system.to_dict()
-        if station.planet_id:
-            planet = Planet.query.get(station.planet_id)
+        station_data['system'] = with_save_discovery(system, visibility)
+        if station['planet_id']:
+            planet = snapshot.planets.get(station['planet_id'])
             if planet:
-                station_data['planet'] = planet.to_dict()
+                station_data['planet'] = planet
                 
         # 获取控制势力信息
-        if station.controlling_faction_id:
-            faction = Faction.query.get(station.controlling_faction_id)
+        if station['controlling_faction_id']:
+            faction = snapshot.factions.get(station['controlling_faction_id'])
             if faction:
-                station_data['controlling_faction'] = faction.to_dict()
+                station_data['controlling_faction'] = faction
         
         return jsonify({
             'success': True,
@@ -212,6 +291,7 @@ def get_station_details(station_id):
 
 @universe_bp.route('/jumpgates', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_all_jumpgates():
     """获取所有跳跃点的信息"""
     try:
@@ -219,51 +299,41 @@ def get_all_jumpgates():
         system_id = request.args.get('system_id', type=int)
         show_all = request.args.get('show_all', 'false').lower() == 'true'
         
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
             
-        # 添加调试信息
-        print(f"查询跳跃点，参数：system_id={system_id}, show_all={show_all}")
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
             
-        # 构建查询
-        query = JumpGate.query
-        
-        # 如果不显示所有跳跃点，需要筛选未发现星系中的跳跃点
-        if not show_all:
-            # 只显示已知星系的跳跃点
-            query = query.join(StarSystem, JumpGate.source_system_id == StarSystem.system_id).filter(
-                db.or_(
-                    StarSystem.is_discovered == True,
-                    StarSystem.type == 'core'
-                )
-            )
+        logger.debug('查询跳跃点，参数：system_id=%s, show_all=%s', system_id, show_all)
+            
+        snapshot = get_universe_snapshot(system_id=system_id)
         
         # 如果指定了system_id，只返回该星系的跳跃点
         if system_id:
-            system = StarSystem.query.get(system_id)
+            system = snapshot.systems.get(system_id)
             if not system:
                 return jsonify({'error': '星系不存在'}), 404
                 
             # 检查是否为玩家已发现的星系或初始星系
-            if not show_all and not system.is_discovered and system.type != 'core':
+            if not show_all and system_id not in visibility.visible:
                 return jsonify({'error': '星系尚未发现'}), 403
                 
-            query = query.filter(JumpGate.source_system_id == system_id)
-            
-        # 获取跳跃点
-        gates = query.all()
-        
-        # 打印数据库查询结果
-        print(f"查询到 {len(gates)} 个跳跃点")
-        for gate in gates:
-            print(f"跳跃点ID: {gate.gate_id}, 名称: {gate.name}, 源星系: {gate.source_system_id}, 目标星系: {gate.destination_system_id}")
+            gates = list(snapshot.gates_by_source.get(system_id, ()))
+        elif show_all:
+            gates = list(snapshot.gates)
+        else:
+            # 只显示已知星系的跳跃点
+            gates = []
+            for gate in snapshot.gates:
+                if gate['source_system_id'] in visibility.visible:
+                    gates.append(gate)
         
         # 构造响应数据
-        gates_data = [gate.to_dict() for gate in gates]
+        gates_data = gates
+        record_row_count(len(gates_data))
         
         return jsonify({
             'success': True,
@@ -274,58 +344,91 @@ def get_all_jumpgates():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@universe_bp.route('/route', methods=['GET'])
+@jwt_required()
+@cached_json_response(universe_data_version)
+def get_route():
+    """规划两个星系之间的航线
+    
+    查询参数:
+        from_system_id: 起点星系ID
+        to_system_id: 终点星系ID
+        mode: (可选) shortest/cheapest/safest，默认shortest
+        game_id: (可选) 存档ID，按该存档的发现记录判断可见性
+        show_all: (可选) 为true时不检查起终点是否已发现
+    """
+    try:
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
+            
+        # 获取查询参数
+        from_system_id = request.args.get('from_system_id', type=int)
+        to_system_id = request.args.get('to_system_id', type=int)
+        mode = request.args.get('mode', 'shortest')
+        show_all = request.args.get('show_all', 'false').lower() == 'true'
+        
+        if from_system_id is None or to_system_id is None:
+            return jsonify({'error': '请提供起点和终点星系ID'}), 400
+            
+        if mode not in ROUTE_MODES:
+            return jsonify({'error': f'不支持的规划模式: {mode}'}), 400
+            
+        try:
+            visibility = get_request_visibility(user_id)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+            
+        snapshot = get_universe_snapshot()
+        for system_id in (from_system_id, to_system_id):
+            system = snapshot.systems.get(system_id)
+            if not system:
+                return jsonify({'error': '星系不存在'}), 404
+                
+            # 起点和终点都必须是玩家已发现的星系或初始星系
+            if not show_all and system_id not in visibility.visible:
+                return jsonify({'error': '星系尚未发现'}), 403
+        
+        planner = get_route_planner()
+        path = planner.find_route(from_system_id, to_system_id, mode)
+        
+        if path is None:
+            return jsonify({'error': '无法到达目标星系'}), 404
+            
+        route_data = planner.describe_route(from_system_id, path)
+        route_data['mode'] = mode
+        
+        return jsonify({
+            'success': True,
+            'route': route_data
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @universe_bp.route('/factions', methods=['GET'])
 @jwt_required()
+@cached_json_response(universe_data_version)
 def get_all_factions():
     """获取所有势力的信息"""
     try:
-        # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
-        
-        if not user:
-            return jsonify({'error': '无效的用户'}), 401
+        # 当前用户（jwt_required已确认用户存在）
+        user_id = current_user.user_id
             
-        # 添加调试信息
-        print("开始查询factions表...")
-        
-        # 获取所有势力
+        # 获取所有势力（与关系变化计算共用快照中的势力关系矩阵）
         try:
-            factions = Faction.query.all()
-            print(f"获取到 {len(factions)} 个势力记录")
+            factions_data = list(get_universe_snapshot().faction_matrix.factions)
         except Exception as e:
-            print(f"查询Faction表时发生错误: {str(e)}")
-            # 打印更详细的错误信息，包括堆栈跟踪
-            import traceback
-            traceback.print_exc()
+            logger.exception('加载势力数据时发生错误')
             return jsonify({'error': f'数据库查询失败: {str(e)}'}), 500
-        
-        # 构造响应数据
-        try:
-            factions_data = []
-            for faction in factions:
-                try:
-                    faction_dict = faction.to_dict()
-                    factions_data.append(faction_dict)
-                    print(f"处理势力: {faction.name}")
-                except Exception as e:
-                    print(f"转换势力数据时出错 (ID={faction.faction_id}): {str(e)}")
-                    continue
             
-            print(f"成功处理 {len(factions_data)} 个势力数据")
-            
-            return jsonify({
-                'success': True,
-                'count': len(factions_data),
-                'factions': factions_data
-            }), 200
-        except Exception as e:
-            print(f"构造响应数据时出错: {str(e)}")
-            traceback.print_exc()
-            return jsonify({'error': f'处理数据失败: {str(e)}'}), 500
+        record_row_count(len(factions_data))
+        
+        return jsonify({
+            'success': True,
+            'count': len(factions_data),
+            'factions': factions_data
+        }), 200
             
     except Exception as e:
-        print(f"获取势力信息时出现未处理异常: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('获取势力信息时出现未处理异常')
         return jsonify({'error': str(e)}), 500
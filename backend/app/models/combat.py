@@ -0,0 +1,66 @@
+"""
+Freelancer游戏 - 战斗模型
+"""
+from datetime import datetime
+from .. import db
+
+class EnemyType(db.Model):
+    """敌人类型模型"""
+    __tablename__ = 'enemy_types'
+    
+    enemy_type_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    faction_id = db.Column(db.Integer, db.ForeignKey('factions.faction_id'))
+    difficulty_level = db.Column(db.SmallInteger)  # 1-10
+    base_health = db.Column(db.Integer)
+    base_damage = db.Column(db.Integer)
+    base_reward = db.Column(db.Numeric(15, 2))
+    ship_model_id = db.Column(db.Integer, db.ForeignKey('ship_models.model_id'))
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'enemy_type_id': self.enemy_type_id,
+            'name': self.name,
+            'description': self.description,
+            'faction_id': self.faction_id,
+            'difficulty_level': self.difficulty_level,
+            'base_health': self.base_health,
+            'base_damage': self.base_damage,
+            'base_reward': float(self.base_reward) if self.base_reward is not None else None,
+            'ship_model_id': self.ship_model_id
+        }
+
+class CombatEncounter(db.Model):
+    """战斗遭遇模型"""
+    __tablename__ = 'combat_encounters'
+    
+    encounter_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    player_ship_id = db.Column(db.Integer, db.ForeignKey('player_ships.ship_id'), nullable=False)
+    system_id = db.Column(db.Integer, db.ForeignKey('star_systems.system_id'), nullable=False)
+    enemy_type_id = db.Column(db.Integer, db.ForeignKey('enemy_types.enemy_type_id'), nullable=False)
+    enemy_count = db.Column(db.Integer)
+    outcome = db.Column(db.Enum('victory', 'defeat', 'escape', 'in_progress'), default='in_progress')
+    start_time = db.Column(db.DateTime, default=datetime.utcnow)
+    end_time = db.Column(db.DateTime)
+    reward_credits = db.Column(db.Numeric(15, 2))
+    reward_reputation = db.Column(db.Integer)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'encounter_id': self.encounter_id,
+            'game_id': self.game_id,
+            'player_ship_id': self.player_ship_id,
+            'system_id': self.system_id,
+            'enemy_type_id': self.enemy_type_id,
+            'enemy_count': self.enemy_count,
+            'outcome': self.outcome,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'reward_credits': float(self.reward_credits) if self.reward_credits is not None else None,
+            'reward_reputation': self.reward_reputation
+        }
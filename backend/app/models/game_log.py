@@ -0,0 +1,30 @@
+"""
+Freelancer游戏 - 游戏日志模型
+"""
+from datetime import datetime
+from .. import db
+
+class GameLog(db.Model):
+    """存档内游戏事件日志模型"""
+    __tablename__ = 'game_logs'
+    __table_args__ = (
+        # 按存档分页读取日志（按时间倒序的键集分页）
+        db.Index('idx_game_log_keyset', 'user_id', 'game_id', 'created_at', 'log_id'),
+    )
+    
+    log_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    log_type = db.Column(db.String(50))
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'log_id': self.log_id,
+            'game_id': self.game_id,
+            'log_type': self.log_type,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,72 @@
+"""
+Freelancer游戏 - 物品与市场模型
+"""
+from datetime import datetime
+from .. import db
+
+class Item(db.Model):
+    """物品模型（商品、武器、装备和消耗品）"""
+    __tablename__ = 'items'
+    
+    item_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    item_type = db.Column(db.Enum('commodity', 'weapon', 'equipment', 'consumable'), nullable=False)
+    weight = db.Column(db.Float, default=1.0)
+    base_price = db.Column(db.Numeric(15, 2), default=0)
+    manufacturer_id = db.Column(db.Integer)  # manufacturers表暂无对应模型
+    is_legal = db.Column(db.Boolean, default=True)
+    contraband_level = db.Column(db.SmallInteger, default=0)
+    icon_url = db.Column(db.String(255))
+    rarity_level = db.Column(db.SmallInteger, default=1)
+    is_tradeable = db.Column(db.Boolean, default=True)
+    is_usable = db.Column(db.Boolean, default=False)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'item_id': self.item_id,
+            'name': self.name,
+            'description': self.description,
+            'item_type': self.item_type,
+            'weight': self.weight,
+            'base_price': float(self.base_price) if self.base_price is not None else None,
+            'manufacturer_id': self.manufacturer_id,
+            'is_legal': self.is_legal,
+            'contraband_level': self.contraband_level,
+            'icon_url': self.icon_url,
+            'rarity_level': self.rarity_level,
+            'is_tradeable': self.is_tradeable,
+            'is_usable': self.is_usable
+        }
+
+class MarketPrice(db.Model):
+    """存档内空间站的商品价格模型"""
+    __tablename__ = 'market_prices'
+    __table_args__ = (
+        db.Index('idx_game_station_item', 'game_id', 'station_id', 'item_id'),
+    )
+    
+    price_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    station_id = db.Column(db.Integer, db.ForeignKey('stations.station_id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.item_id'), nullable=False)
+    buy_price = db.Column(db.Numeric(15, 2))
+    sell_price = db.Column(db.Numeric(15, 2))
+    available_quantity = db.Column(db.Integer)
+    demand_level = db.Column(db.SmallInteger)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'price_id': self.price_id,
+            'game_id': self.game_id,
+            'station_id': self.station_id,
+            'item_id': self.item_id,
+            'buy_price': float(self.buy_price) if self.buy_price is not None else None,
+            'sell_price': float(self.sell_price) if self.sell_price is not None else None,
+            'available_quantity': self.available_quantity,
+            'demand_level': self.demand_level,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+        }
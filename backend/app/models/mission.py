@@ -0,0 +1,110 @@
+"""
+Freelancer游戏 - 任务模型
+"""
+from datetime import datetime
+from .. import db
+
+class MissionType(db.Model):
+    """任务类型模型"""
+    __tablename__ = 'mission_types'
+    
+    type_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    category = db.Column(db.Enum('delivery', 'combat', 'exploration', 'smuggling', 'rescue'))
+    base_reward = db.Column(db.Numeric(15, 2))
+    base_reputation = db.Column(db.Integer)
+    difficulty_multiplier = db.Column(db.Float, default=1.0)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'type_id': self.type_id,
+            'name': self.name,
+            'description': self.description,
+            'category': self.category,
+            'base_reward': float(self.base_reward) if self.base_reward is not None else None,
+            'base_reputation': self.base_reputation,
+            'difficulty_multiplier': self.difficulty_multiplier
+        }
+
+class Mission(db.Model):
+    """任务模型
+    
+    预先编写的任务board_key为空；任务板生成的任务在玩家接受时才写入，
+    board_key为 存档:空间站:时间段:序号，同一个任务只能被接受一次
+    """
+    __tablename__ = 'missions'
+    
+    mission_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    type_id = db.Column(db.Integer, db.ForeignKey('mission_types.type_id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    giver_station_id = db.Column(db.Integer, db.ForeignKey('stations.station_id'), nullable=False)
+    target_system_id = db.Column(db.Integer, db.ForeignKey('star_systems.system_id'))
+    target_planet_id = db.Column(db.Integer, db.ForeignKey('planets.planet_id'))
+    target_station_id = db.Column(db.Integer, db.ForeignKey('stations.station_id'))
+    reward_credits = db.Column(db.Numeric(15, 2))
+    reward_reputation = db.Column(db.Integer)
+    time_limit_hours = db.Column(db.Integer)
+    difficulty_level = db.Column(db.SmallInteger)  # 1-10
+    required_commodity_id = db.Column(db.Integer)  # commodities表暂无对应模型
+    required_quantity = db.Column(db.Integer)
+    is_story_mission = db.Column(db.Boolean, default=False)
+    is_repeatable = db.Column(db.Boolean, default=False)
+    board_key = db.Column(db.String(64), unique=True)
+    
+    # 关系
+    mission_type = db.relationship('MissionType')
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'mission_id': self.mission_id,
+            'type_id': self.type_id,
+            'title': self.title,
+            'description': self.description,
+            'giver_station_id': self.giver_station_id,
+            'target_system_id': self.target_system_id,
+            'target_planet_id': self.target_planet_id,
+            'target_station_id': self.target_station_id,
+            'reward_credits': float(self.reward_credits) if self.reward_credits is not None else None,
+            'reward_reputation': self.reward_reputation,
+            'time_limit_hours': self.time_limit_hours,
+            'difficulty_level': self.difficulty_level,
+            'required_commodity_id': self.required_commodity_id,
+            'required_quantity': self.required_quantity,
+            'is_story_mission': self.is_story_mission,
+            'is_repeatable': self.is_repeatable
+        }
+
+class PlayerMission(db.Model):
+    """玩家在存档中接受的任务模型"""
+    __tablename__ = 'player_missions'
+    __table_args__ = (
+        # 按存档和状态查找任务（例如进行中的任务）
+        db.Index('idx_player_mission_game_status', 'game_id', 'status'),
+    )
+    
+    player_mission_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.mission_id'), nullable=False)
+    status = db.Column(db.Enum('active', 'completed', 'failed', 'abandoned'), default='active')
+    start_time = db.Column(db.DateTime, default=datetime.utcnow)
+    completion_time = db.Column(db.DateTime)
+    current_progress = db.Column(db.Integer, default=0)
+    total_steps = db.Column(db.Integer)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'player_mission_id': self.player_mission_id,
+            'game_id': self.game_id,
+            'mission_id': self.mission_id,
+            'status': self.status,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'completion_time': self.completion_time.isoformat() if self.completion_time else None,
+            'current_progress': self.current_progress,
+            'total_steps': self.total_steps
+        }
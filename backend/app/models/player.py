@@ -0,0 +1,91 @@
+"""
+Freelancer游戏 - 玩家存档进度相关模型
+每条记录都属于某个游戏存档（game_id）
+"""
+from datetime import datetime
+from .. import db
+
+class PlayerFactionStanding(db.Model):
+    """玩家与势力关系模型"""
+    __tablename__ = 'player_faction_standing'
+    __table_args__ = (
+        # 每个存档与每个势力只有一条记录，关系变化按此唯一键批量upsert
+        db.UniqueConstraint('game_id', 'faction_id', name='uq_player_faction_standing'),
+    )
+    
+    standing_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    faction_id = db.Column(db.Integer, db.ForeignKey('factions.faction_id'), nullable=False)
+    standing_value = db.Column(db.Integer, default=0)  # -100到100
+    title = db.Column(db.String(50))
+    last_changed = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'standing_id': self.standing_id,
+            'game_id': self.game_id,
+            'faction_id': self.faction_id,
+            'standing_value': self.standing_value,
+            'title': self.title,
+            'last_changed': self.last_changed.isoformat() if self.last_changed else None
+        }
+
+class PlayerDiscovery(db.Model):
+    """玩家发现记录模型"""
+    __tablename__ = 'player_discoveries'
+    __table_args__ = (
+        # 每个存档对同一对象只有一条发现记录，多个进程同时记录时由数据库拒绝重复
+        db.UniqueConstraint('game_id', 'discovery_type', 'object_id', name='uq_player_discovery'),
+    )
+    
+    discovery_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    discovery_type = db.Column(db.Enum('system', 'planet', 'station', 'anomaly'))
+    object_id = db.Column(db.Integer, nullable=False)
+    discovery_time = db.Column(db.DateTime, default=datetime.utcnow)
+    reward_credits = db.Column(db.Numeric(15, 2))
+    reward_reputation = db.Column(db.Integer)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'discovery_id': self.discovery_id,
+            'game_id': self.game_id,
+            'discovery_type': self.discovery_type,
+            'object_id': self.object_id,
+            'discovery_time': self.discovery_time.isoformat() if self.discovery_time else None,
+            'reward_credits': float(self.reward_credits) if self.reward_credits is not None else None,
+            'reward_reputation': self.reward_reputation
+        }
+
+class PlayerStatistic(db.Model):
+    """玩家统计数据模型，每个存档一条"""
+    __tablename__ = 'player_statistics'
+    
+    stat_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    systems_visited = db.Column(db.Integer, default=0)
+    missions_completed = db.Column(db.Integer, default=0)
+    enemies_defeated = db.Column(db.Integer, default=0)
+    total_credits_earned = db.Column(db.Numeric(15, 2), default=0)
+    total_distance_traveled = db.Column(db.Numeric(15, 2), default=0)
+    total_playtime_minutes = db.Column(db.Integer, default=0)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'stat_id': self.stat_id,
+            'game_id': self.game_id,
+            'systems_visited': self.systems_visited,
+            'missions_completed': self.missions_completed,
+            'enemies_defeated': self.enemies_defeated,
+            'total_credits_earned': float(self.total_credits_earned) if self.total_credits_earned is not None else 0.0,
+            'total_distance_traveled': float(self.total_distance_traveled) if self.total_distance_traveled is not None else 0.0,
+            'total_playtime_minutes': self.total_playtime_minutes,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+        }
@@ -0,0 +1,26 @@
+"""
+Freelancer游戏 - 已撤销令牌模型
+"""
+from datetime import datetime
+from .. import db
+
+class RevokedToken(db.Model):
+    """已撤销的JWT记录模型
+
+    jti不为空时撤销单个令牌（例如退出登录）；
+    jti为空时撤销该用户在revoked_at之前签发的全部令牌（例如修改密码）
+    """
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        # 启动和同步时加载未过期的记录
+        db.Index('idx_revoked_token_expires', 'expires_at'),
+    )
+    
+    revocation_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(36), unique=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or self.user_id}>'
@@ -0,0 +1,203 @@
+"""
+Freelancer游戏 - 飞船模型
+"""
+from datetime import datetime
+from .. import db
+
+class ShipModel(db.Model):
+    """飞船型号模型"""
+    __tablename__ = 'ship_models'
+    
+    model_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    ship_class = db.Column('class', db.Enum('fighter', 'interceptor', 'bomber', 'freighter', 'transport',
+                                            'explorer', 'support', 'capital'), nullable=False)
+    manufacturer_id = db.Column(db.Integer, nullable=False)  # manufacturers表暂无对应模型
+    faction_id = db.Column(db.Integer, db.ForeignKey('factions.faction_id'))
+    cargo_capacity = db.Column(db.Integer, default=0)
+    weapon_slots = db.Column(db.Integer, default=2)
+    armor = db.Column(db.Integer, default=100)
+    speed = db.Column(db.Integer, default=100)
+    maneuverability = db.Column(db.SmallInteger, default=5)
+    jump_range = db.Column(db.Integer, default=1)
+    crew_capacity = db.Column(db.Integer, default=1)
+    price = db.Column(db.Numeric(12, 2), nullable=False)
+    is_military = db.Column(db.Boolean, default=False)
+    image_url = db.Column(db.String(255))
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'model_id': self.model_id,
+            'name': self.name,
+            'description': self.description,
+            'class': self.ship_class,
+            'manufacturer_id': self.manufacturer_id,
+            'faction_id': self.faction_id,
+            'cargo_capacity': self.cargo_capacity,
+            'weapon_slots': self.weapon_slots,
+            'armor': self.armor,
+            'speed': self.speed,
+            'maneuverability': self.maneuverability,
+            'jump_range': self.jump_range,
+            'crew_capacity': self.crew_capacity,
+            'price': float(self.price) if self.price is not None else None,
+            'is_military': self.is_military,
+            'image_url': self.image_url
+        }
+
+class PlayerShip(db.Model):
+    """玩家拥有的飞船模型"""
+    __tablename__ = 'player_ships'
+    
+    ship_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('ship_models.model_id'), nullable=False)
+    name = db.Column(db.String(100))
+    current_health = db.Column(db.Integer)
+    current_shield = db.Column(db.Integer)
+    current_energy = db.Column(db.Integer)
+    current_cargo_space = db.Column(db.Integer)
+    current_location_type = db.Column(db.Enum('system', 'planet', 'station'))
+    current_location_id = db.Column(db.Integer)
+    location_detail = db.Column(db.Text)
+    x_coord = db.Column(db.Numeric(10, 2))
+    y_coord = db.Column(db.Numeric(10, 2))
+    z_coord = db.Column(db.Numeric(10, 2))
+    ship_status = db.Column(db.Enum('docked', 'in_orbit', 'in_space', 'in_warp'), nullable=False)
+    is_active = db.Column(db.Boolean, default=False)
+    purchased_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # 关系
+    model = db.relationship('ShipModel')
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'ship_id': self.ship_id,
+            'game_id': self.game_id,
+            'model_id': self.model_id,
+            'name': self.name,
+            'current_health': self.current_health,
+            'current_shield': self.current_shield,
+            'current_energy': self.current_energy,
+            'current_cargo_space': self.current_cargo_space,
+            'current_location_type': self.current_location_type,
+            'current_location_id': self.current_location_id,
+            'location_detail': self.location_detail,
+            'x_coord': float(self.x_coord) if self.x_coord is not None else None,
+            'y_coord': float(self.y_coord) if self.y_coord is not None else None,
+            'z_coord': float(self.z_coord) if self.z_coord is not None else None,
+            'ship_status': self.ship_status,
+            'is_active': self.is_active,
+            'purchased_at': self.purchased_at.isoformat() if self.purchased_at else None
+        }
+
+class EquipmentType(db.Model):
+    """装备类型模型"""
+    __tablename__ = 'equipment_types'
+    
+    type_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.Text)
+    category = db.Column(db.Enum('weapon', 'shield', 'engine', 'scanner', 'cargo'))
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'type_id': self.type_id,
+            'name': self.name,
+            'description': self.description,
+            'category': self.category
+        }
+
+class EquipmentItem(db.Model):
+    """装备项模型"""
+    __tablename__ = 'equipment_items'
+    
+    item_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    type_id = db.Column(db.Integer, db.ForeignKey('equipment_types.type_id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    manufacturer_id = db.Column(db.Integer)  # manufacturers表暂无对应模型
+    base_price = db.Column(db.Numeric(15, 2), nullable=False)
+    level = db.Column(db.SmallInteger)  # 1-10
+    effect_value = db.Column(db.Integer)  # 效果值，含义取决于装备类别
+    energy_usage = db.Column(db.Integer, default=0)
+    cooldown_time = db.Column(db.Float, default=0.0)
+    weight = db.Column(db.Integer)
+    image_url = db.Column(db.String(255))
+    
+    # 关系
+    equipment_type = db.relationship('EquipmentType')
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'item_id': self.item_id,
+            'type_id': self.type_id,
+            'name': self.name,
+            'description': self.description,
+            'manufacturer_id': self.manufacturer_id,
+            'base_price': float(self.base_price) if self.base_price is not None else None,
+            'level': self.level,
+            'effect_value': self.effect_value,
+            'energy_usage': self.energy_usage,
+            'cooldown_time': self.cooldown_time,
+            'weight': self.weight,
+            'image_url': self.image_url
+        }
+
+class ShipEquipment(db.Model):
+    """飞船上安装的装备模型"""
+    __tablename__ = 'ship_equipment'
+    
+    ship_equipment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    ship_id = db.Column(db.Integer, db.ForeignKey('player_ships.ship_id', ondelete='CASCADE'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    equipment_id = db.Column(db.Integer, db.ForeignKey('equipment_items.item_id'), nullable=False)
+    slot_number = db.Column(db.SmallInteger)
+    equipment_condition = db.Column(db.SmallInteger, default=100)  # 0-100
+    installed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'ship_equipment_id': self.ship_equipment_id,
+            'ship_id': self.ship_id,
+            'game_id': self.game_id,
+            'equipment_id': self.equipment_id,
+            'slot_number': self.slot_number,
+            'equipment_condition': self.equipment_condition,
+            'installed_at': self.installed_at.isoformat() if self.installed_at else None
+        }
+
+class ShipCargoItem(db.Model):
+    """飞船上装载的货物模型"""
+    __tablename__ = 'ship_cargo_items'
+    
+    cargo_item_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    ship_id = db.Column(db.Integer, db.ForeignKey('player_ships.ship_id', ondelete='CASCADE'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game_saves.game_id', ondelete='CASCADE'), nullable=False)
+    commodity_id = db.Column(db.Integer, nullable=False)  # commodities表暂无对应模型
+    quantity = db.Column(db.Integer, nullable=False)
+    purchased_price = db.Column(db.Numeric(15, 2))
+    source_location_id = db.Column(db.Integer)
+    source_location_type = db.Column(db.Enum('station', 'planet', 'system'))
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'cargo_item_id': self.cargo_item_id,
+            'ship_id': self.ship_id,
+            'game_id': self.game_id,
+            'commodity_id': self.commodity_id,
+            'quantity': self.quantity,
+            'purchased_price': float(self.purchased_price) if self.purchased_price is not None else None,
+            'source_location_id': self.source_location_id,
+            'source_location_type': self.source_location_type,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None
+        }
@@ -9,6 +9,9 @@ from datetime import datetime
 class StarSystem(db.Model):
     """星系模型"""
     __tablename__ = 'star_systems'
+    __table_args__ = (
+        db.Index('idx_system_type_discovered', 'type', 'is_discovered'),
+    )
     
     system_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
@@ -28,8 +31,16 @@ class StarSystem(db.Model):
     controlling_faction = db.relationship('Faction', lazy=True)
     
     # 将星系数据转换为字典
-    def to_dict(self, include_relations=False):
-        """将星系数据转换为字典"""
+    def to_dict(self, include_relations=False, planet_count=None):
+        """将星系数据转换为字典
+        
+        Args:
+            include_relations: 是否包含空间站和控制势力等关联数据
+            planet_count: 预先统计好的行星数量，传入时不再懒加载planets关系
+        """
+        if planet_count is None:
+            planet_count = len(self.planets) if self.planets else 0
+        
         data = {
             'system_id': self.system_id,
             'name': self.name,
@@ -42,7 +53,7 @@ class StarSystem(db.Model):
             'y_coord': self.y_coord,
             'z_coord': self.z_coord,
             'is_discovered': self.is_discovered,
-            'planet_count': len(self.planets) if self.planets else 0
+            'planet_count': planet_count
         }
         
         # 包含关联数据
@@ -127,6 +138,10 @@ class SpaceStation(db.Model):
 class JumpGate(db.Model):
     """跳跃点模型"""
     __tablename__ = 'jump_gates'
+    __table_args__ = (
+        db.Index('idx_gate_source_system', 'source_system_id'),
+        db.Index('idx_gate_destination_system', 'destination_system_id'),
+    )
     
     gate_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
@@ -190,3 +205,31 @@ class Faction(db.Model):
             'is_player_accessible': self.is_player_accessible,
             'icon_url': self.icon_url
         }
+
+# 势力关系模型
+class FactionRelationship(db.Model):
+    """势力之间的关系，每对势力记录一次"""
+    __tablename__ = 'faction_relationships'
+    __table_args__ = (
+        db.Index('idx_faction_relations', 'faction_id1', 'faction_id2'),
+    )
+    
+    relationship_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    faction_id1 = db.Column(db.Integer, db.ForeignKey('factions.faction_id'), nullable=False)
+    faction_id2 = db.Column(db.Integer, db.ForeignKey('factions.faction_id'), nullable=False)
+    relationship_level = db.Column(db.Integer, default=0)  # -100到100
+    at_war = db.Column(db.Boolean, default=False)
+    trade_agreement = db.Column(db.Boolean, default=False)
+    last_changed = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """将势力关系转换为字典"""
+        return {
+            'relationship_id': self.relationship_id,
+            'faction_id1': self.faction_id1,
+            'faction_id2': self.faction_id2,
+            'relationship_level': self.relationship_level,
+            'at_war': self.at_war,
+            'trade_agreement': self.trade_agreement,
+            'last_changed': self.last_changed.isoformat() if self.last_changed else None
+        }
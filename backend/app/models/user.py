@@ -2,10 +2,11 @@
 Freelancer游戏 - 用户模型
 """
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token
 
 from .. import db
+from ..services.password_pool import PasswordPoolBusy
+from ..utils.security import hash_password, needs_rehash, validate_password
 
 class User(db.Model):
     """用户模型"""
@@ -39,11 +40,24 @@ class User(db.Model):
     
     def set_password(self, password):
         """设置密码哈希"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """验证密码"""
-        return check_password_hash(self.password_hash, password)
+        """验证密码
+        
+        验证通过且哈希参数与当前配置不同时，用新参数重新计算哈希（由调用方提交）
+        
+        Raises:
+            PasswordPoolBusy: 同时进行的密码计算已达上限
+        """
+        if not validate_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            try:
+                self.password_hash = hash_password(password)
+            except PasswordPoolBusy:
+                pass  # 计算池繁忙时保留旧哈希，下次登录再更新
+        return True
     
     def update_last_login(self):
         """更新最后登录时间"""
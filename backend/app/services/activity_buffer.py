@@ -0,0 +1,300 @@
+"""
+存档活动数据的延迟写入
+最后游玩时间、累计游玩时长和统计计数器（航行距离、击败敌人数等）更新频繁且可以合并：
+请求只在内存中按存档累加，后台线程每隔 WRITE_BEHIND_INTERVAL 秒（或待写入的存档数
+达到上限、进程退出时）用两条executemany的UPDATE批量写回并提交一次
+"""
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.player import PlayerStatistic
+
+logger = logging.getLogger('freelancer.activity')
+
+# 可以累加的统计计数器（player_statistics的列）
+STATISTIC_COUNTERS = ('systems_visited', 'missions_completed', 'enemies_defeated',
+                      'total_credits_earned', 'total_distance_traveled')
+
+
+class _PendingSave:
+    """单个存档尚未写回的活动数据"""
+
+    __slots__ = ('last_played_at', 'playtime', 'statistics')
+
+    def __init__(self):
+        self.last_played_at = None
+        self.playtime = 0
+        self.statistics = {}
+
+    def merge(self, other):
+        if other.last_played_at is not None and (self.last_played_at is None
+                                                 or other.last_played_at > self.last_played_at):
+            self.last_played_at = other.last_played_at
+        self.playtime += other.playtime
+        for name, delta in other.statistics.items():
+            self.statistics[name] = self.statistics.get(name, 0) + delta
+
+
+class ActivityBuffer:
+    """按存档合并活动数据，批量写回数据库"""
+
+    def __init__(self, app, interval=5, max_pending=1000):
+        """
+        Args:
+            app: Flask应用，写回时使用其应用上下文
+            interval: 后台写回间隔（秒），为0时不启动后台线程
+            max_pending: 待写回的存档数达到该值时立即写回
+        """
+        self._app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _entry(self, game_id):
+        entry = self._pending.get(game_id)
+        if entry is None:
+            entry = self._pending[game_id] = _PendingSave()
+        return entry
+
+    def touch(self, game_id, at=None):
+        """记录存档的最后游玩时间"""
+        at = at or datetime.utcnow()
+        with self._lock:
+            entry = self._entry(game_id)
+            if entry.last_played_at is None or at > entry.last_played_at:
+                entry.last_played_at = at
+        self._after_record()
+
+    def add_playtime(self, game_id, seconds):
+        """累加存档的游玩时长（秒），同时更新最后游玩时间"""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entry(game_id)
+            entry.playtime += int(seconds)
+            if entry.last_played_at is None or now > entry.last_played_at:
+                entry.last_played_at = now
+        self._after_record()
+
+    def add_statistics(self, game_id, **deltas):
+        """累加存档的统计计数器
+
+        Raises:
+            ValueError: 未知的计数器名称
+        """
+        unknown = [name for name in deltas if name not in STATISTIC_COUNTERS]
+        if unknown:
+            raise ValueError(f"未知的统计项: {', '.join(unknown)}")
+        with self._lock:
+            statistics = self._entry(game_id).statistics
+            for name, delta in deltas.items():
+                if delta:
+                    statistics[name] = statistics.get(name, 0) + delta
+        self._after_record()
+
+    def discard(self, game_id):
+        """丢弃存档尚未写回的数据（例如存档被删除时）"""
+        with self._lock:
+            self._pending.pop(game_id, None)
+
+    def pending(self, game_id):
+        """存档尚未写回的数据副本：(最后游玩时间, 游玩秒数, 统计增量字典)，没有时返回None"""
+        with self._lock:
+            entry = self._pending.get(game_id)
+            if entry is None:
+                return None
+            return entry.last_played_at, entry.playtime, dict(entry.statistics)
+
+    def apply_pending(self, save):
+        """把尚未写回的最后游玩时间和游玩时长叠加到存档字典上（字段与 GameSave.to_dict 一致）"""
+        pending = self.pending(save['game_id'])
+        if pending is None:
+            return save
+        last_played_at, playtime, _ = pending
+        if last_played_at is not None:
+            save['last_played_at'] = last_played_at.isoformat()
+        if playtime:
+            save['total_playtime'] = (save.get('total_playtime') or 0) + playtime
+        return save
+
+    def apply_pending_statistics(self, game_id, statistics):
+        """把尚未写回的统计增量叠加到统计字典上（字段与 PlayerStatistic.to_dict 一致）"""
+        pending = self.pending(game_id)
+        if pending is None or statistics is None:
+            return statistics
+        _, playtime, deltas = pending
+        for name, delta in deltas.items():
+            statistics[name] = (statistics.get(name) or 0) + delta
+        if playtime:
+            statistics['total_playtime_minutes'] = (statistics.get('total_playtime_minutes') or 0) + playtime // 60
+        return statistics
+
+    def _after_record(self):
+        if len(self._pending) < self.max_pending:
+            return
+        if self._thread is not None:
+            self._wake.set()
+        else:
+            self.flush()
+
+    def flush(self, game_ids=None):
+        """把待写回的数据写入数据库并提交
+
+        整批写回失败时回滚，再逐个存档单独写回：全部失败（通常是数据库不可用）时把数据合并回
+        缓冲区等待下次写回；只有部分存档失败时丢弃这些存档的数据，不阻塞其他存档
+
+        Args:
+            game_ids: 可选，只写回这些存档（例如复制、导出存档前）
+
+        Returns:
+            int: 写回的存档数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if game_ids is None:
+                    pending, self._pending = self._pending, {}
+                else:
+                    pending = {game_id: self._pending.pop(game_id) for game_id in game_ids
+                               if game_id in self._pending}
+            if not pending:
+                return 0
+
+            # 使用独立的应用上下文（独立的数据库会话），不影响调用方所在请求的事务
+            with self._app.app_context():
+                try:
+                    _write(pending)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('活动数据批量写回失败，逐个存档重试')
+                    return self._flush_each(pending)
+                finally:
+                    db.session.remove()
+
+            logger.debug('写回 %d 个存档的活动数据', len(pending))
+            return len(pending)
+
+    def _flush_each(self, pending):
+        """逐个存档写回并提交，返回写回的存档数"""
+        failed = {}
+        for game_id, entry in pending.items():
+            try:
+                _write({game_id: entry})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                failed[game_id] = entry
+
+        if len(failed) == len(pending):
+            logger.error('活动数据写回失败，%d 个存档的数据将在下次重试', len(pending))
+            with self._lock:
+                for game_id, entry in pending.items():
+                    current = self._pending.get(game_id)
+                    if current is not None:
+                        entry.merge(current)
+                    self._pending[game_id] = entry
+            return 0
+
+        if failed:
+            logger.error('存档 %s 的活动数据写回失败，已丢弃', sorted(failed))
+        return len(pending) - len(failed)
+
+    def start(self):
+        """启动后台写回线程"""
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='activity-buffer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写回剩余数据"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.flush()
+
+
+def _write(pending):
+    """两条executemany的UPDATE：game_saves和player_statistics"""
+    saves = [
+        {'b_game_id': game_id, 'b_last_played_at': entry.last_played_at, 'b_playtime': entry.playtime}
+        for game_id, entry in pending.items()
+        if entry.last_played_at is not None or entry.playtime
+    ]
+    if saves:
+        table = GameSave.__table__
+        db.session.execute(
+            db.update(table)
+            .where(table.c.game_id == db.bindparam('b_game_id'))
+            .values(
+                last_played_at=db.func.coalesce(db.bindparam('b_last_played_at', type_=db.DateTime),
+                                                table.c.last_played_at),
+                total_playtime=db.func.coalesce(table.c.total_playtime, 0) + db.bindparam('b_playtime')
+            ),
+            saves
+        )
+
+    statistics = [
+        dict({f'b_{name}': entry.statistics.get(name, 0) for name in STATISTIC_COUNTERS}, b_game_id=game_id)
+        for game_id, entry in pending.items()
+        if entry.statistics or entry.playtime
+    ]
+    if statistics:
+        table = PlayerStatistic.__table__
+        playtime = db.func.coalesce(GameSave.__table__.c.total_playtime, 0)
+        values = {
+            name: db.func.coalesce(table.c[name], 0) + db.bindparam(f'b_{name}')
+            for name in STATISTIC_COUNTERS
+        }
+        # 游玩分钟数由存档的累计游玩秒数换算，不单独累加，避免舍入误差
+        values['total_playtime_minutes'] = (
+            db.select((playtime - playtime % 60) / 60)
+            .where(GameSave.__table__.c.game_id == table.c.game_id)
+            .scalar_subquery()
+        )
+        values['last_updated'] = datetime.utcnow()
+        db.session.execute(
+            db.update(table).where(table.c.game_id == db.bindparam('b_game_id')).values(values),
+            statistics
+        )
+
+
+def init_activity_buffer(app):
+    """创建应用的活动数据缓冲区并启动后台写回线程，进程退出时写回剩余数据
+
+    配置项:
+        WRITE_BEHIND_INTERVAL: 写回间隔（秒），为0时只在待写回存档数达到上限或进程退出时写回
+        WRITE_BEHIND_MAX_PENDING: 待写回存档数上限
+    """
+    buffer = ActivityBuffer(
+        app,
+        interval=app.config.get('WRITE_BEHIND_INTERVAL', 5),
+        max_pending=app.config.get('WRITE_BEHIND_MAX_PENDING', 1000)
+    )
+    app.extensions['activity_buffer'] = buffer
+    buffer.start()
+    atexit.register(buffer.stop)
+    return buffer
+
+
+def get_activity_buffer():
+    """当前应用的活动数据缓冲区"""
+    return current_app.extensions['activity_buffer']
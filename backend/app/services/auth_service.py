@@ -3,6 +3,8 @@
 """
 from app.models.user import User
 from app import db
+from app.services.current_user import forget_user
+from app.services.token_blocklist import get_token_blocklist
 from app.utils.security import hash_password, is_valid_password, is_valid_email, is_valid_username
 from datetime import datetime
 
@@ -107,9 +109,11 @@ class AuthService:
         if not is_valid_password(new_password):
             raise ValueError("新密码不符合安全要求")
             
-        # 更新密码
+        # 更新密码，并撤销此前签发的全部令牌
         user.password_hash = hash_password(new_password)
+        get_token_blocklist().revoke_user_tokens(user_id)
         db.session.commit()
+        forget_user(user_id)
         return True
         
     def update_user_profile(self, user_id, data):
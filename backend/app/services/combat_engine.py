@@ -0,0 +1,452 @@
+"""
+战斗结算引擎
+把一场遭遇看成两支编队（玩家飞船是只有一个单位的编队，敌人是同类型的多个单位）的回合制交火，
+每回合 TICK_SECONDS 秒，最多 MAX_TICKS 回合，未分胜负视为脱离战斗。
+
+一批遭遇的双方属性保存为NumPy数组，每回合对整批遭遇做一次向量化计算，
+可以一次结算成千上万场NPC之间的战斗或玩家的自动战斗。
+随机数来自 numpy.random.Generator，相同的种子和相同的输入得到相同的结果；
+批量结算时整批共用一个随机数序列，结果取决于整批的组成
+
+规则：
+- 武器：effect_value为单发伤害（按装备状态折算），cooldown_time换算为回合数，每次开火每个存活单位消耗
+  energy_usage能量；按槽位顺序开火，能量不足时本回合剩余武器不开火
+- 命中率 = 攻击方精度 × (1 - 目标闪避)，每次开火的命中数服从二项分布
+- 伤害先由护盾吸收，剩余部分按装甲减免：伤害 × 100 / (100 + 装甲)
+- 护盾装备的effect_value为护盾容量，每回合恢复容量的 SHIELD_REGEN_FRACTION；
+  引擎提高闪避，扫描器提高精度；能量每回合恢复 ENERGY_REGEN_PER_TICK，不超过开始时的能量
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+
+from app import db
+from app.models.combat import CombatEncounter, EnemyType
+from app.models.game_save import GameSave
+from app.models.ship import PlayerShip, ShipModel
+from app.services.activity_buffer import get_activity_buffer
+from app.services.game_log_service import log_game_event
+from app.services.ship_stats import get_ship_stats_many
+
+# 回合时长（秒）和最大回合数
+TICK_SECONDS = 1.0
+MAX_TICKS = 120
+
+# 精度与闪避
+PLAYER_ACCURACY = 0.8
+ENEMY_BASE_ACCURACY = 0.5
+ENEMY_ACCURACY_PER_LEVEL = 0.03
+EVASION_PER_MANEUVERABILITY = 0.03
+ENGINE_EVASION_PER_POINT = 0.001
+SCANNER_ACCURACY_PER_POINT = 0.001
+MAX_EVASION = 0.6
+MAX_ACCURACY = 0.95
+
+# 护盾和能量恢复
+SHIELD_REGEN_FRACTION = 0.05
+ENERGY_REGEN_PER_TICK = 10
+
+# 每击毁一个敌人的声望奖励（乘以敌人难度等级，仅胜利时获得）
+REPUTATION_PER_LEVEL = 1
+
+# 结算结果（以A方视角）
+OUTCOME_TIMEOUT = 0
+OUTCOME_A_WINS = 1
+OUTCOME_B_WINS = 2
+OUTCOME_BOTH_DESTROYED = 3
+
+# 玩家为A方时对应的combat_encounters.outcome
+PLAYER_OUTCOMES = {
+    OUTCOME_TIMEOUT: 'escape',
+    OUTCOME_A_WINS: 'victory',
+    OUTCOME_B_WINS: 'defeat',
+    OUTCOME_BOTH_DESTROYED: 'defeat'
+}
+
+
+def _column(value, size):
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (size,)).copy()
+
+
+def _matrix(value, size):
+    array = np.asarray(value, dtype=np.float64)
+    if array.ndim < 2:
+        array = array.reshape(-1, 1)
+    return np.broadcast_to(array, (size, array.shape[1])).copy()
+
+
+class Fleet:
+    """一批遭遇中一方的战斗属性
+
+    每个属性是长度为N（遭遇数）的数组，武器属性为 N×W 数组（W为武器槽数，空槽伤害为0）。
+    同一编队的单位属性相同：health是全部单位剩余生命值之和，存活单位数为 ceil(health / unit_health)，
+    每个存活单位每回合都使用全部就绪的武器
+    """
+
+    __slots__ = ('count', 'unit_health', 'health', 'shield', 'max_shield', 'shield_regen', 'armor',
+                 'evasion', 'accuracy', 'energy', 'max_energy', 'energy_regen',
+                 'weapon_damage', 'weapon_energy', 'weapon_cooldown')
+
+    def __init__(self, count, unit_health, weapon_damage, health=None, shield=0, max_shield=None,
+                 shield_regen=0, armor=0, evasion=0, accuracy=PLAYER_ACCURACY, energy=0, max_energy=None,
+                 energy_regen=0, weapon_energy=0, weapon_cooldown=1):
+        """
+        Args:
+            count: 单位数
+            unit_health: 单个单位的生命值
+            weapon_damage: 每件武器的单发伤害，N×W
+            health: 可选，剩余生命值总和，默认 count × unit_health
+            max_shield, max_energy: 可选，护盾和能量上限，默认为开始时的值
+            weapon_energy: 每件武器每次开火的能量消耗
+            weapon_cooldown: 每件武器两次开火之间的回合数（至少为1）
+            其余参数为标量或长度为N的数组
+        """
+        size = len(np.atleast_1d(count))
+        self.count = _column(count, size)
+        self.unit_health = np.maximum(_column(unit_health, size), 1.0)
+        self.health = self.count * self.unit_health if health is None else _column(health, size)
+        self.shield = _column(shield, size)
+        self.max_shield = self.shield.copy() if max_shield is None else np.maximum(_column(max_shield, size),
+                                                                                   self.shield)
+        self.shield_regen = _column(shield_regen, size)
+        self.armor = np.maximum(_column(armor, size), 0.0)
+        self.evasion = np.clip(_column(evasion, size), 0.0, MAX_EVASION)
+        self.accuracy = np.clip(_column(accuracy, size), 0.0, MAX_ACCURACY)
+        self.energy = _column(energy, size)
+        self.max_energy = self.energy.copy() if max_energy is None else np.maximum(_column(max_energy, size),
+                                                                                   self.energy)
+        self.energy_regen = _column(energy_regen, size)
+        self.weapon_damage = _matrix(weapon_damage, size)
+        width = self.weapon_damage.shape[1]
+        self.weapon_energy = np.broadcast_to(np.asarray(weapon_energy, dtype=np.float64),
+                                             (size, width)).copy()
+        self.weapon_cooldown = np.maximum(np.broadcast_to(np.asarray(weapon_cooldown, dtype=np.float64),
+                                                          (size, width)), 1.0)
+
+    def __len__(self):
+        return len(self.count)
+
+    def alive(self):
+        """每场遭遇中存活的单位数"""
+        return np.where(self.health > 1e-9, np.ceil(self.health / self.unit_health - 1e-9), 0.0)
+
+
+def stack_fleets(fleets):
+    """把多个编队按遭遇拼接成一批，武器槽数不同时用空槽补齐"""
+    width = max(fleet.weapon_damage.shape[1] for fleet in fleets)
+
+    def pad(matrix, fill):
+        return np.pad(matrix, ((0, 0), (0, width - matrix.shape[1])), constant_values=fill)
+
+    stacked = Fleet.__new__(Fleet)
+    for name in Fleet.__slots__:
+        if name.startswith('weapon_'):
+            fill = 1.0 if name == 'weapon_cooldown' else 0.0
+            value = np.concatenate([pad(getattr(fleet, name), fill) for fleet in fleets])
+        else:
+            value = np.concatenate([getattr(fleet, name) for fleet in fleets])
+        setattr(stacked, name, value)
+    return stacked
+
+
+class CombatResult:
+    """一批遭遇的结算结果，每个属性是长度为N的数组"""
+
+    __slots__ = ('outcome', 'ticks', 'a_health', 'a_shield', 'a_energy', 'a_alive',
+                 'b_health', 'b_shield', 'b_energy', 'b_alive', 'b_destroyed')
+
+    def __len__(self):
+        return len(self.outcome)
+
+    def describe(self, index):
+        """第index场遭遇的结果字典"""
+        return {
+            'outcome': int(self.outcome[index]),
+            'ticks': int(self.ticks[index]),
+            'duration_seconds': float(self.ticks[index] * TICK_SECONDS),
+            'a_health': float(self.a_health[index]),
+            'a_shield': float(self.a_shield[index]),
+            'a_energy': float(self.a_energy[index]),
+            'a_alive': int(self.a_alive[index]),
+            'b_health': float(self.b_health[index]),
+            'b_alive': int(self.b_alive[index]),
+            'b_destroyed': int(self.b_destroyed[index])
+        }
+
+
+def _volley(fleet, alive, cooldown, target_evasion, active, rng):
+    """一方本回合开火：扣除能量、更新冷却，返回对每场遭遇造成的伤害（未经护盾和装甲）"""
+    cooldown -= 1
+    ready = (cooldown <= 0) & (fleet.weapon_damage > 0) & (active & (alive > 0))[:, None]
+    cost = np.where(ready, fleet.weapon_energy * alive[:, None], 0.0)
+    fire = ready & (np.cumsum(cost, axis=1) <= fleet.energy[:, None] + 1e-9)
+    fleet.energy -= np.where(fire, cost, 0.0).sum(axis=1)
+    cooldown[fire] = fleet.weapon_cooldown[fire]
+
+    shots = np.where(fire, alive[:, None], 0.0).astype(np.int64)
+    hit_chance = fleet.accuracy * (1.0 - target_evasion)
+    hits = rng.binomial(shots, hit_chance[:, None])
+    return (hits * fleet.weapon_damage).sum(axis=1)
+
+
+def _take_damage(fleet, damage):
+    """伤害先由护盾吸收，剩余部分按装甲减免后扣除生命值"""
+    absorbed = np.minimum(fleet.shield, damage)
+    fleet.shield -= absorbed
+    fleet.health = np.maximum(fleet.health - (damage - absorbed) * 100.0 / (100.0 + fleet.armor), 0.0)
+
+
+def _regenerate(fleet, active):
+    fleet.shield = np.where(active, np.minimum(fleet.shield + fleet.shield_regen, fleet.max_shield), fleet.shield)
+    fleet.energy = np.where(active, np.minimum(fleet.energy + fleet.energy_regen, fleet.max_energy), fleet.energy)
+
+
+def simulate(a, b, seed=None, max_ticks=MAX_TICKS):
+    """批量结算A、B两方的遭遇（会修改两个编队的生命值、护盾和能量）
+
+    Args:
+        a, b: 长度相同的Fleet
+        seed: 随机数种子（整数、整数序列或 numpy.random.SeedSequence），None时不可复现
+        max_ticks: 最大回合数
+
+    Returns:
+        CombatResult: 每场遭遇的结果、回合数和双方剩余状态
+    """
+    if len(a) != len(b):
+        raise ValueError("双方编队的遭遇数不一致")
+    rng = np.random.default_rng(seed)
+    size = len(a)
+    initial_b = b.alive()
+    cooldown_a = np.zeros_like(a.weapon_damage)
+    cooldown_b = np.zeros_like(b.weapon_damage)
+
+    outcome = np.full(size, OUTCOME_TIMEOUT, dtype=np.int8)
+    ticks = np.full(size, max_ticks, dtype=np.int32)
+    alive_a, alive_b = a.alive(), b.alive()
+
+    # 开始时已经没有存活单位的一方直接判负
+    active = np.ones(size, dtype=bool)
+    for tick in range(0, max_ticks + 1):
+        if tick:
+            damage_to_b = _volley(a, alive_a, cooldown_a, b.evasion, active, rng)
+            damage_to_a = _volley(b, alive_b, cooldown_b, a.evasion, active, rng)
+            _take_damage(a, np.where(active, damage_to_a, 0.0))
+            _take_damage(b, np.where(active, damage_to_b, 0.0))
+            alive_a, alive_b = a.alive(), b.alive()
+
+        dead_a, dead_b = alive_a == 0, alive_b == 0
+        ended = active & (dead_a | dead_b)
+        if ended.any():
+            outcome[ended] = np.select(
+                [dead_a & dead_b, dead_b], [OUTCOME_BOTH_DESTROYED, OUTCOME_A_WINS], OUTCOME_B_WINS
+            )[ended]
+            ticks[ended] = tick
+            active &= ~ended
+            if not active.any():
+                break
+        if tick:
+            _regenerate(a, active)
+            _regenerate(b, active)
+
+    result = CombatResult()
+    result.outcome = outcome
+    result.ticks = ticks
+    result.a_health, result.a_shield, result.a_energy, result.a_alive = a.health, a.shield, a.energy, alive_a
+    result.b_health, result.b_shield, result.b_energy, result.b_alive = b.health, b.shield, b.energy, alive_b
+    result.b_destroyed = initial_b - alive_b
+    return result
+
+
+def _cooldown_ticks(seconds):
+    return max(1, math.ceil((seconds or 0.0) / TICK_SECONDS))
+
+
+def load_ship_fleets(ship_ids):
+    """加载多艘玩家飞船的战斗属性，按ship_ids的顺序返回一个编队
+
+    当前生命值、护盾和能量用一条查询读取；型号和装备折算后的属性取自飞船有效属性缓存
+
+    Raises:
+        LookupError: 飞船不存在
+    """
+    ship_rows = db.session.execute(
+        db.select(PlayerShip.ship_id, PlayerShip.current_health, PlayerShip.current_shield,
+                  PlayerShip.current_energy)
+        .where(PlayerShip.ship_id.in_(set(ship_ids)))
+    ).all()
+    ships = {row.ship_id: row for row in ship_rows}
+    stats = get_ship_stats_many(ships)
+    missing = [ship_id for ship_id in ship_ids if ship_id not in stats]
+    if missing:
+        raise LookupError(f"飞船不存在: {missing[0]}")
+
+    size = len(ship_ids)
+    width = max([len(stats[ship_id].weapons) for ship_id in ship_ids] + [1])
+    damage = np.zeros((size, width))
+    energy_usage = np.zeros((size, width))
+    cooldown = np.ones((size, width))
+    health, shield, max_shield, shield_regen = (np.zeros(size) for _ in range(4))
+    energy, armor, evasion, accuracy = (np.zeros(size) for _ in range(4))
+    for i, ship_id in enumerate(ship_ids):
+        ship, ship_stats = ships[ship_id], stats[ship_id]
+        for j, (effect, usage, seconds) in enumerate(ship_stats.weapons):
+            damage[i, j], energy_usage[i, j], cooldown[i, j] = effect, usage, _cooldown_ticks(seconds)
+        health[i] = ship.current_health or 0
+        shield[i] = ship.current_shield or 0
+        max_shield[i] = max(shield[i], ship_stats.shield_capacity)
+        shield_regen[i] = ship_stats.shield_capacity * SHIELD_REGEN_FRACTION
+        energy[i] = ship.current_energy or 0
+        armor[i] = ship_stats.armor
+        evasion[i] = (ship_stats.maneuverability * EVASION_PER_MANEUVERABILITY
+                      + ship_stats.engine * ENGINE_EVASION_PER_POINT)
+        accuracy[i] = PLAYER_ACCURACY + ship_stats.scanner * SCANNER_ACCURACY_PER_POINT
+
+    return Fleet(
+        count=np.ones(size), unit_health=np.maximum(health, 1.0), health=health,
+        shield=shield, max_shield=max_shield, shield_regen=shield_regen,
+        armor=armor, evasion=evasion, accuracy=accuracy,
+        energy=energy, energy_regen=ENERGY_REGEN_PER_TICK,
+        weapon_damage=damage, weapon_energy=energy_usage, weapon_cooldown=cooldown
+    )
+
+
+def load_enemy_types(enemy_type_ids):
+    """用一条查询加载敌人类型及其飞船型号的战斗属性
+
+    Returns:
+        dict: enemy_type_id -> 行（base_health、base_damage、base_reward、difficulty_level、armor、maneuverability）
+
+    Raises:
+        LookupError: 敌人类型不存在
+    """
+    rows = db.session.execute(
+        db.select(EnemyType.enemy_type_id, EnemyType.base_health, EnemyType.base_damage,
+                  EnemyType.base_reward, EnemyType.difficulty_level, ShipModel.armor, ShipModel.maneuverability)
+        .outerjoin(ShipModel, ShipModel.model_id == EnemyType.ship_model_id)
+        .where(EnemyType.enemy_type_id.in_(set(enemy_type_ids)))
+    ).all()
+    types = {row.enemy_type_id: row for row in rows}
+    missing = [enemy_type_id for enemy_type_id in enemy_type_ids if enemy_type_id not in types]
+    if missing:
+        raise LookupError(f"敌人类型不存在: {missing[0]}")
+    return types
+
+
+def enemy_fleets(types, enemy_type_ids, counts):
+    """由敌人类型构造编队：每个单位每回合造成base_damage的伤害，精度随难度等级提高"""
+    rows = [types[enemy_type_id] for enemy_type_id in enemy_type_ids]
+    level = np.array([row.difficulty_level or 1 for row in rows], dtype=np.float64)
+    return Fleet(
+        count=np.maximum(np.asarray(counts, dtype=np.float64), 0.0),
+        unit_health=np.array([row.base_health or 1 for row in rows], dtype=np.float64),
+        weapon_damage=np.array([row.base_damage or 0 for row in rows], dtype=np.float64),
+        armor=np.array([row.armor or 0 for row in rows], dtype=np.float64),
+        evasion=np.array([row.maneuverability or 0 for row in rows], dtype=np.float64) * EVASION_PER_MANEUVERABILITY,
+        accuracy=ENEMY_BASE_ACCURACY + level * ENEMY_ACCURACY_PER_LEVEL
+    )
+
+
+def resolve_npc_battles(a_type_ids, a_counts, b_type_ids, b_counts, seed=None):
+    """批量结算NPC编队之间的战斗（只读取enemy_types，不写数据库）
+
+    Args:
+        a_type_ids, a_counts: A方每场遭遇的敌人类型和数量
+        b_type_ids, b_counts: B方每场遭遇的敌人类型和数量
+        seed: 随机数种子
+
+    Returns:
+        CombatResult
+    """
+    types = load_enemy_types(list(a_type_ids) + list(b_type_ids))
+    return simulate(enemy_fleets(types, a_type_ids, a_counts), enemy_fleets(types, b_type_ids, b_counts), seed)
+
+
+def resolve_combat_encounters(encounter_ids, seed=None):
+    """结算进行中的战斗遭遇并提交
+
+    更新遭遇的结果、结束时间和奖励，玩家飞船的生命值、护盾和能量，以及存档的游戏币和声望；
+    击败敌人数和获得的游戏币计入统计，并记录游戏日志。
+    未指定种子时由遭遇ID生成，同一批遭遇重复结算得到相同的结果。
+    无论遭遇数多少，SQL语句数固定（读取4条，写回3条executemany）
+
+    Args:
+        encounter_ids: 遭遇ID列表，不是进行中的遭遇会被跳过
+        seed: 可选，随机数种子
+
+    Returns:
+        list: 每场已结算遭遇的结果字典（含encounter_id、game_id、outcome、enemies_destroyed和奖励）
+    """
+    encounters = db.session.execute(
+        db.select(CombatEncounter.encounter_id, CombatEncounter.user_id, CombatEncounter.game_id,
+                  CombatEncounter.player_ship_id, CombatEncounter.enemy_type_id, CombatEncounter.enemy_count)
+        .where(CombatEncounter.encounter_id.in_(encounter_ids), CombatEncounter.outcome == 'in_progress')
+        .order_by(CombatEncounter.encounter_id)
+    ).all()
+    if not encounters:
+        return []
+
+    types = load_enemy_types([encounter.enemy_type_id for encounter in encounters])
+    players = load_ship_fleets([encounter.player_ship_id for encounter in encounters])
+    enemies = enemy_fleets(types, [encounter.enemy_type_id for encounter in encounters],
+                           [encounter.enemy_count or 1 for encounter in encounters])
+    if seed is None:
+        seed = np.random.SeedSequence([encounter.encounter_id for encounter in encounters])
+    result = simulate(players, enemies, seed)
+
+    now = datetime.utcnow()
+    updates, ships, saves, resolved = [], [], {}, []
+    for i, encounter in enumerate(encounters):
+        enemy = types[encounter.enemy_type_id]
+        outcome = PLAYER_OUTCOMES[int(result.outcome[i])]
+        destroyed = int(result.b_destroyed[i])
+        credits = float(enemy.base_reward or 0) * destroyed
+        reputation = (enemy.difficulty_level or 1) * destroyed * REPUTATION_PER_LEVEL if outcome == 'victory' else 0
+
+        updates.append({'b_encounter_id': encounter.encounter_id, 'b_outcome': outcome,
+                        'b_credits': credits, 'b_reputation': reputation})
+        ships.append({
+            'b_ship_id': encounter.player_ship_id,
+            'b_health': int(round(result.a_health[i])),
+            'b_shield': int(round(result.a_shield[i])),
+            'b_energy': int(round(result.a_energy[i]))
+        })
+        save = saves.setdefault(encounter.game_id, {'b_game_id': encounter.game_id, 'b_credits': 0,
+                                                    'b_reputation': 0})
+        save['b_credits'] += int(credits)
+        save['b_reputation'] += reputation
+        resolved.append(dict(result.describe(i), encounter_id=encounter.encounter_id, user_id=encounter.user_id,
+                             game_id=encounter.game_id, outcome=outcome, enemies_destroyed=destroyed,
+                             reward_credits=credits, reward_reputation=reputation))
+
+    encounter_table, ship_table, save_table = CombatEncounter.__table__, PlayerShip.__table__, GameSave.__table__
+    db.session.execute(
+        db.update(encounter_table)
+        .where(encounter_table.c.encounter_id == db.bindparam('b_encounter_id'))
+        .values(outcome=db.bindparam('b_outcome'), end_time=now, reward_credits=db.bindparam('b_credits'),
+                reward_reputation=db.bindparam('b_reputation')),
+        updates
+    )
+    db.session.execute(
+        db.update(ship_table)
+        .where(ship_table.c.ship_id == db.bindparam('b_ship_id'))
+        .values(current_health=db.bindparam('b_health'), current_shield=db.bindparam('b_shield'),
+                current_energy=db.bindparam('b_energy')),
+        ships
+    )
+    db.session.execute(
+        db.update(save_table)
+        .where(save_table.c.game_id == db.bindparam('b_game_id'))
+        .values(credits=db.func.coalesce(save_table.c.credits, 0) + db.bindparam('b_credits'),
+                reputation=db.func.coalesce(save_table.c.reputation, 0) + db.bindparam('b_reputation')),
+        list(saves.values())
+    )
+    db.session.commit()
+
+    buffer = get_activity_buffer()
+    for summary in resolved:
+        buffer.add_statistics(summary['game_id'], enemies_defeated=summary['enemies_destroyed'],
+                              total_credits_earned=summary['reward_credits'])
+        log_game_event(summary['user_id'], summary['game_id'], 'combat',
+                       f"遭遇 #{summary['encounter_id']}: {summary['outcome']}，击毁 {summary['enemies_destroyed']} 个敌人")
+    return resolved
@@ -0,0 +1,81 @@
+"""
+受保护接口的当前用户
+令牌的签名已经由jwt_required验证，用户信息（user_id、username、email）直接取自令牌声明；
+只需确认用户仍然存在，存在状态保存在带TTL的进程级LRU缓存中，命中时不访问数据库。
+用户被删除或修改密码时移除缓存条目，多进程部署时其他进程在TTL过期后重新确认
+"""
+import threading
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import db
+from app.models.user import User
+from app.utils.lru_cache import LRUCache
+
+
+class CurrentUser:
+    """由令牌声明构造的当前用户"""
+
+    __slots__ = ('user_id', 'username', 'email')
+
+    def __init__(self, user_id, username=None, email=None):
+        self.user_id = user_id
+        self.username = username
+        self.email = email
+
+    def __repr__(self):
+        return f'<CurrentUser {self.user_id}>'
+
+
+# 进程级缓存：user_id -> 用户是否存在
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(
+                    maxsize=current_app.config.get('CURRENT_USER_CACHE_SIZE', 4096),
+                    ttl=current_app.config.get('CURRENT_USER_CACHE_TTL', 60)
+                )
+    return _cache
+
+
+def user_exists(user_id):
+    """用户是否存在，首次访问或缓存过期时查询数据库"""
+    cache = _get_cache()
+    exists = cache.get(user_id)
+    if exists is None:
+        exists = db.session.query(User.user_id).filter(User.user_id == user_id).first() is not None
+        cache.put(user_id, exists)
+    return exists
+
+
+def load_current_user(jwt_data):
+    """jwt.user_lookup_loader使用的加载函数
+
+    Returns:
+        CurrentUser: 当前用户，令牌标识无效或用户不存在时返回None（jwt_required返回401）
+    """
+    try:
+        user_id = int(jwt_data['sub'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not user_exists(user_id):
+        return None
+    return CurrentUser(user_id, jwt_data.get('username'), jwt_data.get('email'))
+
+
+def forget_user(user_id):
+    """移除用户的缓存状态（例如用户被删除或修改密码时）"""
+    if _cache is not None:
+        _cache.pop(int(user_id))
+
+
+@event.listens_for(User, 'after_delete')
+def _forget_deleted_user(mapper, connection, target):
+    forget_user(target.user_id)
@@ -0,0 +1,199 @@
+"""
+存档发现服务
+每个存档已发现的星系以位集合形式缓存在进程内（LRU淘汰），
+宇宙API的可见性判断都是位测试，不再连接查询player_discoveries表
+"""
+import itertools
+import threading
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.player import PlayerDiscovery
+from app.services.activity_buffer import get_activity_buffer
+from app.services.game_log_service import log_game_event
+from app.services.universe_snapshot import get_system_flags, get_universe_snapshot
+from app.utils.bitset import Bitset
+from app.utils.lru_cache import LRUCache
+
+# 允许记录的发现类型
+DISCOVERY_TYPES = ('system', 'planet', 'station', 'anomaly')
+DISCOVERY_LABELS = {'system': '星系', 'planet': '行星', 'station': '空间站', 'anomaly': '异常点'}
+
+# 全局递增的发现数据版本号，缓存条目被淘汰后重新加载也不会复用旧版本号
+_versions = itertools.count(1)
+
+
+class SaveDiscoveries:
+    """单个存档已发现的星系
+
+    version 在每次加载和新增发现时递增，可用作依赖发现状态的缓存键
+    """
+
+    __slots__ = ('game_id', 'user_id', 'systems', 'version', '_visibility_version', '_visibility')
+
+    def __init__(self, game_id, user_id, system_ids):
+        self.game_id = game_id
+        self.user_id = user_id
+        self.systems = Bitset(system_ids)
+        self.version = next(_versions)
+        self._visibility_version = None
+        self._visibility = None
+
+    def add_system(self, system_id):
+        """记录新发现的星系，并使可见性缓存失效"""
+        self.systems.add(system_id)
+        self.version = next(_versions)
+        self._visibility_version = None
+
+    def visibility(self, flags):
+        """结合星系区域类型计算该存档的可见性，按快照版本缓存结果"""
+        if flags.version and self._visibility_version == flags.version:
+            return self._visibility
+        visibility = flags.visibility(self.systems)
+        if flags.version:
+            self._visibility, self._visibility_version = visibility, flags.version
+        return visibility
+
+    @classmethod
+    def load(cls, game_id):
+        """用一条SQL加载存档归属和已发现的星系，存档不存在时返回None"""
+        rows = (
+            db.session.query(GameSave.user_id, PlayerDiscovery.object_id)
+            .outerjoin(PlayerDiscovery, db.and_(
+                PlayerDiscovery.game_id == GameSave.game_id,
+                PlayerDiscovery.discovery_type == 'system'
+            ))
+            .filter(GameSave.game_id == game_id)
+            .all()
+        )
+        if not rows:
+            return None
+        return cls(game_id, rows[0][0], (object_id for _, object_id in rows if object_id is not None))
+
+
+# 进程级缓存：game_id -> SaveDiscoveries
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(
+                    maxsize=current_app.config.get('DISCOVERY_CACHE_SIZE', 1024),
+                    ttl=current_app.config.get('DISCOVERY_CACHE_TTL')
+                )
+    return _cache
+
+
+def get_save_discoveries(game_id):
+    """获取存档已发现星系，首次访问时从数据库加载并缓存
+
+    Returns:
+        SaveDiscoveries: 存档发现数据，存档不存在时返回None
+    """
+    cache = _get_cache()
+    discoveries = cache.get(game_id)
+    if discoveries is None:
+        discoveries = SaveDiscoveries.load(game_id)
+        if discoveries is not None:
+            cache.put(game_id, discoveries)
+    return discoveries
+
+
+def get_visibility(user_id, game_id=None):
+    """获取当前请求使用的星系可见性
+
+    Args:
+        user_id: 当前用户ID
+        game_id: 可选，存档ID；不提供时使用星系表中的全局发现标记
+
+    Returns:
+        Visibility: 可见性位集合
+
+    Raises:
+        LookupError: 存档不存在或不属于当前用户
+    """
+    flags = get_system_flags()
+    if game_id is None:
+        return flags.visibility()
+
+    discoveries = get_save_discoveries(game_id)
+    if discoveries is None or discoveries.user_id != int(user_id):
+        raise LookupError('存档不存在')
+    return discoveries.visibility(flags)
+
+
+def record_discovery(game_save, discovery_type, object_id, reward_credits=None, reward_reputation=None):
+    """记录存档中的一次新发现，提交成功后同步更新缓存
+
+    Args:
+        game_save: GameSave对象
+        discovery_type: 发现类型，见 DISCOVERY_TYPES
+        object_id: 被发现对象的ID
+        reward_credits: 可选，获得的奖励金额
+        reward_reputation: 可选，获得的声望奖励
+
+    Returns:
+        PlayerDiscovery: 新的发现记录；已经发现过时返回None
+
+    Raises:
+        ValueError: 发现类型无效，或发现的星系不存在
+    """
+    if discovery_type not in DISCOVERY_TYPES:
+        raise ValueError(f"无效的发现类型: {discovery_type}")
+
+    if discovery_type == 'system':
+        # 星系ID会加入缓存的位集合，只接受宇宙中存在的星系
+        if object_id not in get_universe_snapshot(system_id=object_id).systems:
+            raise ValueError(f"星系不存在: {object_id}")
+        discoveries = get_save_discoveries(game_save.game_id)
+        if discoveries is not None and object_id in discoveries.systems:
+            return None
+    elif PlayerDiscovery.query.filter_by(
+        game_id=game_save.game_id, discovery_type=discovery_type, object_id=object_id
+    ).first():
+        return None
+
+    discovery = PlayerDiscovery(
+        user_id=game_save.user_id,
+        game_id=game_save.game_id,
+        discovery_type=discovery_type,
+        object_id=object_id,
+        reward_credits=reward_credits,
+        reward_reputation=reward_reputation
+    )
+    db.session.add(discovery)
+    if discovery_type == 'system':
+        game_save.discovered_systems_count = (game_save.discovered_systems_count or 0) + 1
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 其他进程已经记录了同一发现（缓存只反映本进程的写入）
+        db.session.rollback()
+        discovered = True
+    else:
+        discovered = False
+
+    if discovery_type == 'system':
+        cached = _get_cache().get(game_save.game_id)
+        if cached is not None:
+            cached.add_system(object_id)
+    if discovered:
+        return None
+
+    if discovery_type == 'system':
+        get_activity_buffer().add_statistics(game_save.game_id, systems_visited=1)
+    log_game_event(game_save.user_id, game_save.game_id, 'discovery', f'发现{DISCOVERY_LABELS[discovery_type]} #{object_id}')
+
+    return discovery
+
+
+def forget_save_discoveries(game_id):
+    """移除存档的缓存（例如存档被删除时）"""
+    _get_cache().pop(game_id)
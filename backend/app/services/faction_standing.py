@@ -0,0 +1,143 @@
+"""
+势力关系服务
+帮助一个势力会同时改变玩家与其盟友和敌对势力的关系。
+直接的关系变化按宇宙快照中势力关系矩阵的行号排成向量d，传播后的变化为 d + 系数 × R·d
+（R 为稠密的势力关系矩阵，见 FactionMatrix），一次矩阵-向量乘积得到所有势力的变化；
+多个存档的变化按行叠放，一次矩阵乘积完成。
+
+传播后的变化按 (game_id, faction_id) 唯一键用一条upsert写入player_faction_standing
+（MySQL为 INSERT ... ON DUPLICATE KEY UPDATE，SQLite为 ON CONFLICT DO UPDATE），
+没有记录的势力插入新记录，关系值限制在-100到100
+"""
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import db
+from app.models.player import PlayerFactionStanding
+from app.services.universe_snapshot import get_universe_snapshot
+
+# 关系值范围，单次变化也不超过该范围
+MIN_STANDING = -100
+MAX_STANDING = 100
+
+# 每条upsert语句最多写入的记录数（SQLite单条语句的绑定参数数量有限）
+UPSERT_BATCH_SIZE = 1000
+
+# 各数据库支持upsert的INSERT构造
+_INSERT_BY_DIALECT = {
+    'mysql': mysql.insert,
+    'mariadb': mysql.insert,
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+
+def get_faction_matrix():
+    """当前宇宙快照中的势力列表和势力关系矩阵"""
+    return get_universe_snapshot().faction_matrix
+
+
+def propagate_standing_deltas(deltas, relations, spillover):
+    """把直接的关系变化传播到其他势力：d + 系数 × R·d
+
+    Args:
+        deltas: 变化向量（按势力关系矩阵的行号），或按行叠放的多个变化向量
+        relations: 势力关系矩阵，见 FactionMatrix.relations
+        spillover: 传播系数
+
+    Returns:
+        np.ndarray: 与deltas形状相同的传播后的变化（未取整）
+    """
+    return deltas + spillover * (deltas @ relations.T)
+
+
+def _delta_vectors(matrix, deltas_list):
+    """势力ID -> 变化 的字典列表转换为按行叠放的变化向量，忽略不在快照中的势力"""
+    vectors = np.zeros((len(deltas_list), len(matrix.faction_ids)))
+    for row, deltas in enumerate(deltas_list):
+        for faction_id, delta in deltas.items():
+            column = matrix.index.get(faction_id)
+            if column is not None:
+                vectors[row, column] += delta
+    return vectors
+
+
+def _clamp(value):
+    return db.case((value > MAX_STANDING, MAX_STANDING), (value < MIN_STANDING, MIN_STANDING), else_=value)
+
+
+def _upsert_statement(values):
+    """按 (game_id, faction_id) 唯一键累加关系值的多行upsert语句"""
+    table = PlayerFactionStanding.__table__
+    dialect = db.session.get_bind().dialect.name
+    insert = _INSERT_BY_DIALECT.get(dialect)
+    if insert is None:
+        raise NotImplementedError(f"不支持的数据库: {dialect}")
+
+    statement = insert(table).values(values)
+    current = db.func.coalesce(table.c.standing_value, 0)
+    if dialect in ('mysql', 'mariadb'):
+        return statement.on_duplicate_key_update(
+            standing_value=_clamp(current + statement.inserted.standing_value),
+            last_changed=statement.inserted.last_changed
+        )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.game_id, table.c.faction_id],
+        set_={
+            'standing_value': _clamp(current + statement.excluded.standing_value),
+            'last_changed': statement.excluded.last_changed
+        }
+    )
+
+
+def apply_standing_changes(changes, at=None):
+    """传播并写入多个存档的关系变化，不提交事务
+
+    Args:
+        changes: (user_id, game_id) -> {势力ID: 直接的关系变化}
+        at: 可选，变化时间，默认为当前时间
+
+    Returns:
+        dict: game_id -> {势力ID: 传播后取整的关系变化}，只包含不为0的变化
+    """
+    keys = [key for key, deltas in changes.items() if deltas]
+    if not keys:
+        return {}
+    at = at or datetime.utcnow()
+
+    matrix = get_faction_matrix()
+    propagated = propagate_standing_deltas(
+        _delta_vectors(matrix, [changes[key] for key in keys]),
+        matrix.relations,
+        current_app.config.get('FACTION_STANDING_SPILLOVER', 0.5)
+    )
+    propagated = np.clip(np.rint(propagated), MIN_STANDING, MAX_STANDING).astype(np.int64)
+
+    rows, columns = np.nonzero(propagated)
+    values = [
+        {'user_id': keys[row][0], 'game_id': keys[row][1], 'faction_id': int(matrix.faction_ids[column]),
+         'standing_value': int(propagated[row, column]), 'last_changed': at}
+        for row, column in zip(rows.tolist(), columns.tolist())
+    ]
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        db.session.execute(_upsert_statement(values[start:start + UPSERT_BATCH_SIZE]))
+
+    result = {}
+    for value in values:
+        result.setdefault(value['game_id'], {})[value['faction_id']] = value['standing_value']
+    return result
+
+
+def change_standing(user_id, game_id, deltas, at=None):
+    """改变一个存档与势力的关系（传播到盟友和敌对势力），不提交事务
+
+    Args:
+        deltas: 势力ID -> 直接的关系变化
+
+    Returns:
+        dict: 势力ID -> 传播后取整的关系变化
+    """
+    return apply_standing_changes({(user_id, game_id): deltas}, at=at).get(game_id, {})
@@ -0,0 +1,288 @@
+"""
+游戏事件日志服务
+请求线程只把日志放入进程内的有界队列，后台线程按批（executemany）写入game_logs表。
+队列满时按 GAME_LOG_POLICY 处理：
+    drop_oldest: 丢弃队列中最旧的日志，保留最新的
+    block:       最多等待 GAME_LOG_BLOCK_TIMEOUT 秒，仍然满则丢弃新日志
+    sample:      队列占用超过 GAME_LOG_SAMPLE_THRESHOLD 后按 GAME_LOG_SAMPLE_RATE 采样，满时丢弃新日志
+进程退出时写入队列中剩余的日志。读取使用 (created_at, log_id) 键集分页
+"""
+import atexit
+import collections
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models.game_log import GameLog
+
+logger = logging.getLogger('freelancer.game_log')
+
+POLICIES = ('drop_oldest', 'block', 'sample')
+
+# log_type列的长度
+LOG_TYPE_MAX_LENGTH = 50
+
+# 读取接口每页的默认和最大条数
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class GameLogService:
+    """有界队列 + 后台批量写入的游戏日志"""
+
+    def __init__(self, app, maxsize=10000, batch_size=500, flush_interval=1.0, policy='drop_oldest',
+                 block_timeout=0.05, sample_threshold=0.5, sample_rate=0.1):
+        """
+        Args:
+            app: Flask应用，写入时使用其应用上下文
+            maxsize: 队列容量
+            batch_size: 每次写入的最大行数
+            flush_interval: 队列未满一批时的最长等待秒数，为0时不启动后台线程
+            policy: 队列满时的处理方式，见 POLICIES
+            block_timeout: block策略的最长等待秒数
+            sample_threshold: sample策略开始采样的队列占用比例
+            sample_rate: sample策略的采样率
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"未知的日志队列策略: {policy}")
+        self._app = app
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.sample_threshold = sample_threshold
+        self.sample_rate = sample_rate
+
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._not_empty = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+        self.stats = {'accepted': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+
+    def log(self, user_id, game_id, log_type, message=None, created_at=None):
+        """记录一条游戏日志（不等待写入）
+
+        Returns:
+            bool: 日志是否进入队列（被背压策略丢弃时为False）
+        """
+        row = {
+            'user_id': user_id,
+            'game_id': game_id,
+            'log_type': log_type[:LOG_TYPE_MAX_LENGTH] if log_type else log_type,
+            'message': message,
+            'created_at': created_at or datetime.utcnow()
+        }
+        with self._lock:
+            accepted = self._offer(row)
+            self.stats['accepted' if accepted else 'dropped'] += 1
+            if accepted and len(self._queue) >= self.batch_size:
+                self._not_empty.notify()
+        if accepted and self._thread is None and len(self._queue) >= self.batch_size:
+            self.flush()
+        return accepted
+
+    def _offer(self, row):
+        """按背压策略把日志放入队列，调用方持有锁"""
+        queue = self._queue
+        if self.policy == 'sample' and len(queue) >= self.maxsize * self.sample_threshold:
+            if random.random() >= self.sample_rate:
+                return False
+
+        if len(queue) >= self.maxsize:
+            if self.policy == 'drop_oldest':
+                queue.popleft()
+                self.stats['dropped'] += 1
+            elif self.policy == 'block' and self._thread is not None:
+                deadline = time.monotonic() + self.block_timeout
+                while len(queue) >= self.maxsize:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._not_full.wait(remaining):
+                        return False
+            else:
+                return False
+
+        queue.append(row)
+        return True
+
+    def pending(self):
+        """队列中尚未写入的日志数"""
+        return len(self._queue)
+
+    def _take(self, limit):
+        """取出最多limit条日志，调用方持有锁"""
+        queue = self._queue
+        batch = [queue.popleft() for _ in range(min(limit, len(queue)))]
+        if batch:
+            self._not_full.notify_all()
+        return batch
+
+    def _write(self, batch):
+        """用一条executemany写入一批日志并提交，失败时丢弃该批并记录错误"""
+        with self._app.app_context():
+            try:
+                db.session.execute(db.insert(GameLog.__table__), batch)
+                db.session.commit()
+                self.stats['written'] += len(batch)
+            except Exception:
+                db.session.rollback()
+                self.stats['failed'] += len(batch)
+                logger.exception('写入 %d 条游戏日志失败', len(batch))
+            finally:
+                db.session.remove()
+
+    def flush(self):
+        """写入队列中的全部日志
+
+        Returns:
+            int: 取出写入的日志数
+        """
+        total = 0
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = self._take(self.batch_size)
+                if not batch:
+                    return total
+                self._write(batch)
+                total += len(batch)
+
+    def start(self):
+        """启动后台写入线程"""
+        if self.flush_interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='game-log-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程并写入剩余日志"""
+        with self._lock:
+            self._stopped = True
+            self._not_empty.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if len(self._queue) < self.batch_size and not self._stopped:
+                    self._not_empty.wait(self.flush_interval)
+                if self._stopped:
+                    return
+                batch = self._take(self.batch_size)
+            if batch:
+                with self._write_lock:
+                    self._write(batch)
+
+
+def init_game_log_service(app):
+    """创建应用的游戏日志服务并启动后台写入线程，进程退出时写入剩余日志
+
+    配置项:
+        GAME_LOG_QUEUE_SIZE: 队列容量
+        GAME_LOG_BATCH_SIZE: 每批写入的最大行数
+        GAME_LOG_FLUSH_INTERVAL: 最长写入间隔（秒），为0时不启动后台线程（满一批时在调用线程写入）
+        GAME_LOG_POLICY: 队列满时的策略 drop_oldest / block / sample
+        GAME_LOG_BLOCK_TIMEOUT, GAME_LOG_SAMPLE_THRESHOLD, GAME_LOG_SAMPLE_RATE: 策略参数
+    """
+    service = GameLogService(
+        app,
+        maxsize=app.config.get('GAME_LOG_QUEUE_SIZE', 10000),
+        batch_size=app.config.get('GAME_LOG_BATCH_SIZE', 500),
+        flush_interval=app.config.get('GAME_LOG_FLUSH_INTERVAL', 1.0),
+        policy=app.config.get('GAME_LOG_POLICY', 'drop_oldest'),
+        block_timeout=app.config.get('GAME_LOG_BLOCK_TIMEOUT', 0.05),
+        sample_threshold=app.config.get('GAME_LOG_SAMPLE_THRESHOLD', 0.5),
+        sample_rate=app.config.get('GAME_LOG_SAMPLE_RATE', 0.1)
+    )
+    app.extensions['game_log'] = service
+    service.start()
+    atexit.register(service.stop)
+    return service
+
+
+def get_game_log_service():
+    """当前应用的游戏日志服务"""
+    return current_app.extensions['game_log']
+
+
+def log_game_event(user_id, game_id, log_type, message=None):
+    """记录一条游戏日志的便捷函数，见 GameLogService.log"""
+    return get_game_log_service().log(user_id, game_id, log_type, message)
+
+
+def encode_cursor(created_at, log_id):
+    """分页游标：最后一条日志的 (created_at, log_id)"""
+    return f"{created_at.isoformat()}_{log_id}"
+
+
+def decode_cursor(cursor):
+    """解析分页游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    created_at, _, log_id = cursor.rpartition('_')
+    if not created_at:
+        raise ValueError("无效的分页游标")
+    return datetime.fromisoformat(created_at), int(log_id)
+
+
+def read_game_logs(user_id, game_id, limit=DEFAULT_PAGE_SIZE, before=None, log_type=None):
+    """按时间倒序分页读取存档日志
+
+    使用 (user_id, game_id, created_at, log_id) 索引的键集分页，翻页代价与页码无关
+
+    Args:
+        user_id: 用户ID
+        game_id: 存档ID
+        limit: 每页条数
+        before: 可选，上一页返回的游标
+        log_type: 可选，只返回该类型的日志
+
+    Returns:
+        (list, str): 日志字典列表，以及下一页的游标（没有更多时为None）
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    query = (
+        db.select(GameLog.log_id, GameLog.log_type, GameLog.message, GameLog.created_at)
+        .where(GameLog.user_id == user_id, GameLog.game_id == game_id)
+    )
+    if before:
+        created_at, log_id = decode_cursor(before)
+        # 等价于 (created_at, log_id) < 游标；单独的 created_at <= 条件保证索引从游标处开始范围扫描
+        query = query.where(
+            GameLog.created_at <= created_at,
+            db.or_(GameLog.created_at < created_at, GameLog.log_id < log_id)
+        )
+    if log_type:
+        query = query.where(GameLog.log_type == log_type)
+
+    rows = db.session.execute(
+        query.order_by(GameLog.created_at.desc(), GameLog.log_id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].log_id)
+
+    logs = [{
+        'log_id': row.log_id,
+        'game_id': game_id,
+        'log_type': row.log_type,
+        'message': row.message,
+        'created_at': row.created_at.isoformat() if row.created_at else None
+    } for row in rows]
+    return logs, next_cursor
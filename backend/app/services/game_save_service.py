@@ -0,0 +1,273 @@
+"""
+游戏存档服务
+新存档的创建和初始化在同一个事务中完成：每类初始数据用一条
+INSERT ... SELECT（或单条多值INSERT）批量写入，SQL语句数与宇宙规模无关。
+复制存档同样是每张子表一条 INSERT ... SELECT，数据不经过Python
+"""
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import Item, MarketPrice
+from app.models.mission import PlayerMission
+from app.models.player import PlayerDiscovery, PlayerFactionStanding, PlayerStatistic
+from app.models.ship import PlayerShip, ShipCargoItem, ShipEquipment, ShipModel
+from app.models.universe import Faction, SpaceStation, StarSystem
+from app.services.market_engine import EQUILIBRIUM_STOCK, MARKET_SPREAD
+
+# 新存档与所加入势力的初始关系值，其余势力为0
+JOINED_FACTION_STANDING = 25
+
+# 新市场的初始需求等级，之后由市场引擎向各空间站的均衡需求漂移
+INITIAL_DEMAND_LEVEL = 5
+
+# 复制存档时原样复制的子表（飞船及其装备、货物单独处理，需要重映射ship_id）
+CLONED_TABLES = (
+    ('market_prices', MarketPrice),
+    ('faction_standings', PlayerFactionStanding),
+    ('missions', PlayerMission),
+    ('discoveries', PlayerDiscovery),
+    ('statistics', PlayerStatistic),
+)
+
+
+def create_new_game_save(user_id, save_name, game_version=None, faction_id=None):
+    """创建并初始化新存档，全部写入在一个事务中提交
+
+    Args:
+        user_id: 用户ID
+        save_name: 存档名称
+        game_version: 可选，游戏版本
+        faction_id: 可选，加入的势力ID
+
+    Returns:
+        GameSave: 新存档
+    """
+    try:
+        game_save = GameSave(
+            user_id=user_id,
+            save_name=save_name,
+            game_version=game_version,
+            faction_id=faction_id
+        )
+        db.session.add(game_save)
+        db.session.flush()
+
+        initialize_new_game_save(game_save)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return game_save
+
+
+def initialize_new_game_save(game_save):
+    """初始化新存档的基础数据，不提交事务
+
+    - 初始位置：所加入势力的母星，否则为ID最小的核心星系，并记为已发现
+    - 与所有势力的初始关系
+    - 所有有商店的空间站 × 可交易商品的市场价格
+    - 初始飞船（STARTER_SHIP_MODEL_ID 指定的型号）
+    - 统计数据
+
+    Returns:
+        dict: 各类初始数据写入的行数
+    """
+    now = datetime.utcnow()
+    game_id = game_save.game_id
+    user_id = int(game_save.user_id)
+
+    # 初始位置
+    if game_save.current_system_id is None:
+        game_save.current_system_id = _starting_system_id(game_save.faction_id)
+    start_system_id = game_save.current_system_id
+
+    counts = {}
+
+    # 势力关系：每个势力一行
+    standing = db.literal(0)
+    if game_save.faction_id is not None:
+        standing = db.case((Faction.faction_id == game_save.faction_id, JOINED_FACTION_STANDING), else_=0)
+    counts['faction_standings'] = db.session.execute(
+        db.insert(PlayerFactionStanding).from_select(
+            ['user_id', 'game_id', 'faction_id', 'standing_value', 'last_changed'],
+            db.select(db.literal(user_id), db.literal(game_id), Faction.faction_id, standing, db.literal(now))
+        )
+    ).rowcount
+
+    # 市场价格：有商店的空间站 × 可交易商品，初始库存和价格取均衡值附近
+    tax = db.func.coalesce(SpaceStation.market_tax_rate, 5) / 100
+    base_price = db.func.coalesce(Item.base_price, 0)
+    counts['market_prices'] = db.session.execute(
+        db.insert(MarketPrice).from_select(
+            ['game_id', 'station_id', 'item_id', 'buy_price', 'sell_price',
+             'available_quantity', 'demand_level', 'last_updated'],
+            db.select(
+                db.literal(game_id),
+                SpaceStation.station_id,
+                Item.item_id,
+                base_price * (1 + MARKET_SPREAD + tax),
+                base_price * (1 - MARKET_SPREAD - tax),
+                db.cast(EQUILIBRIUM_STOCK / db.func.coalesce(Item.rarity_level, 1), db.Integer),
+                db.literal(INITIAL_DEMAND_LEVEL),
+                db.literal(now)
+            )
+            .select_from(SpaceStation)
+            .join(Item, db.true())
+            .where(
+                SpaceStation.has_shop.is_(True),
+                Item.item_type == 'commodity',
+                Item.is_tradeable.is_(True)
+            )
+        )
+    ).rowcount
+
+    # 初始飞船：型号不存在时不创建
+    counts['ships'] = db.session.execute(
+        db.insert(PlayerShip).from_select(
+            ['user_id', 'game_id', 'model_id', 'name', 'current_health', 'current_shield', 'current_energy',
+             'current_cargo_space', 'current_location_type', 'current_location_id', 'ship_status',
+             'is_active', 'purchased_at'],
+            db.select(
+                db.literal(user_id), db.literal(game_id), ShipModel.model_id, ShipModel.name,
+                ShipModel.armor, db.literal(100), db.literal(100), ShipModel.cargo_capacity,
+                db.literal('system'), db.literal(start_system_id), db.literal('docked'),
+                db.literal(True), db.literal(now)
+            ).where(ShipModel.model_id == current_app.config.get('STARTER_SHIP_MODEL_ID', 1))
+        )
+    ).rowcount
+
+    # 初始星系记为已发现
+    counts['discoveries'] = 0
+    if start_system_id is not None:
+        db.session.execute(db.insert(PlayerDiscovery).values(
+            user_id=user_id, game_id=game_id, discovery_type='system',
+            object_id=start_system_id, discovery_time=now
+        ))
+        game_save.discovered_systems_count = 1
+        counts['discoveries'] = 1
+
+    # 统计数据
+    db.session.execute(db.insert(PlayerStatistic).values(
+        user_id=user_id, game_id=game_id, systems_visited=counts['discoveries'], last_updated=now
+    ))
+    counts['statistics'] = 1
+
+    return counts
+
+
+def copy_game_save(game_save, save_name):
+    """复制存档及其全部子表数据，在一个事务中提交
+
+    每张子表一条 INSERT ... SELECT。飞船按ship_id顺序插入，新旧飞船按各自存档内的
+    ship_id序号一一对应，装备和货物通过这个映射连接到新飞船上
+
+    Args:
+        game_save: 被复制的GameSave对象
+        save_name: 新存档名称
+
+    Returns:
+        (GameSave, dict): 新存档和各子表复制的行数
+    """
+    now = datetime.utcnow()
+    source_id = game_save.game_id
+    try:
+        clone = GameSave(
+            user_id=game_save.user_id,
+            save_name=save_name,
+            created_at=now,
+            last_played_at=now,
+            game_version=game_save.game_version,
+            total_playtime=game_save.total_playtime,
+            credits=game_save.credits,
+            current_system_id=game_save.current_system_id,
+            reputation=game_save.reputation,
+            faction_id=game_save.faction_id,
+            discovered_systems_count=game_save.discovered_systems_count,
+            completed_missions_count=game_save.completed_missions_count,
+            thumbnail_path=game_save.thumbnail_path,
+            status=game_save.status
+        )
+        db.session.add(clone)
+        db.session.flush()
+
+        counts = {}
+        for name, model in CLONED_TABLES:
+            counts[name] = _copy_rows(model, source_id, clone.game_id)
+
+        counts['ships'] = _copy_rows(PlayerShip, source_id, clone.game_id, order_by=PlayerShip.ship_id)
+        if counts['ships']:
+            ship_ids = _ship_id_mapping(source_id, clone.game_id)
+            counts['ship_equipment'] = _copy_rows(ShipEquipment, source_id, clone.game_id, ship_ids=ship_ids)
+            counts['ship_cargo_items'] = _copy_rows(ShipCargoItem, source_id, clone.game_id, ship_ids=ship_ids)
+        else:
+            counts['ship_equipment'] = counts['ship_cargo_items'] = 0
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return clone, counts
+
+
+def _copy_rows(model, source_id, target_id, order_by=None, ship_ids=None):
+    """用一条 INSERT ... SELECT 把源存档的行复制到目标存档
+
+    除主键外的列原样复制，game_id替换为目标存档；提供ship_ids映射子查询时，
+    ship_id替换为映射后的新飞船ID
+
+    Returns:
+        int: 复制的行数
+    """
+    table = model.__table__
+    columns = [column for column in table.columns if not column.primary_key]
+    values = []
+    for column in columns:
+        if column.name == 'game_id':
+            values.append(db.literal(target_id))
+        elif column.name == 'ship_id' and ship_ids is not None:
+            values.append(ship_ids.c.new_id)
+        else:
+            values.append(column)
+
+    select = db.select(*values).where(table.c.game_id == source_id)
+    if ship_ids is not None:
+        select = select.join(ship_ids, table.c.ship_id == ship_ids.c.old_id)
+    if order_by is not None:
+        select = select.order_by(order_by)
+
+    return db.session.execute(
+        db.insert(table).from_select([column.name for column in columns], select)
+    ).rowcount
+
+
+def _ship_id_mapping(source_id, target_id):
+    """新旧飞船ID映射子查询 (old_id, new_id)，按两个存档内的ship_id序号对应"""
+    def numbered(game_id):
+        return db.select(
+            PlayerShip.ship_id,
+            db.func.row_number().over(order_by=PlayerShip.ship_id).label('position')
+        ).where(PlayerShip.game_id == game_id).subquery()
+
+    old, new = numbered(source_id), numbered(target_id)
+    return (
+        db.select(old.c.ship_id.label('old_id'), new.c.ship_id.label('new_id'))
+        .join(new, old.c.position == new.c.position)
+        .subquery()
+    )
+
+
+def _starting_system_id(faction_id):
+    """新存档的初始星系：势力母星，否则为ID最小的核心星系"""
+    if faction_id is not None:
+        home_system_id = db.session.execute(
+            db.select(Faction.home_system_id).where(Faction.faction_id == faction_id)
+        ).scalar()
+        if home_system_id is not None:
+            return home_system_id
+
+    return db.session.execute(
+        db.select(db.func.min(StarSystem.system_id)).where(StarSystem.type == 'core')
+    ).scalar()
@@ -0,0 +1,224 @@
+"""
+存档完整状态加载
+加载存档时一次返回前端进入游戏所需的全部状态：使用中的飞船（含装备和货物）、
+当前位置、势力关系、进行中的任务、发现记录和统计数据。
+每个部分一条列投影查询（飞船另加装备、货物两条，位置来自宇宙快照），
+SQL语句数固定，与存档数据量无关
+"""
+from app.models.mission import PlayerMission
+from app.models.player import PlayerDiscovery, PlayerFactionStanding, PlayerStatistic
+from app.models.ship import PlayerShip, ShipCargoItem, ShipEquipment
+from app.services.activity_buffer import get_activity_buffer
+from app.services.universe_snapshot import get_universe_snapshot
+from app.utils.projection import Projection, isoformat
+
+# 状态数据的格式版本，字段结构变化时递增，前端据此判断是否兼容
+GAME_STATE_VERSION = 1
+
+# 可通过 fields= 选择的部分
+GAME_STATE_SECTIONS = ('active_ship', 'location', 'faction_standings', 'active_missions',
+                       'discoveries', 'statistics')
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+
+SHIP_PROJECTION = Projection({
+    'ship_id': PlayerShip.ship_id,
+    'model_id': PlayerShip.model_id,
+    'name': PlayerShip.name,
+    'current_health': PlayerShip.current_health,
+    'current_shield': PlayerShip.current_shield,
+    'current_energy': PlayerShip.current_energy,
+    'current_cargo_space': PlayerShip.current_cargo_space,
+    'current_location_type': PlayerShip.current_location_type,
+    'current_location_id': PlayerShip.current_location_id,
+    'location_detail': PlayerShip.location_detail,
+    'x_coord': PlayerShip.x_coord,
+    'y_coord': PlayerShip.y_coord,
+    'z_coord': PlayerShip.z_coord,
+    'ship_status': PlayerShip.ship_status,
+    'purchased_at': PlayerShip.purchased_at
+}, converters={'x_coord': _to_float, 'y_coord': _to_float, 'z_coord': _to_float, 'purchased_at': isoformat})
+
+EQUIPMENT_PROJECTION = Projection({
+    'ship_equipment_id': ShipEquipment.ship_equipment_id,
+    'equipment_id': ShipEquipment.equipment_id,
+    'slot_number': ShipEquipment.slot_number,
+    'equipment_condition': ShipEquipment.equipment_condition,
+    'installed_at': ShipEquipment.installed_at
+}, converters={'installed_at': isoformat})
+
+CARGO_PROJECTION = Projection({
+    'cargo_item_id': ShipCargoItem.cargo_item_id,
+    'commodity_id': ShipCargoItem.commodity_id,
+    'quantity': ShipCargoItem.quantity,
+    'purchased_price': ShipCargoItem.purchased_price,
+    'source_location_id': ShipCargoItem.source_location_id,
+    'source_location_type': ShipCargoItem.source_location_type,
+    'acquired_at': ShipCargoItem.acquired_at
+}, converters={'purchased_price': _to_float, 'acquired_at': isoformat})
+
+STANDING_PROJECTION = Projection({
+    'faction_id': PlayerFactionStanding.faction_id,
+    'standing_value': PlayerFactionStanding.standing_value,
+    'title': PlayerFactionStanding.title,
+    'last_changed': PlayerFactionStanding.last_changed
+}, converters={'last_changed': isoformat})
+
+MISSION_PROJECTION = Projection({
+    'player_mission_id': PlayerMission.player_mission_id,
+    'mission_id': PlayerMission.mission_id,
+    'status': PlayerMission.status,
+    'start_time': PlayerMission.start_time,
+    'current_progress': PlayerMission.current_progress,
+    'total_steps': PlayerMission.total_steps
+}, converters={'start_time': isoformat})
+
+DISCOVERY_PROJECTION = Projection({
+    'discovery_type': PlayerDiscovery.discovery_type,
+    'object_id': PlayerDiscovery.object_id
+})
+
+STATISTIC_PROJECTION = Projection({
+    'systems_visited': PlayerStatistic.systems_visited,
+    'missions_completed': PlayerStatistic.missions_completed,
+    'enemies_defeated': PlayerStatistic.enemies_defeated,
+    'total_credits_earned': PlayerStatistic.total_credits_earned,
+    'total_distance_traveled': PlayerStatistic.total_distance_traveled,
+    'total_playtime_minutes': PlayerStatistic.total_playtime_minutes,
+    'last_updated': PlayerStatistic.last_updated
+}, converters={'total_credits_earned': _to_float, 'total_distance_traveled': _to_float,
+               'last_updated': isoformat})
+
+
+def parse_fields(value):
+    """解析 fields= 参数
+
+    Args:
+        value: 逗号分隔的部分名称，为空时表示全部
+
+    Returns:
+        tuple: 选中的部分名称
+
+    Raises:
+        ValueError: 包含未知的部分名称
+    """
+    if not value:
+        return GAME_STATE_SECTIONS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in GAME_STATE_SECTIONS]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}")
+    return fields
+
+
+def load_game_state(game_save, fields=GAME_STATE_SECTIONS):
+    """加载存档的完整游戏状态
+
+    Args:
+        game_save: GameSave对象（调用方已验证归属）
+        fields: 需要的部分，见 GAME_STATE_SECTIONS
+
+    Returns:
+        dict: {'version': 格式版本, 'universe_version': 宇宙快照版本, 各部分数据...}
+    """
+    game_id = game_save.game_id
+    state = {'version': GAME_STATE_VERSION}
+
+    ship = None
+    if 'active_ship' in fields or 'location' in fields:
+        ship = _load_active_ship(game_id, with_contents='active_ship' in fields)
+    if 'active_ship' in fields:
+        state['active_ship'] = ship
+
+    if 'location' in fields:
+        system_id = game_save.current_system_id
+        snapshot = get_universe_snapshot(system_id=system_id) if system_id is not None else None
+        if snapshot is not None:
+            state['universe_version'] = snapshot.version
+        state['location'] = _describe_location(snapshot, system_id, ship)
+
+    if 'faction_standings' in fields:
+        state['faction_standings'] = STANDING_PROJECTION.fetch(
+            STANDING_PROJECTION.select()
+            .where(PlayerFactionStanding.game_id == game_id)
+            .order_by(PlayerFactionStanding.faction_id)
+        )
+
+    if 'active_missions' in fields:
+        state['active_missions'] = MISSION_PROJECTION.fetch(
+            MISSION_PROJECTION.select()
+            .where(PlayerMission.game_id == game_id, PlayerMission.status == 'active')
+            .order_by(PlayerMission.start_time, PlayerMission.player_mission_id)
+        )
+
+    if 'discoveries' in fields:
+        state['discoveries'] = _group_discoveries(DISCOVERY_PROJECTION.fetch(
+            DISCOVERY_PROJECTION.select()
+            .where(PlayerDiscovery.game_id == game_id)
+            .order_by(PlayerDiscovery.discovery_id)
+        ))
+
+    if 'statistics' in fields:
+        statistics = STATISTIC_PROJECTION.fetch(
+            STATISTIC_PROJECTION.select().where(PlayerStatistic.game_id == game_id).limit(1)
+        )
+        state['statistics'] = get_activity_buffer().apply_pending_statistics(
+            game_id, statistics[0] if statistics else None
+        )
+
+    return state
+
+
+def _load_active_ship(game_id, with_contents=True):
+    """加载存档中使用中的飞船；with_contents为True时装备和货物各再用一条查询加载"""
+    ships = SHIP_PROJECTION.fetch(
+        SHIP_PROJECTION.select()
+        .where(PlayerShip.game_id == game_id, PlayerShip.is_active.is_(True))
+        .order_by(PlayerShip.ship_id)
+        .limit(1)
+    )
+    if not ships:
+        return None
+    ship = ships[0]
+    if not with_contents:
+        return ship
+
+    ship['equipment'] = EQUIPMENT_PROJECTION.fetch(
+        EQUIPMENT_PROJECTION.select()
+        .where(ShipEquipment.ship_id == ship['ship_id'])
+        .order_by(ShipEquipment.slot_number, ShipEquipment.ship_equipment_id)
+    )
+    ship['cargo'] = CARGO_PROJECTION.fetch(
+        CARGO_PROJECTION.select()
+        .where(ShipCargoItem.ship_id == ship['ship_id'])
+        .order_by(ShipCargoItem.cargo_item_id)
+    )
+    return ship
+
+
+def _describe_location(snapshot, system_id, ship):
+    """当前位置：所在星系，以及飞船停靠的空间站或环绕的行星（来自宇宙快照）"""
+    location = {
+        'system_id': system_id,
+        'system': snapshot.systems.get(system_id) if snapshot is not None else None,
+        'station': None,
+        'planet': None
+    }
+    if snapshot is not None and ship is not None:
+        location_type, location_id = ship['current_location_type'], ship['current_location_id']
+        if location_type == 'station':
+            location['station'] = snapshot.stations.get(location_id)
+        elif location_type == 'planet':
+            location['planet'] = snapshot.planets.get(location_id)
+    return location
+
+
+def _group_discoveries(rows):
+    """发现记录按类型分组：类型 -> 对象ID列表"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['discovery_type'], []).append(row['object_id'])
+    return grouped
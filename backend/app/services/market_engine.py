@@ -0,0 +1,331 @@
+"""
+市场模拟引擎
+把一个存档的市场加载为 空间站 × 商品 的NumPy矩阵，
+供需漂移、空间站税率、商品基础价格和势力关系修正在一次向量化计算中完成。
+
+市场不在后台定时推进：market_prices中每条记录保存的是 last_updated 时刻的状态，
+漂移有解析解，读取时直接计算到当前时刻（evaluate_market），不写数据库；
+只有交易等操作改变了库存时才把计算结果连同新的时刻写回（settle_market）。
+没有人访问的存档不产生任何计算
+"""
+from datetime import datetime
+
+import numpy as np
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import Item, MarketPrice
+from app.models.player import PlayerFactionStanding
+from app.models.universe import SpaceStation
+from app.utils.version_table import VersionTable
+
+# 需求等级范围和中性值
+MIN_DEMAND = 1
+MAX_DEMAND = 10
+DEMAND_NEUTRAL = 5.5
+
+# 每小时向均衡状态回归的速率：x(t) = x_eq + (x0 - x_eq) * exp(-rate * t)
+DEMAND_REVERSION_RATE = 0.05
+STOCK_REVERSION_RATE = 0.1
+
+# 稀有度为1的商品在中性需求下的均衡库存，稀有度越高库存越少
+EQUILIBRIUM_STOCK = 1000.0
+
+# 价格对需求和稀缺程度的弹性，以及相对基础价格的上下限
+DEMAND_ELASTICITY = 0.5
+SCARCITY_ELASTICITY = 0.3
+MIN_PRICE_FACTOR = 0.25
+MAX_PRICE_FACTOR = 4.0
+
+# 买卖价差（不含税），以及势力关系满值（100）时的价格优惠
+MARKET_SPREAD = 0.05
+FACTION_PRICE_EFFECT = 0.05
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 最多记录市场版本号的存档数，超出时淘汰最久未写回的存档，
+# 此时所有未记录版本号的存档的价格缓存失效一次
+MARKET_VERSION_TABLE_SIZE = 65536
+
+# 存档的市场版本号：写回价格时取新值，依赖价格的缓存据此判断是否失效
+_market_versions = VersionTable(maxsize=MARKET_VERSION_TABLE_SIZE)
+
+
+def _timestamp(moment):
+    """UTC时间（不带时区）转换为秒数"""
+    return (moment - _EPOCH).total_seconds()
+
+
+def equilibrium_demand(station_ids, item_ids):
+    """每个空间站对每种商品的均衡需求等级（1-10）
+
+    由ID确定性地生成，不同空间站的供需结构不同，贸易才有利可图
+
+    Returns:
+        ndarray: 形状为 (空间站数, 商品数) 的浮点矩阵
+    """
+    stations = np.asarray(station_ids, dtype=np.uint64)[:, None]
+    items = np.asarray(item_ids, dtype=np.uint64)[None, :]
+    mixed = (stations * np.uint64(2654435761) + items * np.uint64(40503)) >> np.uint64(7)
+    return (mixed % np.uint64(MAX_DEMAND)).astype(np.float64) + MIN_DEMAND
+
+
+class MarketState:
+    """一个存档的市场状态
+
+    矩阵形状均为 (空间站数, 商品数)，present 标记market_prices中实际存在的记录，
+    不存在的单元格数值没有意义。evaluated_at 为每个单元格状态对应的时刻（秒），
+    as_of 为最近一次 advance_to 的目标时刻
+    """
+
+    def __init__(self, game_id, station_ids, item_ids, price_ids, buy, sell, quantity, demand,
+                 tax_rates, faction_discounts, base_prices, rarity_levels, evaluated_at=None):
+        self.game_id = game_id
+        self.station_ids = station_ids
+        self.item_ids = item_ids
+        self.price_ids = price_ids
+        self.present = price_ids > 0
+        self.buy = buy
+        self.sell = sell
+        self.quantity = quantity
+        self.demand = demand
+        self.tax_rates = tax_rates
+        self.faction_discounts = faction_discounts
+        self.base_prices = base_prices
+        self.evaluated_at = evaluated_at
+        self.as_of = None
+
+        self.equilibrium_demand = equilibrium_demand(station_ids, item_ids)
+        self.equilibrium_quantity = (
+            EQUILIBRIUM_STOCK / np.maximum(rarity_levels, 1)[None, :]
+            * (DEMAND_NEUTRAL / self.equilibrium_demand)
+        )
+
+    @property
+    def shape(self):
+        return self.present.shape
+
+    def station_index(self, station_id):
+        """空间站ID在矩阵中的行号，不存在时返回None"""
+        index = int(np.searchsorted(self.station_ids, station_id))
+        if index < len(self.station_ids) and self.station_ids[index] == station_id:
+            return index
+        return None
+
+    def advance(self, hours):
+        """让供需向均衡状态漂移指定小时数，然后重新定价
+
+        漂移使用指数回归的解析解，推进一次 n 小时与推进 n 次 1 小时的结果相同
+
+        Args:
+            hours: 小时数，可以是标量或与矩阵形状兼容的数组（每个单元格各自推进）
+        """
+        hours = np.maximum(hours, 0.0)
+        demand_decay = np.exp(-DEMAND_REVERSION_RATE * hours)
+        self.demand = self.equilibrium_demand + (self.demand - self.equilibrium_demand) * demand_decay
+
+        stock_decay = np.exp(-STOCK_REVERSION_RATE * hours)
+        self.quantity = self.equilibrium_quantity + (self.quantity - self.equilibrium_quantity) * stock_decay
+        self.reprice()
+
+    def advance_to(self, as_of):
+        """把每个单元格从各自的 evaluated_at 推进到指定时刻"""
+        now = _timestamp(as_of)
+        self.advance((now - self.evaluated_at) / 3600.0)
+        self.evaluated_at = np.full(self.shape, now)
+        self.as_of = as_of
+
+    def reprice(self):
+        """根据当前需求、库存、税率和势力关系计算买卖价格"""
+        scarcity = self.equilibrium_quantity / np.maximum(self.quantity, 1.0)
+        factor = (self.demand / DEMAND_NEUTRAL) ** DEMAND_ELASTICITY * scarcity ** SCARCITY_ELASTICITY
+        mid_price = self.base_prices[None, :] * np.clip(factor, MIN_PRICE_FACTOR, MAX_PRICE_FACTOR)
+
+        markup = (self.tax_rates + MARKET_SPREAD - self.faction_discounts)[:, None]
+        self.buy = mid_price * (1.0 + markup)
+        self.sell = mid_price * np.maximum(1.0 - markup, 0.0)
+
+    def station_prices(self, station_id):
+        """某个空间站各商品的当前价格，用于API响应"""
+        index = self.station_index(station_id)
+        if index is None:
+            return []
+        columns = np.nonzero(self.present[index])[0]
+        item_ids = self.item_ids[columns].tolist()
+        buy = np.round(self.buy[index, columns], 2).tolist()
+        sell = np.round(self.sell[index, columns], 2).tolist()
+        quantity = np.rint(np.maximum(self.quantity[index, columns], 0)).astype(np.int64).tolist()
+        demand = np.rint(np.clip(self.demand[index, columns], MIN_DEMAND, MAX_DEMAND)).astype(np.int64).tolist()
+        return [
+            {
+                'item_id': item_ids[i],
+                'buy_price': buy[i],
+                'sell_price': sell[i],
+                'available_quantity': quantity[i],
+                'demand_level': demand[i]
+            }
+            for i in range(len(item_ids))
+        ]
+
+    def to_update_rows(self, updated_at):
+        """生成批量更新market_prices所需的参数列表（按主键更新）"""
+        rows, cols = np.nonzero(self.present)
+        price_ids = self.price_ids[rows, cols].tolist()
+        buy = np.round(self.buy[rows, cols], 2).tolist()
+        sell = np.round(self.sell[rows, cols], 2).tolist()
+        quantity = np.rint(np.maximum(self.quantity[rows, cols], 0)).astype(np.int64).tolist()
+        demand = np.rint(np.clip(self.demand[rows, cols], MIN_DEMAND, MAX_DEMAND)).astype(np.int64).tolist()
+
+        return [
+            {
+                'price_id': price_ids[i],
+                'buy_price': buy[i],
+                'sell_price': sell[i],
+                'available_quantity': quantity[i],
+                'demand_level': demand[i],
+                'last_updated': updated_at
+            }
+            for i in range(len(price_ids))
+        ]
+
+
+def load_market(game_id, station_ids=None):
+    """加载存档在 last_updated 时刻保存的市场状态（固定4条SQL）
+
+    没有 last_updated 的记录以存档的 last_played_at 作为状态时刻
+
+    Args:
+        game_id: 存档ID
+        station_ids: 可选，只加载这些空间站的市场
+
+    Returns:
+        MarketState: 市场状态；没有市场记录时返回None
+    """
+    statement = (
+        db.select(
+            MarketPrice.price_id, MarketPrice.station_id, MarketPrice.item_id,
+            MarketPrice.buy_price, MarketPrice.sell_price,
+            MarketPrice.available_quantity, MarketPrice.demand_level,
+            db.func.coalesce(MarketPrice.last_updated, GameSave.last_played_at)
+        )
+        .join(GameSave, GameSave.game_id == MarketPrice.game_id)
+        .where(MarketPrice.game_id == game_id)
+    )
+    if station_ids is not None:
+        statement = statement.where(MarketPrice.station_id.in_(list(station_ids)))
+    rows = db.session.execute(statement).all()
+    if not rows:
+        return None
+
+    columns = list(zip(*rows))
+    row_station_ids = np.array(columns[1], dtype=np.int64)
+    row_item_ids = np.array(columns[2], dtype=np.int64)
+    station_ids, station_index = np.unique(row_station_ids, return_inverse=True)
+    item_ids, item_index = np.unique(row_item_ids, return_inverse=True)
+    shape = (len(station_ids), len(item_ids))
+
+    def scatter(values, dtype=np.float64, fill=0):
+        matrix = np.full(shape, fill, dtype=dtype)
+        matrix[station_index, item_index] = np.array(
+            [fill if value is None else value for value in values], dtype=dtype
+        )
+        return matrix
+
+    # 空间站税率和控制势力
+    stations = db.session.execute(
+        db.select(SpaceStation.station_id, SpaceStation.market_tax_rate, SpaceStation.controlling_faction_id)
+        .where(SpaceStation.station_id.in_(station_ids.tolist()))
+    ).all()
+    station_tax = {station_id: float(tax if tax is not None else 5) / 100 for station_id, tax, _ in stations}
+    station_faction = {station_id: faction_id for station_id, _, faction_id in stations}
+
+    # 商品基础价格和稀有度
+    items = db.session.execute(
+        db.select(Item.item_id, Item.base_price, Item.rarity_level)
+        .where(Item.item_id.in_(item_ids.tolist()))
+    ).all()
+    item_info = {item_id: (float(base_price or 0), rarity or 1) for item_id, base_price, rarity in items}
+
+    # 存档与各势力的关系
+    standings = dict(db.session.execute(
+        db.select(PlayerFactionStanding.faction_id, PlayerFactionStanding.standing_value)
+        .where(PlayerFactionStanding.game_id == game_id)
+    ).all())
+
+    faction_discounts = np.array([
+        FACTION_PRICE_EFFECT * np.clip(standings.get(station_faction.get(station_id)) or 0, -100, 100) / 100
+        for station_id in station_ids.tolist()
+    ])
+
+    return MarketState(
+        game_id=game_id,
+        station_ids=station_ids,
+        item_ids=item_ids,
+        price_ids=scatter(columns[0], dtype=np.int64),
+        buy=scatter(columns[3]),
+        sell=scatter(columns[4]),
+        quantity=scatter(columns[5]),
+        demand=scatter(columns[6], fill=DEMAND_NEUTRAL),
+        tax_rates=np.array([station_tax.get(station_id, 0.05) for station_id in station_ids.tolist()]),
+        faction_discounts=faction_discounts,
+        base_prices=np.array([item_info.get(item_id, (0.0, 1))[0] for item_id in item_ids.tolist()]),
+        rarity_levels=np.array([item_info.get(item_id, (0.0, 1))[1] for item_id in item_ids.tolist()],
+                               dtype=np.float64),
+        evaluated_at=scatter(
+            [_timestamp(moment) if moment is not None else None for moment in columns[7]],
+            fill=_timestamp(datetime.utcnow())
+        )
+    )
+
+
+def evaluate_market(game_id, station_ids=None, as_of=None):
+    """计算存档市场在指定时刻（默认当前时刻）的状态，只读不写
+
+    Args:
+        game_id: 存档ID
+        station_ids: 可选，只计算这些空间站的市场
+        as_of: 可选，目标时刻（UTC）
+
+    Returns:
+        MarketState: 市场状态；没有市场记录时返回None
+    """
+    state = load_market(game_id, station_ids)
+    if state is not None:
+        state.advance_to(as_of or datetime.utcnow())
+    return state
+
+
+def save_market(state, updated_at=None):
+    """把市场状态批量写回market_prices（一条executemany），不提交事务
+
+    写回后这些记录以 updated_at（默认为状态的 as_of）作为新的基准时刻
+    """
+    rows = state.to_update_rows(updated_at or state.as_of or datetime.utcnow())
+    if rows:
+        db.session.execute(db.update(MarketPrice), rows)
+        _market_versions.bump(state.game_id)
+    return len(rows)
+
+
+def invalidate_market_version(game_id):
+    """存档价格被其他途径整体替换后（例如导入存档）使依赖价格的缓存失效"""
+    _market_versions.bump(game_id)
+
+
+def get_market_version(game_id):
+    """存档市场的当前版本号，本进程写回过该存档的价格后会改变"""
+    return _market_versions.get(game_id)
+
+
+def settle_market(game_id, station_ids=None, as_of=None):
+    """把市场计算到指定时刻并写回，作为新的基准状态
+
+    交易改变库存之前调用，之后的读取从新的基准时刻开始推算
+
+    Returns:
+        MarketState: 市场状态；没有市场记录时返回None
+    """
+    state = evaluate_market(game_id, station_ids, as_of)
+    if state is not None:
+        save_market(state)
+    return state
@@ -0,0 +1,445 @@
+"""
+任务板服务
+每个有任务板的空间站在每个时间段（MISSION_BOARD_REFRESH_SECONDS 秒）提供一组任务：
+空间站预先编写的任务（missions表中board_key为空、giver_station_id为该站的任务），
+加上按 (存档, 空间站, 时间段) 作为随机种子生成的任务。
+
+生成是确定性的：相同的存档、空间站、时间段、宇宙数据和任务类型得到相同的任务板，
+因此任务板在查看时即时计算，不保存；生成的任务只在玩家接受时写入missions表，
+board_key（存档:空间站:时间段:序号）的唯一索引保证同一个任务只能被接受一次。
+
+玩家与空间站所属势力的关系决定可以接受的最高难度，关系过低时任务板为空
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.mission import Mission, MissionType, PlayerMission
+from app.models.player import PlayerFactionStanding
+from app.models.ship import PlayerShip
+from app.services.mission_scheduler import complete_missions, get_mission_scheduler
+from app.services.route_planner import get_route_planner
+from app.services.trade_finder import bounded_hops
+from app.services.universe_snapshot import get_universe_snapshot
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 势力关系为0时可接受的最高难度，关系每提高该值可接受的最高难度加1
+BASE_MAX_DIFFICULTY = 4
+STANDING_PER_DIFFICULTY = 15
+MAX_DIFFICULTY = 10
+
+# 生成任务的奖励：每级难度和每跳距离的加成比例，奖励金额取整到该值
+REWARD_PER_DIFFICULTY = 0.3
+REWARD_PER_JUMP = 0.15
+REWARD_ROUNDING = 10
+REPUTATION_PER_DIFFICULTY = 0.1
+
+# 生成任务的时间限制：基础小时数加上每跳的小时数
+BASE_TIME_LIMIT_HOURS = 2
+TIME_LIMIT_HOURS_PER_JUMP = 2
+
+# 各类别任务的目标：空间站、星系或行星
+STATION_TARGET_CATEGORIES = ('delivery', 'smuggling')
+PLANET_TARGET_CATEGORIES = ('rescue',)
+
+# 战斗和走私任务的难度加成
+CATEGORY_DIFFICULTY_BONUS = {'combat': 1, 'smuggling': 1}
+
+
+class MissionError(ValueError):
+    """任务无法接受或放弃（任务板已刷新、已接受、势力关系不足等）"""
+
+
+def board_bucket(moment=None):
+    """时间所在的任务板时间段
+
+    Returns:
+        tuple: (时间段序号, 下一次刷新的时间)
+    """
+    seconds = current_app.config.get('MISSION_BOARD_REFRESH_SECONDS', 3600)
+    moment = moment or datetime.utcnow()
+    bucket = int((moment - _EPOCH).total_seconds() // seconds)
+    return bucket, _EPOCH + timedelta(seconds=(bucket + 1) * seconds)
+
+
+def max_difficulty_for_standing(standing):
+    """势力关系（-100到100）对应的可接受最高难度，0表示不提供任务"""
+    return min(max(BASE_MAX_DIFFICULTY + standing // STANDING_PER_DIFFICULTY, 0), MAX_DIFFICULTY)
+
+
+def get_faction_standing(game_id, faction_id):
+    """存档与势力的关系值，没有记录时为0"""
+    if faction_id is None:
+        return 0
+    value = db.session.execute(
+        db.select(PlayerFactionStanding.standing_value)
+        .where(PlayerFactionStanding.game_id == game_id, PlayerFactionStanding.faction_id == faction_id)
+        .limit(1)
+    ).scalar()
+    return value or 0
+
+
+def load_mission_types():
+    """按type_id排序的任务类型（生成任务板时的候选顺序）"""
+    return db.session.execute(
+        db.select(MissionType.type_id, MissionType.name, MissionType.category, MissionType.base_reward,
+                  MissionType.base_reputation, MissionType.difficulty_multiplier)
+        .order_by(MissionType.type_id)
+    ).all()
+
+
+def board_key(game_id, station_id, bucket, slot):
+    return f'{game_id}:{station_id}:{bucket}:{slot}'
+
+
+def _board_station(snapshot, station_id):
+    station = snapshot.stations.get(station_id)
+    if station is None or not station['has_mission_board']:
+        raise LookupError("空间站不存在或没有任务板")
+    return station
+
+
+def generate_board(game_id, station_id, bucket, mission_types, snapshot=None, planner=None, size=None,
+                   max_jumps=None):
+    """按 (存档, 空间站, 时间段) 生成任务板上的任务，不访问数据库（任务类型由调用方加载）
+
+    每个位置的随机数只取决于种子和位置序号，与筛选条件无关
+
+    Returns:
+        list: 任务字典，字段与 Mission.to_dict 一致，另有 offer_id、board_key、category、jumps
+    """
+    snapshot = snapshot or get_universe_snapshot()
+    planner = planner or get_route_planner()
+    size = size if size is not None else current_app.config.get('MISSION_BOARD_SIZE', 8)
+    max_jumps = max_jumps if max_jumps is not None else current_app.config.get('MISSION_TARGET_MAX_JUMPS', 4)
+    station = _board_station(snapshot, station_id)
+    origin = snapshot.systems[station['system_id']]
+    if not mission_types or size <= 0:
+        return []
+
+    # 目标候选：有界搜索范围内的星系、空间站和行星，按ID排序保证结果稳定
+    start = planner.index.get(origin['system_id'])
+    reachable = bounded_hops(planner, start, max_jumps) if start is not None else {}
+    jumps_by_system = {planner.system_ids[index]: hops for index, (hops, _) in reachable.items()}
+    jumps_by_system.setdefault(origin['system_id'], 0)
+    systems = sorted(jumps_by_system)
+    remote_systems = [system_id for system_id in systems if system_id != origin['system_id']] or systems
+    stations = [other['station_id'] for system_id in systems
+                for other in snapshot.stations_by_system.get(system_id, ())
+                if other['station_id'] != station_id]
+    planets = [planet['planet_id'] for system_id in systems
+               for planet in snapshot.planets_by_system.get(system_id, ())]
+
+    rng = np.random.default_rng([game_id, station_id, bucket])
+    draws = rng.random((size, 3))
+    variations = rng.integers(-1, 2, size)
+
+    offers = []
+    for slot in range(size):
+        mission_type = mission_types[int(draws[slot, 0] * len(mission_types))]
+        category = mission_type.category
+        target_system_id = target_planet_id = target_station_id = None
+        if category in STATION_TARGET_CATEGORIES and stations:
+            target_station_id = stations[int(draws[slot, 1] * len(stations))]
+            target_system_id = snapshot.stations[target_station_id]['system_id']
+            target_name = snapshot.stations[target_station_id]['name']
+        elif category in PLANET_TARGET_CATEGORIES and planets:
+            target_planet_id = planets[int(draws[slot, 1] * len(planets))]
+            target_system_id = snapshot.planets[target_planet_id]['system_id']
+            target_name = snapshot.planets[target_planet_id]['name']
+        else:
+            candidates = systems if category == 'combat' else remote_systems
+            target_system_id = candidates[int(draws[slot, 1] * len(candidates))]
+            target_name = snapshot.systems[target_system_id]['name']
+
+        jumps = jumps_by_system[target_system_id]
+        danger = ((origin['danger_level'] or 1) + (snapshot.systems[target_system_id]['danger_level'] or 1)) / 2
+        difficulty = int(min(max(round(danger) + int(variations[slot]) + CATEGORY_DIFFICULTY_BONUS.get(category, 0),
+                                 1), MAX_DIFFICULTY))
+        scale = (mission_type.difficulty_multiplier or 1.0) * (1 + REWARD_PER_DIFFICULTY * (difficulty - 1))
+        reward = float(mission_type.base_reward or 0) * scale * (1 + REWARD_PER_JUMP * jumps)
+        # 第三个随机数让同类任务的奖励有±10%的浮动
+        reward *= 0.9 + 0.2 * draws[slot, 2]
+
+        key = board_key(game_id, station_id, bucket, slot)
+        offers.append({
+            'offer_id': f'{bucket}-{slot}',
+            'board_key': key,
+            'mission_id': None,
+            'type_id': mission_type.type_id,
+            'category': category,
+            'title': f'{mission_type.name}: {target_name}'[:100],
+            'description': None,
+            'giver_station_id': station_id,
+            'target_system_id': target_system_id,
+            'target_planet_id': target_planet_id,
+            'target_station_id': target_station_id,
+            'jumps': jumps,
+            'reward_credits': round(reward / REWARD_ROUNDING) * REWARD_ROUNDING,
+            'reward_reputation': round((mission_type.base_reputation or 0)
+                                       * (1 + REPUTATION_PER_DIFFICULTY * (difficulty - 1))),
+            'time_limit_hours': BASE_TIME_LIMIT_HOURS + TIME_LIMIT_HOURS_PER_JUMP * jumps,
+            'difficulty_level': difficulty,
+            'required_commodity_id': None,
+            'required_quantity': None,
+            'is_story_mission': False,
+            'is_repeatable': False
+        })
+    return offers
+
+
+def _authored_offers(game_id, station_id):
+    """空间站预先编写的任务，排除存档已经接受过（未放弃）的不可重复任务"""
+    rows = db.session.execute(
+        db.select(Mission, MissionType.category)
+        .join(MissionType, MissionType.type_id == Mission.type_id)
+        .where(Mission.giver_station_id == station_id, Mission.board_key.is_(None))
+        .order_by(Mission.mission_id)
+    ).all()
+    if not rows:
+        return []
+    taken = set(db.session.execute(
+        db.select(PlayerMission.mission_id)
+        .where(PlayerMission.game_id == game_id,
+               PlayerMission.mission_id.in_([mission.mission_id for mission, _ in rows]),
+               PlayerMission.status != 'abandoned')
+    ).scalars())
+
+    offers = []
+    for mission, category in rows:
+        if mission.mission_id in taken and not mission.is_repeatable:
+            continue
+        offer = mission.to_dict()
+        offer.update(offer_id=f'm{mission.mission_id}', board_key=None, category=category, jumps=None)
+        offers.append(offer)
+    return offers
+
+
+def get_mission_board(game_id, station_id, min_difficulty=None, max_difficulty=None, moment=None):
+    """存档在空间站当前时间段的任务板
+
+    Args:
+        game_id: 存档ID（调用方已验证归属）
+        station_id: 空间站ID
+        min_difficulty, max_difficulty: 可选，难度筛选，最高难度不超过势力关系允许的值
+        moment: 可选，计算时间段使用的时间，默认为当前时间
+
+    Returns:
+        dict: 任务板，missions 为筛选后的任务列表
+
+    Raises:
+        LookupError: 空间站不存在或没有任务板
+    """
+    snapshot = get_universe_snapshot()
+    station = _board_station(snapshot, station_id)
+    bucket, refreshes_at = board_bucket(moment)
+    standing = get_faction_standing(game_id, station['controlling_faction_id'])
+    allowed = max_difficulty_for_standing(standing)
+    upper = allowed if max_difficulty is None else min(max_difficulty, allowed)
+    lower = min_difficulty or 1
+
+    offers = []
+    if upper >= lower:
+        generated = generate_board(game_id, station_id, bucket, load_mission_types(), snapshot=snapshot)
+        accepted = set(db.session.execute(
+            db.select(Mission.board_key).where(Mission.board_key.in_([offer['board_key'] for offer in generated]))
+        ).scalars()) if generated else set()
+        offers = [offer for offer in _authored_offers(game_id, station_id) + generated
+                  if offer['board_key'] not in accepted
+                  and lower <= (offer['difficulty_level'] or 1) <= upper]
+
+    return {
+        'station_id': station_id,
+        'faction_id': station['controlling_faction_id'],
+        'standing': standing,
+        'max_difficulty': allowed,
+        'refreshes_at': refreshes_at.isoformat(),
+        'missions': offers
+    }
+
+
+def count_active_missions(game_id):
+    """存档中进行中的任务数（使用 (game_id, status) 索引）"""
+    return db.session.execute(
+        db.select(db.func.count()).select_from(PlayerMission)
+        .where(PlayerMission.game_id == game_id, PlayerMission.status == 'active')
+    ).scalar()
+
+
+def accept_mission(game_save, station_id, offer_id, moment=None):
+    """接受任务板上的任务并提交
+
+    生成的任务只能在生成它的时间段内接受
+
+    Returns:
+        tuple: (PlayerMission, Mission)
+
+    Raises:
+        LookupError: 空间站或任务不存在
+        MissionError: 任务板已刷新、任务已被接受、难度超过势力关系允许的值或进行中的任务过多
+    """
+    game_id = game_save.game_id
+    snapshot = get_universe_snapshot()
+    station = _board_station(snapshot, station_id)
+    offer_id = str(offer_id)
+
+    if count_active_missions(game_id) >= current_app.config.get('MISSION_MAX_ACTIVE', 10):
+        raise MissionError("进行中的任务已达上限")
+
+    bucket, _ = board_bucket(moment)
+    if offer_id.startswith('m'):
+        mission = db.session.get(Mission, int(offer_id[1:])) if offer_id[1:].isdigit() else None
+        if mission is None or mission.giver_station_id != station_id or mission.board_key is not None:
+            raise LookupError("任务不存在")
+        if not mission.is_repeatable and db.session.execute(
+            db.select(PlayerMission.player_mission_id)
+            .where(PlayerMission.game_id == game_id, PlayerMission.mission_id == mission.mission_id,
+                   PlayerMission.status != 'abandoned')
+            .limit(1)
+        ).first() is not None:
+            raise MissionError("任务已被接受")
+        difficulty = mission.difficulty_level or 1
+    else:
+        try:
+            offer_bucket, slot = (int(part) for part in offer_id.split('-'))
+        except ValueError:
+            raise LookupError("任务不存在")
+        if offer_bucket != bucket:
+            raise MissionError("任务板已刷新，请重新查看任务板")
+        offers = generate_board(game_id, station_id, bucket, load_mission_types(), snapshot=snapshot)
+        if not 0 <= slot < len(offers):
+            raise LookupError("任务不存在")
+        offer = offers[slot]
+        difficulty = offer['difficulty_level']
+        mission = Mission(**{name: offer[name] for name in (
+            'type_id', 'title', 'description', 'giver_station_id', 'target_system_id', 'target_planet_id',
+            'target_station_id', 'reward_credits', 'reward_reputation', 'time_limit_hours', 'difficulty_level',
+            'is_story_mission', 'is_repeatable', 'board_key'
+        )})
+
+    standing = get_faction_standing(game_id, station['controlling_faction_id'])
+    if difficulty > max_difficulty_for_standing(standing):
+        raise MissionError("与该势力的关系不足以接受此任务")
+
+    start_time = datetime.utcnow()
+    time_limit_hours = mission.time_limit_hours
+    player_mission = PlayerMission(user_id=game_save.user_id, game_id=game_id, status='active',
+                                   start_time=start_time, current_progress=0, total_steps=1)
+    try:
+        if mission.mission_id is None:
+            db.session.add(mission)
+            db.session.flush()
+        player_mission.mission_id = mission.mission_id
+        db.session.add(player_mission)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise MissionError("任务已被接受")
+
+    # 本进程的调度器立即知道截止时间，不必等到下一次从数据库读取
+    if time_limit_hours:
+        get_mission_scheduler().schedule(player_mission.player_mission_id,
+                                         start_time + timedelta(hours=time_limit_hours))
+    return player_mission, mission
+
+
+def _target_reached(game_save, mission):
+    """存档当前使用中的飞船是否位于任务目标（空间站、行星或星系）"""
+    location = db.session.execute(
+        db.select(PlayerShip.current_location_type, PlayerShip.current_location_id)
+        .where(PlayerShip.game_id == game_save.game_id, PlayerShip.is_active.is_(True))
+        .limit(1)
+    ).first()
+    location = tuple(location) if location is not None else (None, None)
+    if mission.target_station_id is not None:
+        return location == ('station', mission.target_station_id)
+    if mission.target_planet_id is not None:
+        return location == ('planet', mission.target_planet_id)
+    if mission.target_system_id is not None:
+        return (game_save.current_system_id == mission.target_system_id
+                or location == ('system', mission.target_system_id))
+    return True
+
+
+def complete_mission(game_save, player_mission_id):
+    """到达目标后完成任务，奖励由 complete_missions 发放并提交
+
+    任务要求的货物（required_commodity_id）暂不检查
+
+    Returns:
+        dict: 完成的任务摘要，见 complete_missions
+
+    Raises:
+        LookupError: 任务不存在
+        MissionError: 任务不在进行中、已超时或尚未到达目标
+    """
+    row = db.session.execute(
+        db.select(PlayerMission, Mission)
+        .join(Mission, Mission.mission_id == PlayerMission.mission_id)
+        .where(PlayerMission.player_mission_id == player_mission_id, PlayerMission.game_id == game_save.game_id)
+    ).first()
+    if row is None:
+        raise LookupError("任务不存在")
+    player_mission, mission = row
+    if player_mission.status != 'active':
+        raise MissionError("任务不在进行中")
+    if not _target_reached(game_save, mission):
+        raise MissionError("尚未到达任务目标")
+
+    completed = complete_missions([player_mission_id])
+    if not completed:
+        raise MissionError("任务已超时")
+    return completed[0]
+
+
+def abandon_mission(game_id, player_mission_id):
+    """放弃进行中的任务并提交
+
+    Raises:
+        LookupError: 任务不存在
+        MissionError: 任务不在进行中
+    """
+    player_mission = db.session.execute(
+        db.select(PlayerMission)
+        .where(PlayerMission.player_mission_id == player_mission_id, PlayerMission.game_id == game_id)
+    ).scalar()
+    if player_mission is None:
+        raise LookupError("任务不存在")
+    if player_mission.status != 'active':
+        raise MissionError("任务不在进行中")
+    player_mission.status = 'abandoned'
+    player_mission.completion_time = datetime.utcnow()
+    db.session.commit()
+    return player_mission
+
+
+def list_player_missions(game_id, status='active'):
+    """存档中指定状态的任务及其内容，按接受时间排序（使用 (game_id, status) 索引）
+
+    Args:
+        status: 任务状态，为None时返回全部任务
+    """
+    query = (
+        db.select(PlayerMission, Mission)
+        .join(Mission, Mission.mission_id == PlayerMission.mission_id)
+        .where(PlayerMission.game_id == game_id)
+        .order_by(PlayerMission.start_time, PlayerMission.player_mission_id)
+    )
+    if status is not None:
+        query = query.where(PlayerMission.status == status)
+
+    missions = []
+    for player_mission, mission in db.session.execute(query).all():
+        record = player_mission.to_dict()
+        record['mission'] = mission.to_dict()
+        if mission.time_limit_hours and player_mission.start_time:
+            record['deadline'] = (player_mission.start_time
+                                  + timedelta(hours=mission.time_limit_hours)).isoformat()
+        else:
+            record['deadline'] = None
+        missions.append(record)
+    return missions
@@ -0,0 +1,360 @@
+"""
+任务期限与完成结算
+有时间限制的任务（missions.time_limit_hours）的截止时间 = player_missions.start_time + 时间限制。
+调度器在内存中按截止时间维护一个最小堆，只在有任务到期时访问数据库：
+到期的任务按批用executemany的UPDATE标记为failed，而不是在每个请求里逐个检查玩家的任务。
+
+堆的内容来自数据库：启动时加载全部进行中的限时任务，之后每个周期按player_mission_id读取新接受的任务，
+并每隔 MISSION_SCHEDULER_FULL_SYNC_INTERVAL 秒完整重建（覆盖并发事务乱序提交的ID）。
+已完成或放弃的任务留在堆中直到截止时间，UPDATE带有 status='active' 条件，不会被误标记。
+
+完成任务的奖励（游戏币、声望、completed_missions_count、player_statistics，
+以及与任务发布空间站所属势力的关系，传播到其盟友和敌对势力）由 complete_missions
+在一个事务中批量发放，语句数与任务数无关。
+
+调度器可以在Web进程内以后台线程运行，也可以关闭 MISSION_SCHEDULER_IN_PROCESS
+后由 mission_worker.py 作为独立进程运行（多个Web进程时只需一个调度器）
+"""
+import atexit
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.mission import Mission, PlayerMission
+from app.models.player import PlayerStatistic
+from app.services.faction_standing import apply_standing_changes
+from app.services.game_log_service import log_game_event
+from app.services.universe_snapshot import get_universe_snapshot
+
+logger = logging.getLogger('freelancer.missions')
+
+
+def _deadline(start_time, time_limit_hours):
+    return start_time + timedelta(hours=time_limit_hours)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def complete_missions(player_mission_ids, at=None):
+    """完成一批进行中的任务，发放奖励并提交
+
+    一个事务内：标记任务为completed，按存档累加游戏币、声望和completed_missions_count，
+    player_statistics的missions_completed和total_credits_earned，
+    以及与任务发布空间站所属势力的关系（变化为任务的声望奖励，见 apply_standing_changes）。
+    已不在进行中或已超过截止时间的任务被跳过（到期的任务由调度器标记为失败）
+
+    Args:
+        player_mission_ids: 玩家任务ID
+        at: 可选，完成时间，默认为当前时间
+
+    Returns:
+        list: 完成的任务摘要（player_mission_id、game_id、mission_id、reward_credits、reward_reputation，
+            以及standing_changes：存档本次与各势力的关系变化）
+    """
+    at = at or datetime.utcnow()
+    ids = sorted(set(player_mission_ids))
+    if not ids:
+        return []
+
+    missions = PlayerMission.__table__
+    rows = db.session.execute(
+        db.select(missions.c.player_mission_id, missions.c.user_id, missions.c.game_id, missions.c.mission_id,
+                  missions.c.start_time, Mission.title, Mission.giver_station_id, Mission.reward_credits,
+                  Mission.reward_reputation, Mission.time_limit_hours)
+        .join(Mission, Mission.mission_id == missions.c.mission_id)
+        .where(missions.c.player_mission_id.in_(ids), missions.c.status == 'active')
+        .with_for_update()
+    ).all()
+    rows = [row for row in rows if not (row.time_limit_hours and row.start_time
+                                        and _deadline(row.start_time, row.time_limit_hours) <= at)]
+    if not rows:
+        db.session.rollback()
+        return []
+
+    db.session.execute(
+        db.update(missions)
+        .where(missions.c.player_mission_id.in_([row.player_mission_id for row in rows]),
+               missions.c.status == 'active')
+        .values(status='completed', completion_time=at, current_progress=missions.c.total_steps)
+    )
+
+    # 按存档合并奖励
+    totals = {}
+    for row in rows:
+        credits, reputation, count = totals.get(row.game_id, (0, 0, 0))
+        totals[row.game_id] = (credits + int(round(float(row.reward_credits or 0))),
+                               reputation + (row.reward_reputation or 0), count + 1)
+    saves = GameSave.__table__
+    db.session.execute(
+        db.update(saves)
+        .where(saves.c.game_id == db.bindparam('b_game_id'))
+        .values(
+            credits=db.func.coalesce(saves.c.credits, 0) + db.bindparam('b_credits'),
+            reputation=db.func.coalesce(saves.c.reputation, 0) + db.bindparam('b_reputation'),
+            completed_missions_count=db.func.coalesce(saves.c.completed_missions_count, 0) + db.bindparam('b_count')
+        ),
+        [{'b_game_id': game_id, 'b_credits': credits, 'b_reputation': reputation, 'b_count': count}
+         for game_id, (credits, reputation, count) in totals.items()]
+    )
+    statistics = PlayerStatistic.__table__
+    db.session.execute(
+        db.update(statistics)
+        .where(statistics.c.game_id == db.bindparam('b_game_id'))
+        .values(
+            missions_completed=db.func.coalesce(statistics.c.missions_completed, 0) + db.bindparam('b_count'),
+            total_credits_earned=db.func.coalesce(statistics.c.total_credits_earned, 0) + db.bindparam('b_credits'),
+            last_updated=at
+        ),
+        [{'b_game_id': game_id, 'b_credits': credits, 'b_count': count}
+         for game_id, (credits, _, count) in totals.items()]
+    )
+
+    # 与发布任务的势力的关系
+    stations = get_universe_snapshot().stations
+    standing_deltas = {}
+    for row in rows:
+        station = stations.get(row.giver_station_id)
+        if station is None or station['controlling_faction_id'] is None or not row.reward_reputation:
+            continue
+        deltas = standing_deltas.setdefault((row.user_id, row.game_id), {})
+        faction_id = station['controlling_faction_id']
+        deltas[faction_id] = deltas.get(faction_id, 0) + row.reward_reputation
+    standing_changes = apply_standing_changes(standing_deltas, at=at)
+    db.session.commit()
+
+    completed = []
+    for row in rows:
+        log_game_event(row.user_id, row.game_id, 'mission_completed', f'完成任务：{row.title}')
+        completed.append({
+            'player_mission_id': row.player_mission_id,
+            'game_id': row.game_id,
+            'mission_id': row.mission_id,
+            'reward_credits': int(round(float(row.reward_credits or 0))),
+            'reward_reputation': row.reward_reputation or 0,
+            'standing_changes': standing_changes.get(row.game_id, {})
+        })
+    return completed
+
+
+class MissionScheduler:
+    """按截止时间排序的任务到期调度器"""
+
+    def __init__(self, app, interval=5, batch_size=500, full_sync_interval=300):
+        """
+        Args:
+            app: Flask应用，后台处理时使用其应用上下文
+            interval: 后台线程的处理间隔（秒），为0时不启动后台线程，由调用方调用 tick()
+            batch_size: 每条UPDATE标记的任务数上限
+            full_sync_interval: 从数据库完整重建堆的间隔（秒）
+        """
+        self._app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.full_sync_interval = full_sync_interval
+
+        self._heap = []             # (截止时间, player_mission_id)
+        self._deadlines = {}        # player_mission_id -> 截止时间，堆中过时的条目以此为准
+        self._last_id = 0
+        self._next_full_sync = 0.0
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        """本进程的后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def schedule(self, player_mission_id, deadline):
+        """加入（或更新）任务的截止时间，例如本进程刚接受的任务
+
+        后台线程没有运行时（由 mission_worker.py 处理，或处理间隔为0）不做任何事：
+        没有人会取出这些条目，任务由负责处理的调度器从数据库读取
+        """
+        if not self.running:
+            return
+        with self._lock:
+            self._deadlines[player_mission_id] = deadline
+            heapq.heappush(self._heap, (deadline, player_mission_id))
+        self._wake.set()
+
+    def next_deadline(self):
+        """最早的截止时间，没有待到期的任务时返回None"""
+        with self._lock:
+            while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def sync(self, full=False):
+        """从数据库读取进行中的限时任务：新接受的任务，或完整重建（full=True）"""
+        missions = PlayerMission.__table__
+        query = (
+            db.select(missions.c.player_mission_id, missions.c.start_time, Mission.time_limit_hours)
+            .join(Mission, Mission.mission_id == missions.c.mission_id)
+            .where(missions.c.status == 'active', Mission.time_limit_hours.isnot(None),
+                   missions.c.start_time.isnot(None))
+            .order_by(missions.c.player_mission_id)
+        )
+        if not full:
+            query = query.where(missions.c.player_mission_id > self._last_id)
+        rows = db.session.execute(query).all()
+
+        entries = [(_deadline(row.start_time, row.time_limit_hours), row.player_mission_id) for row in rows]
+        with self._lock:
+            if full:
+                self._deadlines = {player_mission_id: deadline for deadline, player_mission_id in entries}
+                self._heap = list(entries)
+                heapq.heapify(self._heap)
+            else:
+                for deadline, player_mission_id in entries:
+                    self._deadlines[player_mission_id] = deadline
+                    heapq.heappush(self._heap, (deadline, player_mission_id))
+            if rows:
+                self._last_id = max(self._last_id, rows[-1].player_mission_id)
+        return len(rows)
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, player_mission_id = heapq.heappop(self._heap)
+                if self._deadlines.get(player_mission_id) == deadline:
+                    del self._deadlines[player_mission_id]
+                    due.append((player_mission_id, deadline))
+        return due
+
+    def expire_due(self, now=None):
+        """把已到截止时间的进行中任务标记为failed，每批一条executemany的UPDATE并提交
+
+        Returns:
+            int: 标记为失败的任务数
+        """
+        now = now or datetime.utcnow()
+        due = self._pop_due(now)
+        missions = PlayerMission.__table__
+        expired = 0
+        for batch in _chunks(due, self.batch_size):
+            try:
+                # 先确认仍在进行中的任务（用于记录日志），再按截止时间写入完成时间
+                active = db.session.execute(
+                    db.select(missions.c.player_mission_id, missions.c.user_id, missions.c.game_id,
+                              missions.c.mission_id)
+                    .where(missions.c.player_mission_id.in_([player_mission_id for player_mission_id, _ in batch]),
+                           missions.c.status == 'active')
+                    .with_for_update()
+                ).all()
+                if active:
+                    deadlines = dict(batch)
+                    db.session.execute(
+                        db.update(missions)
+                        .where(missions.c.player_mission_id == db.bindparam('b_id'), missions.c.status == 'active')
+                        .values(status='failed', completion_time=db.bindparam('b_deadline', type_=db.DateTime)),
+                        [{'b_id': row.player_mission_id, 'b_deadline': deadlines[row.player_mission_id]}
+                         for row in active]
+                    )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception('标记到期任务失败，%d 个任务将在下次重试', len(batch))
+                with self._lock:
+                    for player_mission_id, deadline in batch:
+                        self._deadlines[player_mission_id] = deadline
+                        heapq.heappush(self._heap, (deadline, player_mission_id))
+                continue
+            for row in active:
+                log_game_event(row.user_id, row.game_id, 'mission_failed', f'任务超时：{row.mission_id}')
+            expired += len(active)
+        if expired:
+            logger.info('%d 个任务已超时', expired)
+        return expired
+
+    def tick(self, now=None):
+        """处理一个周期：读取新任务（到期时完整重建），然后标记到期的任务
+
+        Returns:
+            int: 标记为失败的任务数
+        """
+        with self._tick_lock:
+            with self._app.app_context():
+                try:
+                    full = time.monotonic() >= self._next_full_sync
+                    if full:
+                        self._next_full_sync = time.monotonic() + self.full_sync_interval
+                    self.sync(full=full)
+                    return self.expire_due(now)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('任务调度失败')
+                    return 0
+                finally:
+                    db.session.remove()
+
+    def _wait_seconds(self):
+        """距下一个截止时间的秒数，不超过处理间隔"""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return self.interval
+        return min(self.interval, max((deadline - datetime.utcnow()).total_seconds(), 0.0))
+
+    def start(self):
+        """启动后台线程"""
+        if self.interval and self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='mission-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止后台线程"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def run_forever(self):
+        """循环处理直到 stop()，每个周期最多等待 interval 秒，有任务更早到期时提前处理"""
+        while not self._stopped.is_set():
+            self.tick()
+            self._wake.wait(self._wait_seconds())
+            self._wake.clear()
+
+
+def init_mission_scheduler(app):
+    """创建应用的任务调度器，在Web进程内运行时启动后台线程
+
+    配置项:
+        MISSION_SCHEDULER_IN_PROCESS: 是否在Web进程内运行，由 mission_worker.py 处理时关闭
+        MISSION_SCHEDULER_INTERVAL: 处理间隔（秒），为0时不启动后台线程
+        MISSION_SCHEDULER_BATCH_SIZE: 每条UPDATE标记的任务数上限
+        MISSION_SCHEDULER_FULL_SYNC_INTERVAL: 从数据库完整重建的间隔（秒）
+    """
+    scheduler = MissionScheduler(
+        app,
+        interval=app.config.get('MISSION_SCHEDULER_INTERVAL', 5),
+        batch_size=app.config.get('MISSION_SCHEDULER_BATCH_SIZE', 500),
+        full_sync_interval=app.config.get('MISSION_SCHEDULER_FULL_SYNC_INTERVAL', 300)
+    )
+    app.extensions['mission_scheduler'] = scheduler
+    if app.config.get('MISSION_SCHEDULER_IN_PROCESS', True) and scheduler.interval:
+        scheduler.start()
+        atexit.register(scheduler.stop)
+    return scheduler
+
+
+def get_mission_scheduler():
+    """当前应用的任务调度器"""
+    return current_app.extensions['mission_scheduler']
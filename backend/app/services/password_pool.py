@@ -0,0 +1,113 @@
+"""
+密码哈希计算池
+PBKDF2哈希和验证是纯CPU计算，登录高峰时会占满全部请求线程。
+哈希计算交给有界的线程池或进程池执行，并用信号量限制同时进行（含排队）的计算数：
+超过上限的请求最多等待 PASSWORD_POOL_WAIT_TIMEOUT 秒，仍然没有空位则拒绝（接口返回503），
+保证登录不会挤占游戏请求的线程和CPU
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger('freelancer.auth')
+
+MODES = ('inline', 'thread', 'process')
+
+
+class PasswordPoolBusy(Exception):
+    """同时进行的密码计算已达上限"""
+
+
+class PasswordPool:
+    """有并发上限的密码哈希计算池"""
+
+    def __init__(self, mode='thread', workers=2, max_pending=16, wait_timeout=2.0):
+        """
+        Args:
+            mode: inline（在调用线程计算，只限制并发数）/ thread / process
+            workers: 线程池或进程池的大小
+            max_pending: 同时进行（含排队）的计算数上限
+            wait_timeout: 达到上限时最长等待秒数
+        """
+        if mode not in MODES:
+            raise ValueError(f"未知的密码计算池模式: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.stats = {'completed': 0, 'rejected': 0}
+
+    def _get_executor(self):
+        """首次使用时创建执行器（进程池在fork前创建会复制整个应用）"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.mode == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix='password-pool')
+        return self._executor
+
+    def run(self, func, *args):
+        """在池中执行 func(*args) 并等待结果
+
+        func需要是模块级函数（进程池模式下要序列化传给子进程）
+
+        Raises:
+            PasswordPoolBusy: 等待 wait_timeout 秒后仍没有空位
+        """
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            self.stats['rejected'] += 1
+            logger.info('密码计算已达并发上限 %d，拒绝请求', self.max_pending)
+            raise PasswordPoolBusy("登录请求过多，请稍后重试")
+        try:
+            if self.mode == 'inline':
+                result = func(*args)
+            else:
+                result = self._get_executor().submit(func, *args).result()
+            self.stats['completed'] += 1
+            return result
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        """关闭线程池或进程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def init_password_pool(app):
+    """创建应用的密码计算池，进程退出时关闭
+
+    配置项:
+        PASSWORD_POOL_MODE: inline / thread / process
+        PASSWORD_POOL_WORKERS: 线程池或进程池的大小
+        PASSWORD_POOL_MAX_PENDING: 同时进行（含排队）的计算数上限
+        PASSWORD_POOL_WAIT_TIMEOUT: 达到上限时最长等待秒数
+    """
+    pool = PasswordPool(
+        mode=app.config.get('PASSWORD_POOL_MODE', 'thread'),
+        workers=app.config.get('PASSWORD_POOL_WORKERS', 2),
+        max_pending=app.config.get('PASSWORD_POOL_MAX_PENDING', 16),
+        wait_timeout=app.config.get('PASSWORD_POOL_WAIT_TIMEOUT', 2.0)
+    )
+    app.extensions['password_pool'] = pool
+    atexit.register(pool.shutdown)
+    return pool
+
+
+def run_in_password_pool(func, *args):
+    """在当前应用的密码计算池中执行；没有应用上下文或未初始化时直接在调用线程执行"""
+    pool = current_app.extensions.get('password_pool') if has_app_context() else None
+    if pool is None:
+        return func(*args)
+    return pool.run(func, *args)
@@ -0,0 +1,289 @@
+"""
+航线规划服务
+基于跳跃门图计算两个星系之间最便宜、最短或最安全的航线
+"""
+import heapq
+import math
+import threading
+from array import array
+
+from flask import current_app
+
+from app.services.universe_snapshot import get_universe_snapshot
+
+# 支持的规划模式
+ROUTE_MODES = ('shortest', 'cheapest', 'safest')
+
+# 最便宜模式下每次跳跃附加的极小代价，使通行费相同时优先选择跳跃次数更少的航线
+CHEAPEST_HOP_PENALTY = 0.01
+
+
+class RoutePlanner:
+    """跳跃门图上的航线规划器
+
+    图以数组形式的邻接表（CSR）保存：星系按ID排序后映射为连续下标，
+    offsets[u]..offsets[u+1] 为从星系u出发的边在 targets / gate_ids / 各权重数组中的区间。
+    非单向跳跃门同时作为反向边加入。
+
+    查询使用A*：启发值为到终点的欧氏距离乘以该权重下"代价/距离"的最小比值，
+    对三种模式都是可采纳且一致的。星系数量不超过阈值时可预计算全源最短路，查询为O(1)。
+    """
+
+    def __init__(self, snapshot, precompute_limit=0):
+        self.version = snapshot.version
+        self.system_ids = array('i', snapshot.system_ids)
+        self.index = {system_id: i for i, system_id in enumerate(self.system_ids)}
+        self.size = len(self.system_ids)
+
+        self.xs = array('d')
+        self.ys = array('d')
+        self.zs = array('d')
+        for system_id in self.system_ids:
+            system = snapshot.systems[system_id]
+            self.xs.append(system['x_coord'] or 0.0)
+            self.ys.append(system['y_coord'] or 0.0)
+            self.zs.append(system['z_coord'] or 0.0)
+
+        # 收集有向边：(起点下标, 终点下标, 跳跃门ID, 通行费, 稳定性)
+        edges = []
+        for gate in snapshot.gates:
+            source = self.index.get(gate['source_system_id'])
+            target = self.index.get(gate['target_system_id'])
+            if source is None or target is None:
+                continue
+            # to_dict中 difficulty_level 对应 stability，is_hidden 对应 one_way
+            toll = float(gate['toll_fee'] or 0.0)
+            stability = gate['difficulty_level'] if gate['difficulty_level'] is not None else 10
+            edges.append((source, target, gate['gate_id'], toll, stability))
+            if not gate['is_hidden']:
+                edges.append((target, source, gate['gate_id'], toll, stability))
+        edges.sort(key=lambda edge: edge[0])
+
+        self.offsets = array('i', [0] * (self.size + 1))
+        self.sources = array('i')
+        self.targets = array('i')
+        self.gate_ids = array('i')
+        self.distances = array('d')
+        self.tolls = array('d')
+        self.risks = array('d')
+
+        for source, target, gate_id, toll, stability in edges:
+            self.offsets[source + 1] += 1
+            self.sources.append(source)
+            self.targets.append(target)
+            self.gate_ids.append(gate_id)
+            self.distances.append(self._euclidean(source, target))
+            self.tolls.append(toll)
+            # 风险 = 跳跃门不稳定程度 + 目标星系危险等级
+            danger = snapshot.systems[self.system_ids[target]]['danger_level'] or 1
+            self.risks.append((10 - stability) + danger)
+        for i in range(self.size):
+            self.offsets[i + 1] += self.offsets[i]
+
+        self.weights = {
+            'shortest': self.distances,
+            'cheapest': array('d', (toll + CHEAPEST_HOP_PENALTY for toll in self.tolls)),
+            'safest': self.risks,
+        }
+        self.heuristic_ratios = {mode: self._min_ratio(weights) for mode, weights in self.weights.items()}
+
+        # 全源最短路预计算结果：模式 -> (距离矩阵, 前驱边矩阵)
+        self.precompute_limit = precompute_limit
+        self._all_pairs = {}
+        self._all_pairs_lock = threading.Lock()
+
+    def _euclidean(self, u, v):
+        """两个星系（下标）之间的欧氏距离"""
+        return math.sqrt(
+            (self.xs[u] - self.xs[v]) ** 2 +
+            (self.ys[u] - self.ys[v]) ** 2 +
+            (self.zs[u] - self.zs[v]) ** 2
+        )
+
+    def _min_ratio(self, weights):
+        """计算所有边上 代价/欧氏距离 的最小值，作为启发函数的缩放系数"""
+        ratio = math.inf
+        for e, weight in enumerate(weights):
+            length = self.distances[e]
+            if length > 0:
+                ratio = min(ratio, weight / length)
+            elif weight <= 0:
+                return 0.0
+        return 0.0 if ratio == math.inf else ratio
+
+    @property
+    def precomputed(self):
+        """当前图是否使用全源预计算模式"""
+        return 0 < self.size <= self.precompute_limit
+
+    def find_route(self, source_id, target_id, mode='shortest'):
+        """查找两个星系之间的航线
+
+        Args:
+            source_id: 起点星系ID
+            target_id: 终点星系ID
+            mode: 规划模式，shortest/cheapest/safest
+
+        Returns:
+            list: 航线经过的边下标列表；起终点相同时为空列表，无法到达时返回None
+
+        Raises:
+            ValueError: 模式或星系ID无效
+        """
+        if mode not in self.weights:
+            raise ValueError(f"不支持的规划模式: {mode}")
+
+        source = self.index.get(source_id)
+        target = self.index.get(target_id)
+        if source is None or target is None:
+            raise ValueError("星系不存在")
+        if source == target:
+            return []
+
+        if self.precomputed:
+            dist, prev = self._get_all_pairs(mode)
+            if dist[source * self.size + target] == math.inf:
+                return None
+            return self._unwind(prev, source * self.size, source, target)
+
+        return self._astar(source, target, mode)
+
+    def _astar(self, source, target, mode):
+        """单源单目标A*搜索"""
+        weights = self.weights[mode]
+        ratio = self.heuristic_ratios[mode]
+        offsets, targets = self.offsets, self.targets
+
+        dist = [math.inf] * self.size
+        prev = array('i', [-1] * self.size)
+        closed = bytearray(self.size)
+        dist[source] = 0.0
+        heap = [(ratio * self._euclidean(source, target), 0.0, source)]
+
+        while heap:
+            _, cost, u = heapq.heappop(heap)
+            if u == target:
+                return self._unwind(prev, 0, source, target)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                new_cost = cost + weights[e]
+                if new_cost < dist[v]:
+                    dist[v] = new_cost
+                    prev[v] = e
+                    heapq.heappush(heap, (new_cost + ratio * self._euclidean(v, target), new_cost, v))
+
+        return None
+
+    def _dijkstra_row(self, source, weights):
+        """单源Dijkstra，返回到所有星系的距离和前驱边"""
+        offsets, targets = self.offsets, self.targets
+        dist = array('d', [math.inf] * self.size)
+        prev = array('i', [-1] * self.size)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+
+        while heap:
+            cost, u = heapq.heappop(heap)
+            if cost > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                new_cost = cost + weights[e]
+                if new_cost < dist[v]:
+                    dist[v] = new_cost
+                    prev[v] = e
+                    heapq.heappush(heap, (new_cost, v))
+
+        return dist, prev
+
+    def _get_all_pairs(self, mode):
+        """获取（必要时计算）指定模式的全源最短路矩阵"""
+        result = self._all_pairs.get(mode)
+        if result is None:
+            with self._all_pairs_lock:
+                result = self._all_pairs.get(mode)
+                if result is None:
+                    dist = array('d')
+                    prev = array('i')
+                    for source in range(self.size):
+                        row_dist, row_prev = self._dijkstra_row(source, self.weights[mode])
+                        dist.extend(row_dist)
+                        prev.extend(row_prev)
+                    result = (dist, prev)
+                    self._all_pairs[mode] = result
+        return result
+
+    def precompute(self):
+        """预先计算所有模式的全源最短路（仅在预计算模式下生效）"""
+        if self.precomputed:
+            for mode in ROUTE_MODES:
+                self._get_all_pairs(mode)
+
+    def _unwind(self, prev, base, source, target):
+        """根据前驱边数组回溯出从起点到终点的边序列"""
+        path = []
+        node = target
+        while node != source:
+            e = prev[base + node]
+            path.append(e)
+            node = self.sources[e]
+        path.reverse()
+        return path
+
+    def describe_route(self, source_id, path):
+        """将边序列转换为API响应使用的字典"""
+        system_ids = [source_id]
+        jumps = []
+        total_distance = total_toll = total_risk = 0.0
+
+        for e in path:
+            target_id = self.system_ids[self.targets[e]]
+            jumps.append({
+                'gate_id': self.gate_ids[e],
+                'source_system_id': system_ids[-1],
+                'target_system_id': target_id,
+                'distance': round(self.distances[e], 2),
+                'toll_fee': self.tolls[e],
+                'risk': self.risks[e]
+            })
+            system_ids.append(target_id)
+            total_distance += self.distances[e]
+            total_toll += self.tolls[e]
+            total_risk += self.risks[e]
+
+        return {
+            'system_ids': system_ids,
+            'jumps': jumps,
+            'jump_count': len(jumps),
+            'total_distance': round(total_distance, 2),
+            'total_toll': round(total_toll, 2),
+            'total_risk': total_risk
+        }
+
+
+# 进程级航线规划器，随宇宙快照版本重建
+_planner = None
+_planner_lock = threading.Lock()
+
+
+def get_route_planner():
+    """获取与当前宇宙快照一致的航线规划器"""
+    global _planner
+
+    snapshot = get_universe_snapshot()
+    if snapshot.version == 0:
+        # 未启用进程级快照时，临时快照不缓存规划器
+        return RoutePlanner(snapshot)
+
+    planner = _planner
+    if planner is None or planner.version != snapshot.version:
+        with _planner_lock:
+            planner = _planner
+            if planner is None or planner.version != snapshot.version:
+                limit = current_app.config.get('ROUTE_PRECOMPUTE_MAX_SYSTEMS', 0)
+                planner = RoutePlanner(snapshot, precompute_limit=limit)
+                _planner = planner
+    return planner
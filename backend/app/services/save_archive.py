@@ -0,0 +1,547 @@
+"""
+存档二进制导出/导入
+用于备份、分片间迁移和离线游戏。格式为版本化的紧凑二进制流：
+
+    文件头（不压缩）: 魔数 b'FLSV' | 格式版本 u16 | 压缩方式 u8
+    压缩后的正文:      表段... | 结束标记（表名长度为0）
+    表段:             表名 | 列数 u16 | 每列 (列名, 类型 u8) | 行块... | 行数为0的结束块
+    行块:             行数 u32 | 每列的数据块
+    列数据块:          空值掩码 | 值数组（字符串列为 长度数组 + UTF-8数据）
+
+所有整数为小端序，变长字段（名称、掩码、数组）都以长度为前缀。
+每个行块按列存放为定长数组（array模块），按块读写，导出和导入的内存占用
+只与块大小有关，与存档大小无关
+"""
+import array
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import MarketPrice
+from app.models.mission import PlayerMission
+from app.models.player import PlayerDiscovery, PlayerFactionStanding, PlayerStatistic
+from app.models.ship import PlayerShip, ShipCargoItem, ShipEquipment
+from app.services.discovery_service import forget_save_discoveries
+from app.services.market_engine import invalidate_market_version
+from app.services.ship_stats import invalidate_game_ship_stats
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - lz4是可选依赖
+    lz4_frame = None
+
+ARCHIVE_MAGIC = b'FLSV'
+ARCHIVE_VERSION = 1
+
+# 压缩方式
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+COMPRESSION_NAMES = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'lz4': COMPRESSION_LZ4}
+
+# 每个行块的行数
+ARCHIVE_CHUNK_ROWS = 4096
+
+# 读取上传数据的块大小
+READ_BLOCK_SIZE = 64 * 1024
+
+# 导出的表，顺序即导入顺序：存档本身在最前，飞船在装备和货物之前（需要重映射ship_id）
+ARCHIVE_TABLES = (
+    GameSave,
+    PlayerShip,
+    ShipEquipment,
+    ShipCargoItem,
+    MarketPrice,
+    PlayerFactionStanding,
+    PlayerMission,
+    PlayerDiscovery,
+    PlayerStatistic,
+)
+
+# 不写入归档的列：导入时由目标存档和用户决定
+EXCLUDED_COLUMNS = ('game_id', 'user_id')
+
+# 列类型
+KIND_INT = 1
+KIND_BOOL = 2
+KIND_FLOAT = 3
+KIND_DATETIME = 4
+KIND_STRING = 5
+
+_ARRAY_TYPECODES = {KIND_INT: 'q', KIND_BOOL: 'b', KIND_FLOAT: 'd', KIND_DATETIME: 'q'}
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_SWAP_BYTES = sys.byteorder != 'little'
+
+_HEADER = struct.Struct('<4sHB')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+
+
+class ArchiveError(ValueError):
+    """归档数据无效或不受支持"""
+
+
+def column_kind(column):
+    """SQLAlchemy列类型对应的归档列类型"""
+    column_type = column.type
+    if isinstance(column_type, db.Boolean):
+        return KIND_BOOL
+    if isinstance(column_type, db.Integer):
+        return KIND_INT
+    if isinstance(column_type, db.Numeric):
+        return KIND_FLOAT
+    if isinstance(column_type, db.DateTime):
+        return KIND_DATETIME
+    return KIND_STRING
+
+
+def _archive_columns(model):
+    return [column for column in model.__table__.columns if column.name not in EXCLUDED_COLUMNS]
+
+
+def _required_columns(model):
+    """导入时归档必须提供且不能为空的列：没有默认值的非空列，飞船还需要原ship_id（用于重映射）"""
+    primary_key = model.__table__.primary_key.columns.keys()[0]
+    required = [column.name for column in _archive_columns(model)
+                if not column.nullable and column.default is None and column.server_default is None
+                and column.name != primary_key]
+    if model is PlayerShip:
+        required.insert(0, primary_key)
+    return required
+
+
+def _check_required(table_name, required, names, chunk):
+    """检查表段包含必需的列且这些列没有空值
+
+    Raises:
+        ArchiveError: 缺少必需的列或必需的列为空
+    """
+    missing = [name for name in required if name not in names]
+    if missing:
+        raise ArchiveError(f"{table_name} 缺少必需的列: {', '.join(missing)}")
+    for name in required:
+        if None in chunk[names.index(name)]:
+            raise ArchiveError(f"{table_name} 的 {name} 列包含空值")
+
+
+# ---------------------------------------------------------------- 编码
+
+def _block(data):
+    return _U32.pack(len(data)) + data
+
+
+def _name(text):
+    data = text.encode('utf-8')
+    return _U8.pack(len(data)) + data
+
+
+def _array_bytes(typecode, values):
+    values = array.array(typecode, values)
+    if _SWAP_BYTES:
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_column(kind, values):
+    """把一列值编码为 空值掩码 + 值数组 的数据块"""
+    has_nulls = any(value is None for value in values)
+    parts = [_block(bytes(value is None for value in values) if has_nulls else b'')]
+
+    if kind == KIND_STRING:
+        encoded = [b'' if value is None else str(value).encode('utf-8') for value in values]
+        parts.append(_block(_array_bytes('I', map(len, encoded))))
+        parts.append(_block(b''.join(encoded)))
+    elif kind == KIND_DATETIME:
+        parts.append(_block(_array_bytes('q', (
+            0 if value is None else (value - _EPOCH) // _MICROSECOND for value in values
+        ))))
+    elif kind == KIND_FLOAT:
+        parts.append(_block(_array_bytes('d', (0.0 if value is None else float(value) for value in values))))
+    else:
+        parts.append(_block(_array_bytes(_ARRAY_TYPECODES[kind], (
+            0 if value is None else int(value) for value in values
+        ))))
+    return b''.join(parts)
+
+
+class _Compressor:
+    """压缩方式的统一接口"""
+
+    def __init__(self, compression):
+        self.compression = compression
+        if compression == COMPRESSION_ZLIB:
+            self._impl = zlib.compressobj(6)
+        elif compression == COMPRESSION_LZ4:
+            self._impl = lz4_frame.LZ4FrameCompressor()
+            self._pending = self._impl.begin()
+        else:
+            self._impl = None
+
+    def compress(self, data):
+        if self._impl is None:
+            return data
+        if self.compression == COMPRESSION_LZ4:
+            data, self._pending = self._pending + self._impl.compress(data), b''
+            return data
+        return self._impl.compress(data)
+
+    def flush(self):
+        return self._impl.flush() if self._impl is not None else b''
+
+
+def resolve_compression(name=None):
+    """压缩方式名称转换为代码；未安装lz4时退回zlib
+
+    Raises:
+        ArchiveError: 未知的压缩方式
+    """
+    name = name or current_app.config.get('SAVE_ARCHIVE_COMPRESSION', 'zlib')
+    if name not in COMPRESSION_NAMES:
+        raise ArchiveError(f"未知的压缩方式: {name}")
+    compression = COMPRESSION_NAMES[name]
+    if compression == COMPRESSION_LZ4 and lz4_frame is None:
+        compression = COMPRESSION_ZLIB
+    return compression
+
+
+def export_game_save(game_id, compression=COMPRESSION_ZLIB, chunk_rows=ARCHIVE_CHUNK_ROWS):
+    """以生成器形式导出存档的二进制归档
+
+    每张表一条按主键排序的流式查询（yield_per），逐块编码、压缩后产出
+
+    Args:
+        game_id: 存档ID（调用方已验证归属）
+        compression: 压缩方式代码
+        chunk_rows: 每个行块的行数
+
+    Yields:
+        bytes: 归档数据片段
+    """
+    yield _HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, compression)
+    compressor = _Compressor(compression)
+
+    for model in ARCHIVE_TABLES:
+        table = model.__table__
+        columns = _archive_columns(model)
+        kinds = [column_kind(column) for column in columns]
+
+        header = [_name(table.name), _U16.pack(len(columns))]
+        for column, kind in zip(columns, kinds):
+            header.append(_name(column.name) + _U8.pack(kind))
+        yield compressor.compress(b''.join(header))
+
+        # 定点数列直接按浮点读取，避免逐值创建Decimal
+        selected = [db.type_coerce(column, db.Float) if kind == KIND_FLOAT else column
+                    for column, kind in zip(columns, kinds)]
+        result = db.session.execute(
+            db.select(*selected)
+            .where(table.c.game_id == game_id)
+            .order_by(*table.primary_key.columns)
+            .execution_options(yield_per=chunk_rows)
+        )
+        for rows in result.partitions():
+            chunk = [_U32.pack(len(rows))]
+            for index, kind in enumerate(kinds):
+                chunk.append(encode_column(kind, [row[index] for row in rows]))
+            data = compressor.compress(b''.join(chunk))
+            if data:
+                yield data
+        yield compressor.compress(_U32.pack(0))
+
+    yield compressor.compress(_U8.pack(0)) + compressor.flush()
+
+
+# ---------------------------------------------------------------- 解码
+
+class _Decompressor:
+    """解压方式的统一接口，每次输出不超过指定长度，高压缩比的输入不会一次展开"""
+
+    def __init__(self, compression):
+        self.compression = compression
+        self._pending = b''
+        if compression == COMPRESSION_ZLIB:
+            self._impl = zlib.decompressobj()
+        elif compression == COMPRESSION_LZ4:
+            if lz4_frame is None:
+                raise ArchiveError("归档使用lz4压缩，但服务器未安装lz4")
+            self._impl = lz4_frame.LZ4FrameDecompressor()
+        elif compression == COMPRESSION_NONE:
+            self._impl = None
+        else:
+            raise ArchiveError(f"未知的压缩方式: {compression}")
+
+    @property
+    def needs_input(self):
+        if self.compression == COMPRESSION_LZ4:
+            return not self._pending and self._impl.needs_input
+        return not self._pending
+
+    def feed(self, data):
+        self._pending += data
+
+    def read(self, max_length):
+        data, self._pending = self._pending, b''
+        if self.compression == COMPRESSION_ZLIB:
+            output = self._impl.decompress(data, max_length)
+            self._pending = self._impl.unconsumed_tail
+            return output
+        if self.compression == COMPRESSION_LZ4:
+            try:
+                return self._impl.decompress(data, max_length)
+            except RuntimeError:
+                # lz4帧格式错误以RuntimeError抛出
+                raise ArchiveError("归档数据已损坏")
+        self._pending = data[max_length:]
+        return data[:max_length]
+
+
+class ArchiveReader:
+    """从字节流增量读取归档，缓冲区只保留尚未解析的数据"""
+
+    def __init__(self, stream, block_size=READ_BLOCK_SIZE):
+        self._stream = stream
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._offset = 0
+        self._decompressor = None
+
+        magic, version, compression = _HEADER.unpack(self.read(_HEADER.size))
+        if magic != ARCHIVE_MAGIC:
+            raise ArchiveError("不是有效的存档归档")
+        if version > ARCHIVE_VERSION:
+            raise ArchiveError(f"不支持的归档格式版本: {version}")
+        self.version = version
+        # 文件头之后已读入缓冲区的部分属于压缩正文
+        self._decompressor = _Decompressor(compression)
+        self._decompressor.feed(bytes(self._buffer[self._offset:]))
+        self._buffer, self._offset = bytearray(), 0
+
+    def _fill(self, size):
+        while len(self._buffer) - self._offset < size:
+            decompressor = self._decompressor
+            if decompressor is None or decompressor.needs_input:
+                data = self._stream.read(self._block_size)
+                if not data:
+                    # 输入已读完，解压器内部可能还有未输出的数据
+                    data = decompressor.read(max(size, self._block_size)) if decompressor is not None else b''
+                    if not data:
+                        raise ArchiveError("归档数据不完整")
+                elif decompressor is not None:
+                    decompressor.feed(data)
+                    continue
+            else:
+                data = decompressor.read(max(size, self._block_size))
+            if self._offset:
+                del self._buffer[:self._offset]
+                self._offset = 0
+            self._buffer += data
+
+    def read(self, size):
+        self._fill(size)
+        data = bytes(self._buffer[self._offset:self._offset + size])
+        self._offset += size
+        return data
+
+    def read_struct(self, fmt):
+        return fmt.unpack(self.read(fmt.size))[0]
+
+    def read_name(self):
+        return self.read(self.read_struct(_U8)).decode('utf-8')
+
+    def read_block(self):
+        return self.read(self.read_struct(_U32))
+
+
+def _array_values(typecode, data):
+    values = array.array(typecode)
+    if len(data) % values.itemsize:
+        raise ArchiveError("列数据长度无效")
+    values.frombytes(data)
+    if _SWAP_BYTES:
+        values.byteswap()
+    return values
+
+
+def decode_column(reader, kind, count):
+    """读取一列的数据块，返回Python值列表"""
+    nulls = reader.read_block()
+    if kind == KIND_STRING:
+        lengths = _array_values('I', reader.read_block())
+        data = reader.read_block()
+        if sum(lengths) != len(data):
+            raise ArchiveError("列数据长度无效")
+        values, position = [], 0
+        for length in lengths:
+            values.append(data[position:position + length].decode('utf-8'))
+            position += length
+    elif kind == KIND_DATETIME:
+        try:
+            values = [_EPOCH + micros * _MICROSECOND for micros in _array_values('q', reader.read_block())]
+        except OverflowError:
+            raise ArchiveError("时间值超出范围")
+    elif kind == KIND_BOOL:
+        values = [bool(value) for value in _array_values('b', reader.read_block())]
+    elif kind in _ARRAY_TYPECODES:
+        values = _array_values(_ARRAY_TYPECODES[kind], reader.read_block()).tolist()
+    else:
+        raise ArchiveError(f"未知的列类型: {kind}")
+
+    if len(values) != count or (nulls and len(nulls) != count):
+        raise ArchiveError("列数据长度与行数不一致")
+    if nulls:
+        values = [None if null else value for value, null in zip(values, nulls)]
+    return values
+
+
+def read_sections(reader):
+    """逐块读取归档中的表段
+
+    Yields:
+        (表名, 列名列表, 行块): 行块为按列的值列表；每个表段最后产出一次行块为None的结束标记
+    """
+    while True:
+        table_name = reader.read_name()
+        if not table_name:
+            return
+        column_count = reader.read_struct(_U16)
+        columns = [(reader.read_name(), reader.read_struct(_U8)) for _ in range(column_count)]
+        names = [name for name, _ in columns]
+        while True:
+            count = reader.read_struct(_U32)
+            if not count:
+                break
+            yield table_name, names, [decode_column(reader, kind, count) for _, kind in columns]
+        yield table_name, names, None
+
+
+# ---------------------------------------------------------------- 导入
+
+def import_game_save(stream, user_id, game_save=None):
+    """从二进制归档导入存档，在一个事务中提交
+
+    Args:
+        stream: 提供read(size)的字节流，例如 request.stream
+        user_id: 导入存档的所属用户
+        game_save: 可选，要覆盖的已有存档（其原有数据全部被替换）；不提供时创建新存档
+
+    Returns:
+        (GameSave, dict): 导入的存档和各表导入的行数
+
+    Raises:
+        ArchiveError: 归档数据无效
+    """
+    models = {model.__table__.name: model for model in ARCHIVE_TABLES}
+    reader = ArchiveReader(stream)
+    counts = {}
+    ship_ids = {}
+    old_ship_ids = []
+
+    try:
+        sections = read_sections(reader)
+        game_save = _import_game_save_row(sections, user_id, game_save)
+        game_id = game_save.game_id
+
+        for table_name, names, chunk in sections:
+            model = models.get(table_name)
+            if model is None or model is GameSave:
+                # 未知的表（更高版本导出的）直接跳过
+                continue
+            if chunk is None:
+                if model is PlayerShip:
+                    ship_ids = _map_ship_ids(game_id, old_ship_ids)
+                continue
+
+            table = model.__table__
+            _check_required(table_name, _required_columns(model), names, chunk)
+            primary_key = table.primary_key.columns.keys()[0]
+            known = [(index, name) for index, name in enumerate(names)
+                     if name in table.c and name != primary_key]
+            rows = []
+            for values in zip(*chunk):
+                row = {name: values[index] for index, name in known}
+                row['game_id'] = game_id
+                if 'user_id' in table.c:
+                    row['user_id'] = user_id
+                rows.append(row)
+
+            if model is PlayerShip:
+                old_ship_ids.extend(chunk[names.index('ship_id')])
+            elif 'ship_id' in table.c:
+                try:
+                    for row in rows:
+                        row['ship_id'] = ship_ids[row['ship_id']]
+                except KeyError:
+                    raise ArchiveError(f"{table_name} 引用了归档中不存在的飞船")
+
+            db.session.execute(db.insert(table), rows)
+            counts[table_name] = counts.get(table_name, 0) + len(rows)
+
+        db.session.commit()
+    except (zlib.error, UnicodeDecodeError):
+        db.session.rollback()
+        raise ArchiveError("归档数据已损坏")
+    except (IntegrityError, DataError):
+        # 例如重复的 (game_id, faction_id) 或超出列范围的值
+        db.session.rollback()
+        raise ArchiveError("归档包含重复或无效的数据")
+    except Exception:
+        db.session.rollback()
+        raise
+
+    forget_save_discoveries(game_id)
+    invalidate_market_version(game_id)
+    invalidate_game_ship_stats(game_id)
+    return game_save, counts
+
+
+def _import_game_save_row(sections, user_id, game_save):
+    """读取归档中的存档段，创建新存档或清空并覆盖已有存档"""
+    section = next(sections, None)
+    if section is None or section[0] != GameSave.__tablename__ or section[2] is None:
+        raise ArchiveError("归档缺少存档数据")
+    _, names, chunk = section
+    _check_required(GameSave.__tablename__, _required_columns(GameSave), names, chunk)
+    if next(sections)[2] is not None:
+        raise ArchiveError("归档包含多个存档")
+
+    # 存档ID和所属用户由导入目标决定，即使归档中带有这些列也不使用
+    values = {name: column[0] for name, column in zip(names, chunk)
+              if name in GameSave.__table__.c and name not in EXCLUDED_COLUMNS}
+    if game_save is None:
+        game_save = GameSave(user_id=user_id)
+        db.session.add(game_save)
+    else:
+        _clear_game_save(game_save.game_id)
+    for name, value in values.items():
+        setattr(game_save, name, value)
+    game_save.user_id = user_id
+    db.session.flush()
+    return game_save
+
+
+def _clear_game_save(game_id):
+    """删除存档的全部子表数据（先删装备和货物，再删飞船）"""
+    for model in reversed(ARCHIVE_TABLES):
+        if model is not GameSave:
+            db.session.execute(db.delete(model).where(model.game_id == game_id))
+
+
+def _map_ship_ids(game_id, old_ship_ids):
+    """归档中的飞船ID -> 新飞船ID
+
+    飞船按归档中的顺序（原ship_id升序）插入，新ID按相同顺序分配
+    """
+    new_ship_ids = db.session.execute(
+        db.select(PlayerShip.ship_id).where(PlayerShip.game_id == game_id).order_by(PlayerShip.ship_id)
+    ).scalars().all()
+    if len(new_ship_ids) != len(old_ship_ids):
+        raise ArchiveError("飞船数据不完整")
+    return dict(zip(old_ship_ids, new_ship_ids))
@@ -0,0 +1,256 @@
+"""
+飞船有效属性
+飞船的有效属性 = 型号（ship_models）的基础值 + 已安装装备（ship_equipment → equipment_items）的效果值，
+装备效果按装备状态（equipment_condition，0-100）折算。战斗、贸易和航行都需要这些属性，
+每次计算都要连接三张表，因此每艘飞船只计算一次，保存为紧凑的 ShipStats 记录，
+按 (ship_id, 装备版本) 缓存在进程级LRU缓存中。
+
+通过ORM安装、拆卸装备或修改装备状态、更换飞船型号时自动更新飞船的装备版本，旧条目不再命中；
+直接用Core语句修改这些数据的代码需要调用 invalidate_ship_stats（单艘飞船）
+或 invalidate_game_ship_stats（整个存档，例如导入或删除存档）。
+多进程部署时其他进程的修改在 SHIP_STATS_CACHE_TTL 秒后生效
+"""
+import threading
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.ship import EquipmentItem, EquipmentType, PlayerShip, ShipEquipment, ShipModel
+from app.utils.lru_cache import LRUCache
+from app.utils.version_table import VersionTable
+
+# 没有装备状态时按全新装备计算
+FULL_CONDITION = 100
+
+
+class ShipStats:
+    """单艘飞船的有效属性（只读）
+
+    weapons 为按槽位顺序排列的 (单发伤害, 能量消耗, 冷却秒数) 元组；
+    shield_capacity、engine、scanner 为对应类别装备折算后的效果值之和，
+    cargo_capacity 为型号货舱容量加上货舱扩展装备的效果值
+    """
+
+    __slots__ = ('ship_id', 'game_id', 'model_id', 'version', 'game_version',
+                 'armor', 'speed', 'maneuverability', 'jump_range', 'cargo_capacity',
+                 'weapons', 'shield_capacity', 'engine', 'scanner')
+
+    def __init__(self, ship_id, game_id, model_id, version, game_version, armor=0, speed=0, maneuverability=0,
+                 jump_range=0, cargo_capacity=0, weapons=(), shield_capacity=0.0, engine=0.0, scanner=0.0):
+        self.ship_id = ship_id
+        self.game_id = game_id
+        self.model_id = model_id
+        self.version = version
+        self.game_version = game_version
+        self.armor = armor
+        self.speed = speed
+        self.maneuverability = maneuverability
+        self.jump_range = jump_range
+        self.cargo_capacity = cargo_capacity
+        self.weapons = weapons
+        self.shield_capacity = shield_capacity
+        self.engine = engine
+        self.scanner = scanner
+
+    def to_dict(self):
+        """转换为字典，用于API响应"""
+        return {
+            'ship_id': self.ship_id,
+            'model_id': self.model_id,
+            'armor': self.armor,
+            'speed': self.speed,
+            'maneuverability': self.maneuverability,
+            'jump_range': self.jump_range,
+            'cargo_capacity': self.cargo_capacity,
+            'weapons': [
+                {'damage': damage, 'energy_usage': energy, 'cooldown_time': cooldown}
+                for damage, energy, cooldown in self.weapons
+            ],
+            'shield_capacity': self.shield_capacity,
+            'engine': self.engine,
+            'scanner': self.scanner
+        }
+
+    def __repr__(self):
+        return f'<ShipStats {self.ship_id} v{self.version}>'
+
+
+# 最多记录装备版本的飞船数和存档数，超出时淘汰最久未修改的条目，
+# 此时所有未记录版本号的飞船的缓存失效一次
+SHIP_VERSION_TABLE_SIZE = 65536
+
+# 装备版本：ship_id -> 版本号，game_id -> 版本号；版本号全局递增，删除后重新分配的ID也不会命中旧条目
+_ship_versions = VersionTable(maxsize=SHIP_VERSION_TABLE_SIZE)
+_game_versions = VersionTable(maxsize=SHIP_VERSION_TABLE_SIZE)
+
+# 进程级缓存：(ship_id, 装备版本) -> ShipStats
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(
+                    maxsize=current_app.config.get('SHIP_STATS_CACHE_SIZE', 8192),
+                    ttl=current_app.config.get('SHIP_STATS_CACHE_TTL', 300)
+                )
+    return _cache
+
+
+def get_ship_stats_version(ship_id):
+    """飞船的当前装备版本，本进程修改过飞船的装备或型号后会改变"""
+    return _ship_versions.get(ship_id)
+
+
+def invalidate_ship_stats(ship_id):
+    """飞船的装备、装备状态或型号被修改后使缓存的有效属性失效"""
+    _ship_versions.bump(ship_id)
+
+
+def invalidate_game_ship_stats(game_id):
+    """存档的飞船被整体替换或删除后（例如导入、删除存档）使其全部飞船的有效属性失效"""
+    _game_versions.bump(game_id)
+
+
+def _cached(cache, ship_id):
+    stats = cache.get((ship_id, _ship_versions.get(ship_id)))
+    if stats is not None and stats.game_version == _game_versions.get(stats.game_id):
+        return stats
+    return None
+
+
+def get_ship_stats(ship_id):
+    """单艘飞船的有效属性，缓存命中时不访问数据库
+
+    Returns:
+        ShipStats: 有效属性，飞船不存在时返回None
+    """
+    stats = _cached(_get_cache(), ship_id)
+    if stats is None:
+        stats = get_ship_stats_many([ship_id]).get(ship_id)
+    return stats
+
+
+def get_ship_stats_many(ship_ids):
+    """多艘飞船的有效属性，未命中的飞船用两条查询（飞船+型号、装备）一起计算
+
+    Returns:
+        dict: ship_id -> ShipStats，不存在的飞船不包含在内
+    """
+    cache = _get_cache()
+    result, missing = {}, set()
+    for ship_id in ship_ids:
+        if ship_id in result or ship_id in missing:
+            continue
+        stats = _cached(cache, ship_id)
+        if stats is None:
+            missing.add(ship_id)
+        else:
+            result[ship_id] = stats
+    if missing:
+        for stats in _compute_ship_stats(missing):
+            cache.put((stats.ship_id, stats.version), stats)
+            result[stats.ship_id] = stats
+    return result
+
+
+def _compute_ship_stats(ship_ids):
+    """从数据库计算飞船的有效属性"""
+    # 先取版本号再查询：查询期间被修改的飞船版本号已经改变，结果不会以新版本号缓存
+    versions = {ship_id: _ship_versions.get(ship_id) for ship_id in ship_ids}
+    ship_rows = db.session.execute(
+        db.select(PlayerShip.ship_id, PlayerShip.game_id, PlayerShip.model_id, ShipModel.armor, ShipModel.speed,
+                  ShipModel.maneuverability, ShipModel.jump_range, ShipModel.cargo_capacity)
+        .outerjoin(ShipModel, ShipModel.model_id == PlayerShip.model_id)
+        .where(PlayerShip.ship_id.in_(ship_ids))
+    ).all()
+    if not ship_rows:
+        return []
+    game_versions = {row.game_id: _game_versions.get(row.game_id) for row in ship_rows}
+
+    equipment_rows = db.session.execute(
+        db.select(ShipEquipment.ship_id, ShipEquipment.equipment_condition, EquipmentType.category,
+                  EquipmentItem.effect_value, EquipmentItem.energy_usage, EquipmentItem.cooldown_time)
+        .join(EquipmentItem, EquipmentItem.item_id == ShipEquipment.equipment_id)
+        .join(EquipmentType, EquipmentType.type_id == EquipmentItem.type_id)
+        .where(ShipEquipment.ship_id.in_([row.ship_id for row in ship_rows]))
+        .order_by(ShipEquipment.ship_id, ShipEquipment.slot_number, ShipEquipment.ship_equipment_id)
+    ).all()
+    weapons, bonuses = {}, {}
+    for row in equipment_rows:
+        condition = row.equipment_condition if row.equipment_condition is not None else FULL_CONDITION
+        effect = (row.effect_value or 0) * condition / FULL_CONDITION
+        if row.category == 'weapon':
+            weapons.setdefault(row.ship_id, []).append((effect, row.energy_usage or 0, row.cooldown_time or 0.0))
+        elif row.category is not None:
+            ship_bonuses = bonuses.setdefault(row.ship_id, {})
+            ship_bonuses[row.category] = ship_bonuses.get(row.category, 0.0) + effect
+
+    result = []
+    for row in ship_rows:
+        ship_bonuses = bonuses.get(row.ship_id, {})
+        result.append(ShipStats(
+            ship_id=row.ship_id,
+            game_id=row.game_id,
+            model_id=row.model_id,
+            version=versions[row.ship_id],
+            game_version=game_versions[row.game_id],
+            armor=row.armor or 0,
+            speed=row.speed or 0,
+            maneuverability=row.maneuverability or 0,
+            jump_range=row.jump_range or 0,
+            cargo_capacity=(row.cargo_capacity or 0) + int(ship_bonuses.get('cargo', 0.0)),
+            weapons=tuple(weapons.get(row.ship_id, ())),
+            shield_capacity=ship_bonuses.get('shield', 0.0),
+            engine=ship_bonuses.get('engine', 0.0),
+            scanner=ship_bonuses.get('scanner', 0.0)
+        ))
+    return result
+
+
+# ORM修改装备或型号时更新版本：flush时立即更新（同一会话随后的读取不命中旧条目），
+# 事务结束时再更新一次（其他会话在提交前按旧数据计算并缓存的条目也随之失效）
+def _touch(target, ship_id):
+    invalidate_ship_stats(ship_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('ship_stats_touched', set()).add(ship_id)
+
+
+@event.listens_for(ShipEquipment, 'after_insert')
+@event.listens_for(ShipEquipment, 'after_delete')
+def _equipment_changed(mapper, connection, target):
+    _touch(target, target.ship_id)
+
+
+@event.listens_for(ShipEquipment, 'after_update')
+def _equipment_updated(mapper, connection, target):
+    state = inspect(target)
+    for ship_id in state.attrs.ship_id.history.deleted:
+        if ship_id is not None:
+            _touch(target, ship_id)
+    if any(state.attrs[name].history.has_changes() for name in ('ship_id', 'equipment_id', 'equipment_condition')):
+        _touch(target, target.ship_id)
+
+
+@event.listens_for(PlayerShip, 'after_update')
+def _ship_updated(mapper, connection, target):
+    if inspect(target).attrs.model_id.history.has_changes():
+        _touch(target, target.ship_id)
+
+
+@event.listens_for(PlayerShip, 'after_delete')
+def _ship_deleted(mapper, connection, target):
+    _touch(target, target.ship_id)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _invalidate_touched(session, *args):
+    for ship_id in session.info.pop('ship_stats_touched', ()):
+        invalidate_ship_stats(ship_id)
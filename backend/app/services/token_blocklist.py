@@ -0,0 +1,220 @@
+"""
+JWT撤销列表
+退出登录撤销单个令牌（按jti），修改密码撤销用户在此之前签发的全部令牌（按用户的截止时间）。
+撤销状态保存在进程内：jti按令牌过期时间分桶保存在集合中，过期的桶整体丢弃，内存随有效令牌数有界；
+集合前面有一个布隆过滤器，绝大多数未撤销的令牌只需计算一次哈希。
+撤销记录同时写入revoked_tokens表，进程启动时加载，并每隔 TOKEN_BLOCKLIST_SYNC_INTERVAL 秒
+读取其他进程新增的记录；请求检查本身不访问数据库
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger('freelancer.auth')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_datetime(timestamp):
+    return datetime.utcfromtimestamp(timestamp)
+
+
+def _to_timestamp(value):
+    return int((value - _EPOCH).total_seconds())
+
+
+class TokenBlocklist:
+    """进程内的JWT撤销列表"""
+
+    def __init__(self, app, bucket_seconds=60, bloom_capacity=100000, bloom_error_rate=0.01,
+                 sync_interval=30, user_revocation_seconds=7 * 24 * 3600):
+        """
+        Args:
+            app: Flask应用，加载和同步时使用其应用上下文
+            bucket_seconds: 按令牌过期时间分桶的宽度（秒）
+            bloom_capacity, bloom_error_rate: 布隆过滤器的容量和误判率
+            sync_interval: 从数据库读取新撤销记录的间隔（秒）
+            user_revocation_seconds: 按用户撤销的保留秒数，不短于令牌的最长有效期
+        """
+        self._app = app
+        self.bucket_seconds = bucket_seconds
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.sync_interval = sync_interval
+        self.user_revocation_seconds = user_revocation_seconds
+
+        self._buckets = {}          # 过期时间桶 -> jti集合
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        self._user_cutoffs = {}     # user_id -> (截止时间戳, 记录过期时间戳)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self._last_revocation_id = 0
+        self._next_sync = 0.0
+
+    def is_revoked(self, payload):
+        """令牌是否已被撤销（token_in_blocklist_loader使用）"""
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+
+        jti = payload.get('jti')
+        if jti is not None and jti in self._bloom:
+            bucket = self._buckets.get(payload.get('exp', 0) // self.bucket_seconds)
+            if bucket is not None and jti in bucket:
+                return True
+
+        if self._user_cutoffs:
+            try:
+                cutoff = self._user_cutoffs.get(int(payload.get('sub')))
+            except (TypeError, ValueError):
+                cutoff = None
+            if cutoff is not None and payload.get('iat', 0) < cutoff[0]:
+                return True
+        return False
+
+    def _add_token(self, jti, expires_at):
+        with self._lock:
+            self._buckets.setdefault(expires_at // self.bucket_seconds, set()).add(jti)
+            self._bloom.add(jti)
+
+    def _add_user_cutoff(self, user_id, cutoff, expires_at):
+        with self._lock:
+            current = self._user_cutoffs.get(user_id)
+            if current is None or cutoff > current[0]:
+                self._user_cutoffs[user_id] = (cutoff, expires_at)
+
+    def revoke_token(self, payload):
+        """撤销单个令牌（例如退出登录），撤销记录由调用方提交
+
+        Args:
+            payload: 已验证的令牌声明，需要包含jti、sub和exp
+        """
+        jti, expires_at = payload['jti'], int(payload['exp'])
+        self._add_token(jti, expires_at)
+        db.session.add(RevokedToken(
+            jti=jti,
+            user_id=int(payload['sub']),
+            expires_at=_to_datetime(expires_at)
+        ))
+
+    def revoke_user_tokens(self, user_id):
+        """撤销用户到当前为止签发的全部令牌（例如修改密码），撤销记录由调用方提交
+
+        令牌的签发时间精确到秒，同一秒内在撤销之前签发的令牌不受影响
+        """
+        now = datetime.utcnow().replace(microsecond=0)
+        cutoff = _to_timestamp(now)
+        expires_at = cutoff + self.user_revocation_seconds
+        self._add_user_cutoff(int(user_id), cutoff, expires_at)
+        db.session.add(RevokedToken(
+            user_id=int(user_id),
+            revoked_at=now,
+            expires_at=_to_datetime(expires_at)
+        ))
+
+    def sync(self):
+        """加载数据库中新增的撤销记录，并丢弃已过期的桶
+
+        首次调用时等待加载完成；之后如果其他线程正在同步则直接返回
+        """
+        if not self._sync_lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if time.monotonic() < self._next_sync:
+                return
+            self._next_sync = time.monotonic() + self.sync_interval
+            self._load_new_records()
+            self._prune()
+        finally:
+            self._sync_lock.release()
+
+    def _load_new_records(self):
+        now = datetime.utcnow()
+        # 使用独立的应用上下文（独立的数据库会话），不影响调用方所在请求的事务
+        with self._app.app_context():
+            try:
+                if not self._loaded:
+                    # 启动时顺便删除已过期的记录
+                    db.session.execute(db.delete(RevokedToken.__table__)
+                                       .where(RevokedToken.__table__.c.expires_at <= now))
+                    db.session.commit()
+                table = RevokedToken.__table__
+                rows = db.session.execute(
+                    db.select(table.c.revocation_id, table.c.jti, table.c.user_id,
+                              table.c.revoked_at, table.c.expires_at)
+                    .where(table.c.revocation_id > self._last_revocation_id, table.c.expires_at > now)
+                    .order_by(table.c.revocation_id)
+                ).all()
+            except Exception:
+                db.session.rollback()
+                logger.exception('加载令牌撤销记录失败，%s 秒后重试', self.sync_interval)
+                return
+            finally:
+                db.session.remove()
+
+        for row in rows:
+            if row.jti is not None:
+                self._add_token(row.jti, _to_timestamp(row.expires_at))
+            else:
+                self._add_user_cutoff(row.user_id, _to_timestamp(row.revoked_at), _to_timestamp(row.expires_at))
+        if rows:
+            self._last_revocation_id = rows[-1].revocation_id
+        if not self._loaded:
+            logger.info('加载 %d 条令牌撤销记录', len(rows))
+        self._loaded = True
+
+    def _prune(self):
+        """丢弃全部令牌都已过期的桶和已过期的用户截止时间；有桶被丢弃时重建布隆过滤器"""
+        now = int(time.time())
+        with self._lock:
+            expired = [key for key in self._buckets if (key + 1) * self.bucket_seconds <= now]
+            for key in expired:
+                del self._buckets[key]
+            if expired:
+                bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+                for bucket in self._buckets.values():
+                    for jti in bucket:
+                        bloom.add(jti)
+                self._bloom = bloom
+            for user_id in [user_id for user_id, (_, expires_at) in self._user_cutoffs.items()
+                            if expires_at <= now]:
+                del self._user_cutoffs[user_id]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values()) + len(self._user_cutoffs)
+
+
+def init_token_blocklist(app):
+    """创建应用的令牌撤销列表（首次检查令牌时从数据库加载）
+
+    配置项:
+        TOKEN_BLOCKLIST_BUCKET_SECONDS: 按令牌过期时间分桶的宽度（秒）
+        TOKEN_BLOCKLIST_BLOOM_CAPACITY, TOKEN_BLOCKLIST_BLOOM_ERROR_RATE: 布隆过滤器参数
+        TOKEN_BLOCKLIST_SYNC_INTERVAL: 读取其他进程撤销记录的间隔（秒）
+        JWT_ACCESS_TOKEN_EXPIRES, JWT_REFRESH_TOKEN_EXPIRES: 按用户撤销的保留时间取两者较大值
+    """
+    lifetimes = [app.config.get(name) for name in ('JWT_ACCESS_TOKEN_EXPIRES', 'JWT_REFRESH_TOKEN_EXPIRES')]
+    blocklist = TokenBlocklist(
+        app,
+        bucket_seconds=app.config.get('TOKEN_BLOCKLIST_BUCKET_SECONDS', 60),
+        bloom_capacity=app.config.get('TOKEN_BLOCKLIST_BLOOM_CAPACITY', 100000),
+        bloom_error_rate=app.config.get('TOKEN_BLOCKLIST_BLOOM_ERROR_RATE', 0.01),
+        sync_interval=app.config.get('TOKEN_BLOCKLIST_SYNC_INTERVAL', 30),
+        user_revocation_seconds=int(max(
+            lifetime.total_seconds() for lifetime in lifetimes if lifetime
+        )) if any(lifetimes) else 7 * 24 * 3600
+    )
+    app.extensions['token_blocklist'] = blocklist
+    return blocklist
+
+
+def get_token_blocklist():
+    """当前应用的令牌撤销列表"""
+    return current_app.extensions['token_blocklist']
@@ -0,0 +1,267 @@
+"""
+贸易路线查找服务
+为存档计算"每跳利润"最高的往返贸易路线：A站买入运到B站卖出，再从B站带货回A站。
+
+1. 从起点星系做有界搜索（按跳数、通行费最少），得到候选空间站
+2. 用向量化的利润矩阵一次算出任意两站之间单程的最优商品和利润（按货舱容量和库存截断）
+3. 候选站之间的跳数和通行费同样通过有界搜索得到，组合成往返利润后取前K条
+
+结果按存档缓存，缓存键包含航线图版本和存档市场版本，价格写回后自动失效
+"""
+import heapq
+import math
+import threading
+
+import numpy as np
+from flask import current_app
+
+from app import db
+from app.models.ship import PlayerShip
+from app.services.market_engine import evaluate_market, get_market_version
+from app.services.route_planner import get_route_planner
+from app.services.ship_stats import get_ship_stats
+from app.services.universe_snapshot import get_universe_snapshot
+from app.utils.lru_cache import LRUCache
+
+# 候选空间站与起点之间的默认最大跳数
+DEFAULT_MAX_JUMPS = 6
+
+# 参与配对的空间站上限，超出时保留离起点最近的
+MAX_CANDIDATE_STATIONS = 256
+
+# 计算利润矩阵时每块的行数，限制 块行数 × 候选站数 × 商品数 的中间数组大小
+PROFIT_CHUNK_ROWS = 32
+
+
+def bounded_hops(planner, source, max_jumps):
+    """从星系下标source出发的有界搜索
+
+    以 (跳数, 通行费) 字典序为代价，不展开超过max_jumps跳的星系
+
+    Returns:
+        dict: 星系下标 -> (跳数, 通行费)
+    """
+    offsets, targets, tolls = planner.offsets, planner.targets, planner.tolls
+    best = {source: (0, 0.0)}
+    heap = [(0, 0.0, source)]
+
+    while heap:
+        jumps, toll, u = heapq.heappop(heap)
+        if best[u] < (jumps, toll) or jumps >= max_jumps:
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            candidate = (jumps + 1, toll + tolls[e])
+            current = best.get(v)
+            if current is None or candidate < current:
+                best[v] = candidate
+                heapq.heappush(heap, (candidate[0], candidate[1], v))
+
+    return best
+
+
+def best_trade_matrix(buy, sell, quantity, present, cargo_capacity):
+    """计算任意两站之间单程贸易的最优商品和利润
+
+    Args:
+        buy, sell, quantity, present: 候选空间站 × 商品 的矩阵
+        cargo_capacity: 货舱容量
+
+    Returns:
+        (profit, item_index): profit[a, b] 为从a买入运到b卖出的最大利润（无利可图时<=0），
+        item_index[a, b] 为对应商品的列号
+    """
+    size = buy.shape[0]
+    load = np.minimum(np.floor(np.maximum(quantity, 0)), cargo_capacity)
+    tradeable = present & (load >= 1)
+    buy_cost = np.where(tradeable, buy, np.inf)
+    sell_value = np.where(present, sell, -np.inf)
+    load = np.where(tradeable, load, 1.0)
+
+    profit = np.empty((size, size))
+    item_index = np.empty((size, size), dtype=np.int64)
+    for start in range(0, size, PROFIT_CHUNK_ROWS):
+        stop = min(start + PROFIT_CHUNK_ROWS, size)
+        # (块行数, 候选站数, 商品数)
+        chunk = (sell_value[None, :, :] - buy_cost[start:stop, None, :]) * load[start:stop, None, :]
+        item_index[start:stop] = np.argmax(chunk, axis=2)
+        profit[start:stop] = np.take_along_axis(chunk, item_index[start:stop, :, None], axis=2)[:, :, 0]
+
+    np.fill_diagonal(profit, -np.inf)
+    return profit, item_index
+
+
+def find_trade_routes(game_id, start_system_id, cargo_capacity, limit=5, max_jumps=DEFAULT_MAX_JUMPS):
+    """查找存档中每跳利润最高的往返贸易路线
+
+    Args:
+        game_id: 存档ID
+        start_system_id: 起点星系ID
+        cargo_capacity: 货舱容量
+        limit: 返回的路线数量
+        max_jumps: 候选空间站距起点的最大跳数
+
+    Returns:
+        list: 按每跳利润降序排列的路线字典
+
+    Raises:
+        ValueError: 起点星系不存在
+    """
+    planner = get_route_planner()
+    cache_key = None
+    if planner.version:
+        cache_key = (game_id, start_system_id, cargo_capacity, limit, max_jumps,
+                     planner.version, get_market_version(game_id))
+        cached = _get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    routes = _find_trade_routes(planner, game_id, start_system_id, cargo_capacity, limit, max_jumps)
+    if cache_key is not None:
+        _get_cache().put(cache_key, routes)
+    return routes
+
+
+def _find_trade_routes(planner, game_id, start_system_id, cargo_capacity, limit, max_jumps):
+    start = planner.index.get(start_system_id)
+    if start is None:
+        raise ValueError("星系不存在")
+
+    # 1. 起点附近可达的星系和空间站
+    reachable = bounded_hops(planner, start, max_jumps)
+    stations = get_universe_snapshot().stations
+    candidates = []
+    for station_id, station in stations.items():
+        system_index = planner.index.get(station['system_id'])
+        if system_index in reachable:
+            candidates.append((reachable[system_index][0], station_id, system_index))
+    candidates.sort()
+    candidates = candidates[:MAX_CANDIDATE_STATIONS]
+    if len(candidates) < 2:
+        return []
+
+    state = evaluate_market(game_id, station_ids=[station_id for _, station_id, _ in candidates])
+    if state is None:
+        return []
+    rows = {station_id: state.station_index(station_id) for _, station_id, _ in candidates}
+    candidates = [candidate for candidate in candidates if rows[candidate[1]] is not None]
+    if len(candidates) < 2:
+        return []
+
+    row_index = np.array([rows[station_id] for _, station_id, _ in candidates])
+    approach = np.array([jumps for jumps, _, _ in candidates])
+    station_ids = [station_id for _, station_id, _ in candidates]
+    system_indexes = [system_index for _, _, system_index in candidates]
+
+    # 2. 候选站之间单程贸易的利润矩阵
+    profit, item_index = best_trade_matrix(
+        state.buy[row_index], state.sell[row_index], state.quantity[row_index],
+        state.present[row_index], cargo_capacity
+    )
+
+    # 3. 候选站之间的跳数和通行费（同一星系内的站点之间为0跳）
+    size = len(candidates)
+    jumps = np.full((size, size), np.inf)
+    tolls = np.zeros((size, size))
+    hops_by_system = {}
+    for system_index in set(system_indexes):
+        hops_by_system[system_index] = bounded_hops(planner, system_index, 2 * max_jumps)
+    for a, system_a in enumerate(system_indexes):
+        hops = hops_by_system[system_a]
+        for b, system_b in enumerate(system_indexes):
+            hop = hops.get(system_b)
+            if hop is not None:
+                jumps[a, b], tolls[a, b] = hop
+
+    # 往返利润 = 两个方向各自的最优单程利润（无利可图的方向空载）- 往返通行费
+    leg_profit = np.maximum(profit, 0.0)
+    loop_profit = leg_profit + leg_profit.T - tolls - tolls.T
+    loop_jumps = jumps + jumps.T
+    per_jump = loop_profit / np.maximum(loop_jumps, 1.0)
+
+    upper = np.triu(np.isfinite(loop_jumps) & (loop_profit > 0), k=1)
+    pairs = np.flatnonzero(upper)
+    if not len(pairs):
+        return []
+    scores = per_jump.ravel()[pairs]
+    if len(pairs) > limit:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        pairs, scores = pairs[top], scores[top]
+    pairs = pairs[np.argsort(-scores, kind='stable')]
+
+    item_ids = state.item_ids
+    routes = []
+    for pair in pairs.tolist():
+        a, b = divmod(pair, size)
+        # 从离起点较近的一站开始
+        if approach[b] < approach[a]:
+            a, b = b, a
+        routes.append({
+            'buy_station_id': station_ids[a],
+            'sell_station_id': station_ids[b],
+            'approach_jumps': int(approach[a]),
+            'outbound': _describe_leg(state, row_index[a], row_index[b], item_ids, item_index[a, b],
+                                      profit[a, b], cargo_capacity),
+            'return': _describe_leg(state, row_index[b], row_index[a], item_ids, item_index[b, a],
+                                    profit[b, a], cargo_capacity),
+            'loop_jumps': int(jumps[a, b] + jumps[b, a]),
+            'loop_tolls': round(float(tolls[a, b] + tolls[b, a]), 2),
+            'loop_profit': round(float(loop_profit[a, b]), 2),
+            'profit_per_jump': round(float(per_jump[a, b]), 2)
+        })
+    return routes
+
+
+def _describe_leg(state, source_row, target_row, item_ids, column, profit, cargo_capacity):
+    """单程贸易的描述，无利可图时返回None（空载）"""
+    if not profit > 0 or math.isinf(profit):
+        return None
+    quantity = int(min(math.floor(max(state.quantity[source_row, column], 0)), cargo_capacity))
+    return {
+        'item_id': int(item_ids[column]),
+        'quantity': quantity,
+        'buy_price': round(float(state.buy[source_row, column]), 2),
+        'sell_price': round(float(state.sell[target_row, column]), 2),
+        'profit': round(float(profit), 2)
+    }
+
+
+def get_ship_cargo_capacity(game_id, ship_id=None):
+    """获取存档中飞船的货舱容量（型号容量加上货舱扩展装备）
+
+    Args:
+        game_id: 存档ID
+        ship_id: 可选，飞船ID；不提供时使用存档当前使用中的飞船
+
+    Returns:
+        int: 货舱容量，飞船不存在时返回None
+    """
+    if ship_id is None:
+        ship_id = db.session.execute(
+            db.select(PlayerShip.ship_id)
+            .where(PlayerShip.game_id == game_id, PlayerShip.is_active.is_(True))
+            .limit(1)
+        ).scalar()
+        if ship_id is None:
+            return None
+    stats = get_ship_stats(ship_id)
+    if stats is None or stats.game_id != game_id:
+        return None
+    return stats.cargo_capacity
+
+
+# 进程级缓存：(存档, 查询参数, 航线图版本, 市场版本) -> 路线列表
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(
+                    maxsize=current_app.config.get('TRADE_ROUTE_CACHE_SIZE', 256),
+                    ttl=current_app.config.get('TRADE_ROUTE_CACHE_TTL', 60)
+                )
+    return _cache
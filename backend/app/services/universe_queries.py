@@ -0,0 +1,221 @@
+"""
+宇宙数据查询层
+每个函数使用固定数量的SQL语句加载数据，查询次数不随数据量增长：
+行星数量通过聚合子查询获得，关联对象通过预加载/连接加载一次取回。
+列表加载使用列投影直接从Row元组生成字典（字段与模型to_dict一致），不创建ORM实例
+"""
+from app import db
+from app.models.universe import StarSystem, Planet, SpaceStation, JumpGate, Faction, FactionRelationship
+from app.utils.projection import Projection
+
+# 无论是否被发现都出现在星系列表中的区域类型
+ALWAYS_LISTED_SYSTEM_TYPES = ('core', 'mid')
+
+
+def _planet_count_subquery():
+    """统计每个星系行星数量的关联聚合子查询"""
+    return (
+        db.select(db.func.count(Planet.planet_id))
+        .where(Planet.system_id == StarSystem.system_id)
+        .correlate(StarSystem)
+        .scalar_subquery()
+    )
+
+
+SYSTEM_PROJECTION = Projection({
+    'system_id': StarSystem.system_id,
+    'name': StarSystem.name,
+    'description': StarSystem.description,
+    'difficulty_level': StarSystem.difficulty_level,
+    'danger_level': StarSystem.danger_level,
+    'type': StarSystem.type,
+    'controlling_faction_id': StarSystem.controlling_faction_id,
+    'x_coord': StarSystem.x_coord,
+    'y_coord': StarSystem.y_coord,
+    'z_coord': StarSystem.z_coord,
+    'is_discovered': StarSystem.is_discovered,
+    'planet_count': _planet_count_subquery()
+})
+
+PLANET_PROJECTION = Projection({
+    'planet_id': Planet.planet_id,
+    'system_id': Planet.system_id,
+    'name': Planet.name,
+    'description': Planet.description,
+    'has_station': Planet.has_station,
+    'resource_richness': Planet.resource_richness,
+    'controlling_faction_id': Planet.controlling_faction_id,
+    'orbital_position': Planet.orbital_position
+})
+
+STATION_PROJECTION = Projection({
+    'station_id': SpaceStation.station_id,
+    'system_id': SpaceStation.system_id,
+    'name': SpaceStation.name,
+    'description': SpaceStation.description,
+    'planet_id': SpaceStation.planet_id,
+    'controlling_faction_id': SpaceStation.controlling_faction_id,
+    'has_shipyard': SpaceStation.has_shipyard,
+    'has_bar': SpaceStation.has_bar,
+    'has_trade_center': SpaceStation.has_shop,
+    'has_mission_board': SpaceStation.has_mission_board,
+    'has_equipment_dealer': SpaceStation.has_inn,
+    'price_modifier': SpaceStation.market_tax_rate
+})
+
+JUMP_GATE_PROJECTION = Projection({
+    'gate_id': JumpGate.gate_id,
+    'name': JumpGate.name,
+    'source_system_id': JumpGate.source_system_id,
+    'target_system_id': JumpGate.destination_system_id,
+    'difficulty_level': JumpGate.stability,
+    'toll_fee': JumpGate.toll_fee,
+    'is_hidden': JumpGate.one_way
+})
+
+FACTION_PROJECTION = Projection({
+    'faction_id': Faction.faction_id,
+    'name': Faction.name,
+    'description': Faction.description,
+    'government_type': Faction.government_type,
+    'primary_industry': Faction.primary_industry,
+    'home_system_id': Faction.home_system_id,
+    'is_player_accessible': Faction.is_player_accessible,
+    'icon_url': Faction.icon_url
+})
+
+FACTION_RELATIONSHIP_PROJECTION = Projection({
+    'faction_id1': FactionRelationship.faction_id1,
+    'faction_id2': FactionRelationship.faction_id2,
+    'relationship_level': FactionRelationship.relationship_level,
+    'at_war': FactionRelationship.at_war,
+    'trade_agreement': FactionRelationship.trade_agreement
+})
+
+
+def load_systems(system_ids=None, system_type=None, after=None, limit=None):
+    """加载星系记录（1条SQL），所有过滤条件都作为SQL谓词执行
+
+    Args:
+        system_ids: 可选，只加载这些ID的星系
+        system_type: 可选，只加载该区域类型的星系（使用 type, is_discovered 组合索引）
+        after: 可选，键集分页游标，只加载system_id大于该值的星系
+        limit: 可选，最多返回的记录数
+
+    Returns:
+        list: 按system_id排序的星系字典
+    """
+    statement = SYSTEM_PROJECTION.select()
+
+    if system_ids is not None:
+        if not system_ids:
+            return []
+        statement = statement.where(StarSystem.system_id.in_(system_ids))
+    if system_type:
+        statement = statement.where(StarSystem.type == system_type)
+    if after is not None:
+        statement = statement.where(StarSystem.system_id > after)
+
+    statement = statement.order_by(StarSystem.system_id)
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return SYSTEM_PROJECTION.fetch(statement)
+
+
+def load_system_flags():
+    """只加载星系ID、区域类型和全局发现状态（1条SQL，走 type, is_discovered 索引）
+
+    Returns:
+        list: 星系字典，只包含 system_id/type/is_discovered 三个字段
+    """
+    rows = db.session.query(StarSystem.system_id, StarSystem.type, StarSystem.is_discovered).all()
+    return [
+        {'system_id': system_id, 'type': system_type, 'is_discovered': is_discovered}
+        for system_id, system_type, is_discovered in rows
+    ]
+
+
+def load_planets():
+    """加载所有行星记录（1条SQL）"""
+    return PLANET_PROJECTION.fetch(PLANET_PROJECTION.select().order_by(Planet.planet_id))
+
+
+def load_stations():
+    """加载所有空间站记录（1条SQL）"""
+    return STATION_PROJECTION.fetch(STATION_PROJECTION.select().order_by(SpaceStation.station_id))
+
+
+def load_jump_gates():
+    """加载所有跳跃点记录（1条SQL）"""
+    return JUMP_GATE_PROJECTION.fetch(JUMP_GATE_PROJECTION.select().order_by(JumpGate.gate_id))
+
+
+def load_factions():
+    """加载所有势力记录（1条SQL）"""
+    return FACTION_PROJECTION.fetch(FACTION_PROJECTION.select().order_by(Faction.faction_id))
+
+
+def load_faction_relationships():
+    """加载所有势力关系记录（1条SQL）"""
+    return FACTION_RELATIONSHIP_PROJECTION.fetch(
+        FACTION_RELATIONSHIP_PROJECTION.select().order_by(FactionRelationship.relationship_id)
+    )
+
+
+def load_system_details(system_id):
+    """加载单个星系及其行星、空间站、控制势力、出发跳跃点和目标星系（固定5条SQL）
+
+    Returns:
+        dict: 包含 systems/planets/stations/gates/factions 五个记录列表；星系不存在时返回None
+    """
+    system = (
+        StarSystem.query
+        .options(
+            db.joinedload(StarSystem.controlling_faction),
+            db.selectinload(StarSystem.planets),
+            db.selectinload(StarSystem.stations)
+        )
+        .filter(StarSystem.system_id == system_id)
+        .first()
+    )
+    if not system:
+        return None
+
+    gates = JumpGate.query.filter(JumpGate.source_system_id == system_id).order_by(JumpGate.gate_id).all()
+    target_ids = {gate.destination_system_id for gate in gates} - {system_id}
+
+    return {
+        'systems': [system.to_dict(planet_count=len(system.planets))] + load_systems(target_ids),
+        'planets': [planet.to_dict() for planet in system.planets],
+        'stations': [station.to_dict() for station in system.stations],
+        'gates': [gate.to_dict() for gate in gates],
+        'factions': [system.controlling_faction.to_dict()] if system.controlling_faction else []
+    }
+
+
+def load_station_details(station_id):
+    """加载单个空间站及其所属星系、行星和控制势力（固定2条SQL）
+
+    Returns:
+        dict: 包含 systems/planets/stations/gates/factions 五个记录列表；空间站不存在时返回None
+    """
+    station = (
+        SpaceStation.query
+        .options(
+            db.joinedload(SpaceStation.planet),
+            db.joinedload(SpaceStation.controlling_faction)
+        )
+        .filter(SpaceStation.station_id == station_id)
+        .first()
+    )
+    if not station:
+        return None
+
+    return {
+        'systems': load_systems([station.system_id]),
+        'planets': [station.planet.to_dict()] if station.planet else [],
+        'stations': [station.to_dict()],
+        'gates': [],
+        'factions': [station.controlling_faction.to_dict()] if station.controlling_faction else []
+    }
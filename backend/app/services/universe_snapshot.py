@@ -0,0 +1,287 @@
+"""
+宇宙数据快照服务
+星系、行星、空间站、跳跃点、势力和势力关系属于几乎不变的静态数据，
+这里在进程内一次性加载成只读快照，宇宙API直接从内存读取
+"""
+import threading
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from flask import current_app
+
+from app.services import universe_queries
+from app.utils.bitset import Bitset
+
+# 可见性位集合：
+# visible - 可以查看详情的星系（已发现或核心星系）
+# listed - 出现在星系列表中的星系（已发现、核心或中部星系）
+# discovered - 已发现的星系
+Visibility = namedtuple('Visibility', ['visible', 'listed', 'discovered'])
+
+
+class SystemFlags:
+    """星系区域类型和全局发现状态的位集合，用于可见性判断"""
+
+    __slots__ = ('version', 'core', 'listed_types', 'discovered', '_global_visibility')
+
+    def __init__(self, systems, version=0):
+        self.version = version
+        self.core = Bitset()
+        self.listed_types = Bitset()
+        self.discovered = Bitset()
+        for system in systems:
+            if system['type'] == 'core':
+                self.core.add(system['system_id'])
+            if system['type'] in universe_queries.ALWAYS_LISTED_SYSTEM_TYPES:
+                self.listed_types.add(system['system_id'])
+            if system['is_discovered']:
+                self.discovered.add(system['system_id'])
+        self._global_visibility = None
+
+    def visibility(self, discovered=None):
+        """计算可见性位集合
+
+        Args:
+            discovered: 存档已发现星系的位集合；为None时使用星系表中的全局发现标记
+        """
+        if discovered is None:
+            if self._global_visibility is None:
+                self._global_visibility = self.visibility(self.discovered)
+            return self._global_visibility
+        return Visibility(discovered | self.core, discovered | self.listed_types, discovered)
+
+
+class FactionMatrix:
+    """势力列表和稠密的势力关系矩阵
+
+    势力按ID排序，index 为 势力ID -> 行号。
+    relations[i, j] 为势力i与势力j的关系等级除以100（-1到1）：关系表中每对势力只记录一次，
+    矩阵按对称填充，对角线和没有记录的势力对为0。矩阵只读，由所有请求共享
+    """
+
+    __slots__ = ('factions', 'faction_ids', 'index', 'relations')
+
+    def __init__(self, factions, relationships):
+        self.factions = tuple(sorted(factions, key=lambda faction: faction['faction_id']))
+        self.faction_ids = np.array([faction['faction_id'] for faction in self.factions], dtype=np.int64)
+        self.index = {faction['faction_id']: i for i, faction in enumerate(self.factions)}
+
+        size = len(self.factions)
+        self.relations = np.zeros((size, size))
+        pairs = [
+            (self.index[relationship['faction_id1']], self.index[relationship['faction_id2']],
+             relationship['relationship_level'] or 0)
+            for relationship in relationships
+            if relationship['faction_id1'] in self.index and relationship['faction_id2'] in self.index
+            and relationship['faction_id1'] != relationship['faction_id2']
+        ]
+        if pairs:
+            rows, cols, levels = (np.array(values) for values in zip(*pairs))
+            levels = np.clip(levels / 100.0, -1.0, 1.0)
+            self.relations[rows, cols] = levels
+            self.relations[cols, rows] = levels
+        self.relations.setflags(write=False)
+
+    def relationship(self, faction_id1, faction_id2):
+        """两个势力之间的关系等级（-100到100），未知势力或没有记录时为0"""
+        i, j = self.index.get(faction_id1), self.index.get(faction_id2)
+        if i is None or j is None:
+            return 0
+        return int(round(self.relations[i, j] * 100))
+
+
+class UniverseSnapshot:
+    """只读的宇宙数据快照
+
+    所有记录都以 to_dict() 的结果保存，按ID建立索引：
+    - systems / planets / stations / factions: ID -> 记录
+    - faction_matrix: 按ID排序的势力记录和势力关系矩阵（FactionMatrix）
+    - planets_by_system / stations_by_system: 星系ID -> 记录元组
+    - gates_by_source: 源星系ID -> 跳跃点记录元组（邻接表）
+
+    快照中的字典由所有请求共享，调用方需要修改时必须先复制。
+    version 为0表示按请求临时加载、不会被缓存的快照
+    """
+
+    def __init__(self, systems, planets, stations, gates, factions, relationships, version):
+        self.version = version
+        self.systems = {system['system_id']: system for system in systems}
+        self.system_ids = tuple(sorted(self.systems))
+        self.flags = SystemFlags(systems, version)
+        self.system_ids_by_type = {
+            system_type: tuple(system['system_id'] for system in systems_of_type)
+            for system_type, systems_of_type in _group_by(
+                (self.systems[system_id] for system_id in self.system_ids), 'type'
+            ).items()
+        }
+        self.planets = {planet['planet_id']: planet for planet in planets}
+        self.stations = {station['station_id']: station for station in stations}
+        self.gates = tuple(gates)
+        self.factions = {faction['faction_id']: faction for faction in factions}
+        self.faction_matrix = FactionMatrix(factions, relationships)
+
+        self.planets_by_system = _group_by(planets, 'system_id')
+        self.stations_by_system = _group_by(stations, 'system_id')
+        self.gates_by_source = _group_by(gates, 'source_system_id')
+
+    def filter_systems(self, system_type=None, listed=None, after=None, limit=None):
+        """按条件筛选星系，参数含义与 find_systems 相同
+
+        按类型预先建立了有序ID索引，键集分页通过二分查找定位起点
+        """
+        system_ids = self.system_ids if not system_type else self.system_ids_by_type.get(system_type, ())
+        start = bisect_right(system_ids, after) if after is not None else 0
+
+        result = []
+        for i in range(start, len(system_ids)):
+            system_id = system_ids[i]
+            if listed is not None and system_id not in listed:
+                continue
+            result.append(self.systems[system_id])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    @classmethod
+    def load(cls, version):
+        """从数据库加载完整快照，每张表只查询一次"""
+        return cls(
+            universe_queries.load_systems(),
+            universe_queries.load_planets(),
+            universe_queries.load_stations(),
+            universe_queries.load_jump_gates(),
+            universe_queries.load_factions(),
+            universe_queries.load_faction_relationships(),
+            version
+        )
+
+    @classmethod
+    def from_records(cls, records, version=0):
+        """由查询层返回的局部记录构造快照，局部记录不包含势力关系时关系矩阵为0"""
+        return cls(
+            records['systems'],
+            records['planets'],
+            records['stations'],
+            records['gates'],
+            records['factions'],
+            records.get('faction_relationships', ()),
+            version
+        )
+
+
+def _group_by(records, key):
+    """按指定字段把记录分组为 键 -> 元组"""
+    groups = defaultdict(list)
+    for record in records:
+        groups[record[key]].append(record)
+    return {group_key: tuple(items) for group_key, items in groups.items()}
+
+
+# 进程级快照及其加载锁
+_snapshot = None
+_snapshot_version = 0
+_snapshot_lock = threading.Lock()
+
+
+def get_universe_snapshot(system_id=None, station_id=None):
+    """获取当前宇宙快照，首次访问或失效后自动从数据库加载
+
+    UNIVERSE_SNAPSHOT_ENABLED 为False时（例如调整种子数据期间）不使用进程级快照，
+    每次请求通过查询层以固定数量的SQL重新加载：指定了system_id或station_id时
+    只加载该星系/空间站相关的记录，否则加载完整数据
+
+    Args:
+        system_id: 可选，请求只涉及该星系
+        station_id: 可选，请求只涉及该空间站
+
+    Returns:
+        UniverseSnapshot: 宇宙快照；局部加载时目标不存在则快照中不包含该记录
+    """
+    if not current_app.config.get('UNIVERSE_SNAPSHOT_ENABLED', True):
+        if system_id is not None:
+            records = universe_queries.load_system_details(system_id)
+        elif station_id is not None:
+            records = universe_queries.load_station_details(station_id)
+        else:
+            return UniverseSnapshot.load(version=0)
+        if records is None:
+            return UniverseSnapshot([], [], [], [], [], [], version=0)
+        return UniverseSnapshot.from_records(records)
+
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = reload_universe_snapshot(only_if_missing=True)
+    return snapshot
+
+
+def get_system_flags():
+    """获取星系区域类型和全局发现状态位集合
+
+    启用进程级快照时直接复用快照中的位集合，否则通过一条窄查询加载
+    """
+    if not current_app.config.get('UNIVERSE_SNAPSHOT_ENABLED', True):
+        return SystemFlags(universe_queries.load_system_flags())
+    return get_universe_snapshot().flags
+
+
+def find_systems(system_type=None, listed=None, after=None, limit=None):
+    """筛选星系列表
+
+    启用进程级快照时在内存中筛选；否则类型和分页条件作为SQL谓词交给数据库执行，
+    可见性仍然通过位集合判断，按批次向后扫描直到凑满一页
+
+    Args:
+        system_type: 可选，只返回该区域类型的星系
+        listed: 可选，出现在列表中的星系位集合，为None时不做可见性过滤
+        after: 可选，键集分页游标，只返回system_id大于该值的星系
+        limit: 可选，最多返回的记录数
+    """
+    if current_app.config.get('UNIVERSE_SNAPSHOT_ENABLED', True):
+        return get_universe_snapshot().filter_systems(
+            system_type=system_type, listed=listed, after=after, limit=limit
+        )
+
+    if listed is None:
+        return universe_queries.load_systems(system_type=system_type, after=after, limit=limit)
+
+    batch_size = max(limit * 2, 100) if limit is not None else None
+    result = []
+    while True:
+        batch = universe_queries.load_systems(system_type=system_type, after=after, limit=batch_size)
+        for system in batch:
+            if system['system_id'] in listed:
+                result.append(system)
+                if limit is not None and len(result) >= limit:
+                    return result
+        if batch_size is None or len(batch) < batch_size:
+            return result
+        after = batch[-1]['system_id']
+
+
+def reload_universe_snapshot(only_if_missing=False):
+    """从数据库重新加载宇宙快照
+
+    Args:
+        only_if_missing: 为True时，如果其他线程已完成加载则直接复用
+
+    Returns:
+        UniverseSnapshot: 新的（或已存在的）快照
+    """
+    global _snapshot, _snapshot_version
+
+    with _snapshot_lock:
+        if only_if_missing and _snapshot is not None:
+            return _snapshot
+
+        _snapshot_version += 1
+        _snapshot = UniverseSnapshot.load(_snapshot_version)
+        return _snapshot
+
+
+def invalidate_universe_snapshot():
+    """使宇宙快照失效，种子数据变更后调用，下一次请求会重新加载"""
+    global _snapshot
+
+    with _snapshot_lock:
+        _snapshot = None
@@ -0,0 +1,50 @@
+"""
+紧凑位集合
+以bytearray按位保存非负整数ID，成员测试只需一次下标访问和一次位运算
+"""
+
+
+class Bitset:
+    """非负整数ID的位集合"""
+
+    __slots__ = ('_bits',)
+
+    def __init__(self, members=()):
+        self._bits = bytearray()
+        for member in members:
+            self.add(member)
+
+    @classmethod
+    def _from_bytes(cls, data):
+        bitset = cls()
+        bitset._bits = bytearray(data)
+        return bitset
+
+    def add(self, member):
+        """加入一个ID，必要时扩展底层数组
+
+        Raises:
+            ValueError: ID为负数
+        """
+        if member < 0:
+            raise ValueError(f"位集合只能保存非负整数: {member}")
+        index = member >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << (member & 7)
+
+    def __contains__(self, member):
+        index = member >> 3
+        return 0 <= index < len(self._bits) and bool(self._bits[index] & (1 << (member & 7)))
+
+    def __or__(self, other):
+        size = max(len(self._bits), len(other._bits))
+        merged = int.from_bytes(self._bits, 'little') | int.from_bytes(other._bits, 'little')
+        return Bitset._from_bytes(merged.to_bytes(size, 'little'))
+
+    def __len__(self):
+        return int.from_bytes(self._bits, 'little').bit_count()
+
+    def copy(self):
+        """复制一个独立的位集合"""
+        return Bitset._from_bytes(self._bits)
@@ -0,0 +1,43 @@
+"""
+布隆过滤器
+用于在精确集合前快速排除不存在的字符串键：不在过滤器中的键一定不在集合中，
+在过滤器中的键按设定的误判率可能不在集合中，需要再查精确集合
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """字符串键的布隆过滤器，不支持删除（需要删除时按剩余的键重建）"""
+
+    __slots__ = ('size', 'hashes', '_bits')
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        """
+        Args:
+            capacity: 预计的键数量，超过后误判率上升
+            error_rate: capacity个键时的目标误判率
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        """双重哈希：由一个128位摘要的两半生成hashes个位置"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
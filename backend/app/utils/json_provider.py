@@ -0,0 +1,56 @@
+"""
+快速JSON序列化
+安装了orjson时使用orjson编码响应，否则退回Flask默认的标准库实现
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson是可选依赖
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """基于orjson的JSON提供者
+
+    输出与默认实现保持一致：按sort_keys排序键，datetime等类型交给
+    DefaultJSONProvider.default 处理（HTTP日期格式），调试模式下缩进输出。
+    调用方传入额外的json.dumps参数（如cls）时退回标准库实现
+    """
+
+    @property
+    def available(self):
+        """是否正在使用orjson"""
+        return orjson is not None
+
+    def _options(self, pretty=False):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, pretty=False):
+        """把对象序列化为UTF-8编码的字节串"""
+        if orjson is None:
+            return super().dumps(obj).encode('utf-8')
+        return orjson.dumps(obj, default=self.default, option=self._options(pretty))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, pretty) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,92 @@
+"""
+日志工具
+应用日志统一写入 freelancer 日志器：请求线程只把日志记录放入队列（QueueHandler），
+由后台线程（QueueListener）负责格式化和输出，避免请求等待标准输出。
+按请求采样：未被采样的请求只输出WARNING及以上级别的日志
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+# 应用日志器名称，各模块使用 logging.getLogger('freelancer.xxx')
+LOGGER_NAME = 'freelancer'
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+# 进程级队列监听器，多次创建应用时只启动一次
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class RequestSamplingFilter(logging.Filter):
+    """丢弃未被采样请求中低于WARNING级别的日志"""
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not has_request_context():
+            return True
+        return g.get('log_sampled', True)
+
+
+def _start_listener(app):
+    """启动后台输出线程，返回写入队列的处理器"""
+    global _listener
+
+    with _listener_lock:
+        if _listener is None:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(logging.Formatter(app.config.get('LOG_FORMAT', DEFAULT_FORMAT)))
+            log_queue = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+    return logging.handlers.QueueHandler(_listener.queue)
+
+
+def init_logging(app):
+    """配置应用日志器并注册请求摘要日志
+
+    配置项:
+        LOG_LEVEL: 日志级别，默认INFO
+        LOG_SAMPLE_RATE: 请求采样率（0~1），默认1.0即全部请求都输出INFO/DEBUG日志
+        LOG_FORMAT: 日志格式
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    logger.propagate = False
+    if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers):
+        handler = _start_listener(app)
+        handler.addFilter(RequestSamplingFilter())
+        logger.addHandler(handler)
+
+    request_logger = logging.getLogger(f'{LOGGER_NAME}.request')
+
+    @app.before_request
+    def start_request_log():
+        g.log_started_at = time.perf_counter()
+        g.log_row_count = None
+        g.log_sampled = random.random() < app.config.get('LOG_SAMPLE_RATE', 1.0)
+
+    @app.after_request
+    def log_request_summary(response):
+        if g.get('log_sampled') and request_logger.isEnabledFor(logging.INFO):
+            elapsed_ms = (time.perf_counter() - g.log_started_at) * 1000
+            row_count = g.get('log_row_count')
+            request_logger.info(
+                '%s %s %s rows=%s %.1fms',
+                request.method, request.full_path.rstrip('?'), response.status_code,
+                '-' if row_count is None else row_count, elapsed_ms
+            )
+        return response
+
+
+def record_row_count(count):
+    """记录本次请求返回的行数，写入请求摘要日志"""
+    if has_request_context():
+        g.log_row_count = count
@@ -0,0 +1,55 @@
+"""
+列投影序列化
+列表接口直接从查询结果的Row元组生成响应字典，不创建ORM实例、不调用to_dict
+"""
+from app import db
+
+
+def isoformat(value):
+    """日期时间转换为ISO格式字符串，与模型to_dict的输出一致"""
+    return value.isoformat() if value is not None else None
+
+
+class Projection:
+    """列投影：字段名 -> 列（或任意SQL表达式）
+
+    用法:
+        projection = Projection({'game_id': GameSave.game_id, 'save_name': GameSave.save_name})
+        rows = db.session.execute(projection.select().where(...)).all()
+        data = projection.serialize(rows)
+    """
+
+    def __init__(self, fields, converters=None):
+        """
+        Args:
+            fields: 有序字典，字段名 -> 列或SQL表达式
+            converters: 可选，字段名 -> 转换函数，例如日期字段使用 isoformat
+        """
+        self.keys = tuple(fields)
+        self.columns = tuple(fields.values())
+        converters = converters or {}
+        self._converters = tuple(
+            (index, converters[key]) for index, key in enumerate(self.keys) if key in converters
+        )
+
+    def select(self):
+        """构造只查询投影列的SELECT语句"""
+        return db.select(*self.columns)
+
+    def serialize(self, rows):
+        """把Row元组列表转换为字典列表"""
+        keys = self.keys
+        if not self._converters:
+            return [dict(zip(keys, row)) for row in rows]
+
+        result = []
+        for row in rows:
+            values = list(row)
+            for index, converter in self._converters:
+                values[index] = converter(values[index])
+            result.append(dict(zip(keys, values)))
+        return result
+
+    def fetch(self, statement):
+        """执行SELECT语句并序列化结果"""
+        return self.serialize(db.session.execute(statement).all())
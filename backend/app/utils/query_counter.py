@@ -0,0 +1,42 @@
+"""
+SQL语句计数工具
+用于检查接口的查询次数是否随数据量增长（N+1查询）
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+
+
+class QueryCounter:
+    """记录执行过的SQL语句"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        """已执行的SQL语句数量"""
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """在上下文内统计指定引擎（默认为当前应用的数据库引擎）执行的SQL语句
+
+    用法:
+        with count_queries() as counter:
+            client.get('/api/universe/systems')
+        assert counter.count <= 2
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._on_execute)
@@ -0,0 +1,122 @@
+"""
+JSON响应缓存
+缓存序列化后的响应体（以及按需生成的gzip版本），使用强ETag支持条件GET：
+客户端携带匹配的If-None-Match时直接返回304，不再执行视图函数和JSON序列化
+"""
+import gzip
+import hashlib
+import threading
+from functools import wraps
+
+from flask import current_app, request
+
+from app.utils.lru_cache import LRUCache
+
+# 小于该字节数的响应不压缩
+GZIP_MIN_SIZE = 1024
+
+
+class CachedResponse:
+    """已序列化的响应体及其ETag"""
+
+    __slots__ = ('body', 'etag', 'mimetype', '_gzip_body', '_lock')
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self._gzip_body = None
+        self._lock = threading.Lock()
+
+    @property
+    def gzip_etag(self):
+        """gzip压缩版本使用独立的强ETag"""
+        return f'{self.etag}-gzip'
+
+    def gzip_body(self):
+        """按需生成并缓存gzip压缩后的响应体"""
+        if self._gzip_body is None:
+            with self._lock:
+                if self._gzip_body is None:
+                    self._gzip_body = gzip.compress(self.body, compresslevel=6)
+        return self._gzip_body
+
+    def to_response(self):
+        """根据请求头构造响应：304、gzip压缩或原始响应体"""
+        use_gzip = (
+            current_app.config.get('RESPONSE_CACHE_GZIP', True)
+            and len(self.body) >= GZIP_MIN_SIZE
+            and 'gzip' in request.accept_encodings
+        )
+        etag = self.gzip_etag if use_gzip else self.etag
+
+        if request.if_none_match.contains(self.etag) or request.if_none_match.contains(self.gzip_etag):
+            response = current_app.response_class(status=304)
+        elif use_gzip:
+            response = current_app.response_class(self.gzip_body(), mimetype=self.mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = current_app.response_class(self.body, mimetype=self.mimetype)
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Accept-Encoding')
+        response.vary.add('Authorization')
+        return response
+
+
+# 进程级响应缓存
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(maxsize=current_app.config.get('RESPONSE_CACHE_SIZE', 512))
+    return _cache
+
+
+def clear_response_cache():
+    """清空所有缓存的响应"""
+    if _cache is not None:
+        _cache.clear()
+
+
+def cached_json_response(version_key):
+    """缓存视图函数成功（200）的JSON响应
+
+    缓存键由 端点 + 路径参数 + 查询参数 + version_key() 组成。
+    version_key 返回数据版本（例如快照版本和存档发现版本）；返回None时本次请求不使用缓存，
+    视图函数正常执行（例如需要由视图返回错误响应时）
+
+    Args:
+        version_key: 无参函数，返回可哈希的数据版本或None
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_key()
+            if version is None:
+                return view(*args, **kwargs)
+
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                version
+            )
+            cache = _get_cache()
+            cached = cache.get(key)
+            if cached is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or not response.is_json:
+                    return response
+                cached = CachedResponse(response.get_data(), response.mimetype)
+                cache.put(key, cached)
+
+            return cached.to_response()
+        return wrapper
+    return decorator
@@ -1,16 +1,55 @@
 """
 安全相关工具函数
 """
+from flask import current_app, has_app_context
 from werkzeug.security import check_password_hash, generate_password_hash
 import re
 
+from app.services.password_pool import run_in_password_pool
+
+# 未配置时的密码哈希参数（与Werkzeug 2.2的默认值一致）
+DEFAULT_PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
+DEFAULT_PASSWORD_HASH_ITERATIONS = 260000
+DEFAULT_PASSWORD_SALT_LENGTH = 16
+
+def password_hash_params():
+    """当前配置的密码哈希参数
+
+    Returns:
+        (str, int): Werkzeug格式的方法字符串（如 pbkdf2:sha256:260000），盐长度
+    """
+    settings = current_app.config if has_app_context() else {}
+    method = settings.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+    iterations = settings.get('PASSWORD_HASH_ITERATIONS', DEFAULT_PASSWORD_HASH_ITERATIONS)
+    salt_length = settings.get('PASSWORD_SALT_LENGTH', DEFAULT_PASSWORD_SALT_LENGTH)
+    if method.startswith('pbkdf2') and iterations:
+        method = f"{method}:{iterations}"
+    return method, salt_length
+
 def validate_password(stored_hash, provided_password):
-    """验证用户密码"""
-    return check_password_hash(stored_hash, provided_password)
+    """验证用户密码（在密码计算池中执行）
+
+    Raises:
+        PasswordPoolBusy: 同时进行的密码计算已达上限
+    """
+    return run_in_password_pool(check_password_hash, stored_hash, provided_password)
 
 def hash_password(password):
-    """生成密码哈希"""
-    return generate_password_hash(password, method='pbkdf2:sha256')
+    """按当前配置的参数生成密码哈希（在密码计算池中执行）
+
+    Raises:
+        PasswordPoolBusy: 同时进行的密码计算已达上限
+    """
+    method, salt_length = password_hash_params()
+    return run_in_password_pool(generate_password_hash, password, method, salt_length)
+
+def needs_rehash(stored_hash):
+    """密码哈希的方法、迭代次数或盐长度与当前配置不同时返回True"""
+    method, salt_length = password_hash_params()
+    parts = stored_hash.split('$') if stored_hash else []
+    if len(parts) != 3:
+        return True
+    return parts[0] != method or len(parts[1]) != salt_length
 
 def is_valid_password(password):
     """检查密码是否符合安全要求
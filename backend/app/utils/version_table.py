@@ -0,0 +1,44 @@
+"""
+有上限的版本号表
+按键记录全局递增的版本号，供进程级缓存判断条目是否失效。
+最多保留 maxsize 个键，超出时淘汰最久未更新的键；淘汰后所有未记录的键的版本号
+（下限）随之提高，因此任何键的版本号都不会回到已经用过的值，旧的缓存条目不会再次命中
+"""
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class VersionTable:
+    """键 -> 版本号，未记录的键返回当前下限"""
+
+    def __init__(self, maxsize=65536):
+        """
+        Args:
+            maxsize: 最多记录的键数
+        """
+        self.maxsize = maxsize
+        self._counter = itertools.count(1)
+        self._floor = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """键的当前版本号"""
+        return self._data.get(key, self._floor)
+
+    def bump(self, key):
+        """为键分配新的版本号并返回"""
+        with self._lock:
+            version = next(self._counter)
+            self._data[key] = version
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                # 先提高下限再淘汰，不加锁的读取在任何时刻都不会得到被淘汰键用过的版本号
+                self._floor = next(self._counter)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            return version
+
+    def __len__(self):
+        return len(self._data)
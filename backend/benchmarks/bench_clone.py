@@ -0,0 +1,100 @@
+"""
+存档复制基准测试
+在不同规模的存档（空间站 × 商品的市场表，若干飞船及其装备、货物）上复制存档，
+统计SQL语句数和耗时，并校验复制后的行数和飞船ID映射。
+SQL语句数必须与规模无关；语句数不一致或数据校验失败时以非零状态退出
+
+用法: python benchmarks/bench_clone.py
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from bench_market import seed_items
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import MarketPrice
+from app.models.ship import PlayerShip, ShipCargoItem, ShipEquipment, ShipModel
+from app.services.game_save_service import create_new_game_save, copy_game_save
+from app.utils.query_counter import count_queries
+
+# (空间站数, 商品数, 飞船数)
+SIZES = ((50, 10, 2), (500, 50, 10), (2000, 100, 50))
+REPEAT = 3
+
+
+def seed_fleet(game_id, user_id, ship_count):
+    """为存档添加飞船，每艘飞船装备和货物数量不同，便于校验映射"""
+    ships = [PlayerShip(user_id=user_id, game_id=game_id, model_id=1, name=f'Ship {i}', ship_status='docked')
+             for i in range(ship_count)]
+    db.session.add_all(ships)
+    db.session.flush()
+    for i, ship in enumerate(ships):
+        db.session.add_all(ShipEquipment(ship_id=ship.ship_id, game_id=game_id, equipment_id=j, slot_number=j)
+                           for j in range(1, i % 4 + 2))
+        db.session.add_all(ShipCargoItem(ship_id=ship.ship_id, game_id=game_id, commodity_id=j, quantity=j * 10)
+                           for j in range(1, i % 3 + 2))
+    db.session.commit()
+
+
+def fleet_signature(game_id):
+    """按飞船名称汇总装备槽位和货物，新旧存档应完全一致"""
+    rows = (
+        db.session.query(PlayerShip.name, ShipEquipment.slot_number, ShipCargoItem.quantity)
+        .outerjoin(ShipEquipment, ShipEquipment.ship_id == PlayerShip.ship_id)
+        .outerjoin(ShipCargoItem, ShipCargoItem.ship_id == PlayerShip.ship_id)
+        .filter(PlayerShip.game_id == game_id)
+        .all()
+    )
+    return sorted(rows, key=lambda row: tuple(-1 if value is None else value for value in row[1:]) + (row[0],))
+
+
+def measure(station_count, item_count, ship_count):
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(station_count)
+        seed_items(item_count)
+        db.session.add(ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1,
+                                 cargo_capacity=50, price=0))
+        db.session.commit()
+        user, _ = create_benchmark_user()
+        source = create_new_game_save(user.user_id, 'Source', faction_id=1)
+        source_id = source.game_id
+        seed_fleet(source_id, user.user_id, ship_count)
+
+        best = None
+        for i in range(REPEAT):
+            source = db.session.get(GameSave, source_id)
+            with count_queries() as counter:
+                start = time.perf_counter()
+                clone, counts = copy_game_save(source, f'Clone {i}')
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        markets = [MarketPrice.query.filter_by(game_id=game_id).count() for game_id in (source_id, clone.game_id)]
+        valid = markets[0] == markets[1] and fleet_signature(source_id) == fleet_signature(clone.game_id)
+        return counter.count, counts['market_prices'], best, valid
+
+
+def main():
+    print(f"{'空间站×商品':>14}{'飞船':>6}{'市场行数':>10}{'SQL语句数':>10}{'耗时':>12}{'校验':>6}")
+    statement_counts = set()
+    failed = False
+    for station_count, item_count, ship_count in SIZES:
+        statements, rows, elapsed, valid = measure(station_count, item_count, ship_count)
+        statement_counts.add(statements)
+        failed = failed or not valid
+        print(f"{f'{station_count}×{item_count}':>14}{ship_count:>6}{rows:>10}{statements:>10}"
+              f"{elapsed * 1000:>10.1f}ms{'通过' if valid else '失败':>6}")
+
+    if failed:
+        print("\n复制后的数据与源存档不一致")
+        sys.exit(1)
+    if len(statement_counts) != 1:
+        print("\nSQL语句数随规模变化，复制存在逐行写入")
+        sys.exit(1)
+    print("\nSQL语句数与规模无关")
+
+
+if __name__ == '__main__':
+    main()
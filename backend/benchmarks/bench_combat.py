@@ -0,0 +1,137 @@
+"""
+战斗结算基准测试
+1. NPC编队之间的批量结算：不同批量下每秒结算的遭遇数，以及逐场结算（每次一场）的对比
+2. 相同种子重复结算结果一致，不同种子结果不同
+3. 玩家自动战斗：一批进行中的combat_encounters一次结算并写回，统计SQL语句数和耗时
+结果不可复现或写回校验失败时以非零状态退出
+
+用法: python benchmarks/bench_combat.py
+"""
+import sys
+import time
+
+import numpy as np
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.combat import CombatEncounter, EnemyType
+from app.models.game_save import GameSave
+from app.models.ship import EquipmentItem, EquipmentType, PlayerShip, ShipEquipment, ShipModel
+from app.services.combat_engine import resolve_combat_encounters, resolve_npc_battles
+from app.services.game_save_service import create_new_game_save
+from app.utils.query_counter import count_queries
+
+ENEMY_TYPES = 20
+BATCH_SIZES = (1, 100, 1000, 10000)
+SINGLE_RUNS = 200
+PLAYER_ENCOUNTERS = 1000
+
+
+def seed_combat_data():
+    """飞船型号、装备（武器、护盾、引擎）和敌人类型"""
+    db.session.add_all([
+        ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1, cargo_capacity=50,
+                  armor=120, maneuverability=6, price=0),
+        ShipModel(model_id=2, name='Raider', ship_class='fighter', manufacturer_id=1, armor=60,
+                  maneuverability=4, price=0),
+        EquipmentType(type_id=1, name='Laser', category='weapon'),
+        EquipmentType(type_id=2, name='Shield', category='shield'),
+        EquipmentType(type_id=3, name='Engine', category='engine'),
+        EquipmentItem(item_id=1, type_id=1, name='Light Laser', base_price=0, effect_value=40,
+                      energy_usage=5, cooldown_time=1.0),
+        EquipmentItem(item_id=2, type_id=1, name='Heavy Cannon', base_price=0, effect_value=120,
+                      energy_usage=20, cooldown_time=3.0),
+        EquipmentItem(item_id=3, type_id=2, name='Shield Mk1', base_price=0, effect_value=400),
+        EquipmentItem(item_id=4, type_id=3, name='Thruster', base_price=0, effect_value=50),
+    ])
+    db.session.add_all(
+        EnemyType(enemy_type_id=i, name=f'Enemy {i}', difficulty_level=1 + i % 10, base_health=150 + 30 * i,
+                  base_damage=10 + 3 * i, base_reward=100 * i, ship_model_id=2 if i % 2 else None)
+        for i in range(1, ENEMY_TYPES + 1)
+    )
+    db.session.commit()
+
+
+def npc_batch(size, seed):
+    rng = np.random.default_rng(size)
+    a_types = rng.integers(1, ENEMY_TYPES + 1, size).tolist()
+    b_types = rng.integers(1, ENEMY_TYPES + 1, size).tolist()
+    a_counts = rng.integers(1, 6, size).tolist()
+    b_counts = rng.integers(1, 6, size).tolist()
+    return resolve_npc_battles(a_types, a_counts, b_types, b_counts, seed=seed)
+
+
+def bench_npc():
+    print(f"{'批量':>8}{'耗时':>12}{'遭遇/秒':>14}")
+    for size in BATCH_SIZES:
+        start = time.perf_counter()
+        npc_batch(size, seed=7)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8}{elapsed * 1000:>10.1f}ms{size / elapsed:>14.0f}")
+
+    start = time.perf_counter()
+    for i in range(SINGLE_RUNS):
+        resolve_npc_battles([1 + i % ENEMY_TYPES], [3], [1 + (i * 7) % ENEMY_TYPES], [3], seed=i)
+    elapsed = time.perf_counter() - start
+    print(f"逐场结算: {SINGLE_RUNS / elapsed:.0f} 遭遇/秒")
+
+    first, second, other = npc_batch(1000, seed=42), npc_batch(1000, seed=42), npc_batch(1000, seed=43)
+    same = (np.array_equal(first.outcome, second.outcome) and np.array_equal(first.ticks, second.ticks)
+            and np.array_equal(first.b_health, second.b_health))
+    differs = not np.array_equal(first.b_health, other.b_health)
+    print(f"相同种子结果一致: {'是' if same else '否'}，不同种子结果不同: {'是' if differs else '否'}")
+    outcomes = np.bincount(first.outcome, minlength=4)
+    print(f"结果分布（超时/A胜/B胜/同归于尽）: {outcomes.tolist()}")
+    return same and differs
+
+
+def bench_player():
+    user, _ = create_benchmark_user()
+    game_save = create_new_game_save(user.user_id, 'Combat', faction_id=1)
+    game_id = game_save.game_id
+    ship = PlayerShip.query.filter_by(game_id=game_id).first()
+    ship.current_health, ship.current_shield, ship.current_energy = 1000, 200, 300
+    db.session.add_all(ShipEquipment(ship_id=ship.ship_id, game_id=game_id, equipment_id=item_id, slot_number=slot)
+                       for slot, item_id in enumerate((1, 1, 2, 3, 4), start=1))
+    db.session.commit()
+    credits_before = db.session.get(GameSave, game_id).credits
+
+    db.session.execute(db.insert(CombatEncounter.__table__), [
+        {'user_id': user.user_id, 'game_id': game_id, 'player_ship_id': ship.ship_id, 'system_id': 1,
+         'enemy_type_id': 1 + i % ENEMY_TYPES, 'enemy_count': 1 + i % 3, 'outcome': 'in_progress'}
+        for i in range(PLAYER_ENCOUNTERS)
+    ])
+    db.session.commit()
+    encounter_ids = [row[0] for row in db.session.query(CombatEncounter.encounter_id).all()]
+
+    with count_queries() as counter:
+        start = time.perf_counter()
+        resolved = resolve_combat_encounters(encounter_ids)
+        elapsed = time.perf_counter() - start
+    db.session.expunge_all()
+
+    outcomes = dict(db.session.query(CombatEncounter.outcome, db.func.count()).group_by(CombatEncounter.outcome).all())
+    rewards = sum(int(summary['reward_credits']) for summary in resolved)
+    credits_after = db.session.get(GameSave, game_id).credits
+    valid = (len(resolved) == PLAYER_ENCOUNTERS and 'in_progress' not in outcomes
+             and credits_after == credits_before + rewards
+             and resolve_combat_encounters(encounter_ids) == [])
+    print(f"玩家自动战斗 {PLAYER_ENCOUNTERS} 场: {elapsed * 1000:.1f}ms，"
+          f"{PLAYER_ENCOUNTERS / elapsed:.0f} 遭遇/秒，SQL语句 {counter.count} 条")
+    print(f"  结果: {outcomes}，写回校验: {'通过' if valid else '失败'}")
+    return valid
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(10)
+        seed_combat_data()
+        ok = bench_npc()
+        ok = bench_player() and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+当前用户缓存基准测试
+对每个宇宙接口分别统计用户缓存未命中（等同于每次请求都查询用户表）和命中时的SQL语句数，
+命中时应恰好少一条；同时校验修改密码和删除用户后令牌返回401。
+语句数没有减少或校验失败时以非零状态退出
+
+用法: python benchmarks/bench_current_user.py
+"""
+import sys
+import time
+
+from check_query_counts import ENDPOINTS
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.services.auth_service import AuthService
+from app.services.current_user import forget_user
+from app.services.universe_snapshot import invalidate_universe_snapshot
+from app.utils.query_counter import count_queries
+from app.utils.response_cache import clear_response_cache
+
+REQUESTS = 500
+
+
+def measure(client, headers, user_id, cold):
+    counts = {}
+    clear_response_cache()
+    for url in ENDPOINTS:
+        db.session.expunge_all()
+        if cold:
+            forget_user(user_id)
+        with count_queries() as counter:
+            response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} 返回 {response.status_code}: {response.get_data(as_text=True)}')
+        counts[url] = counter.count
+    return counts
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(50)
+        user, headers = create_benchmark_user()
+        user_id = user.user_id
+        invalidate_universe_snapshot()
+        client = app.test_client()
+        client.get(ENDPOINTS[0], headers=headers)
+
+        cold = measure(client, headers, user_id, cold=True)
+        warm = measure(client, headers, user_id, cold=False)
+        failed = False
+        print(f"{'接口':<55} 未命中 / 命中")
+        for url in ENDPOINTS:
+            ok = warm[url] == cold[url] - 1
+            failed = failed or not ok
+            print(f"  {url:<53} {cold[url]:>4} / {warm[url]:<4} {'OK' if ok else '未减少!'}")
+
+        # 响应缓存命中时的请求耗时（只剩令牌验证和用户检查）
+        url = ENDPOINTS[-2]
+        for label, cold_lookup in (('未命中', True), ('命中', False)):
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                if cold_lookup:
+                    forget_user(user_id)
+                client.get(url, headers=headers)
+            elapsed = time.perf_counter() - start
+            print(f"{url} 用户缓存{label}: {elapsed / REQUESTS * 1e6:.0f}µs/请求")
+
+        # 修改密码（此前签发的令牌被撤销）和删除用户后缓存失效
+        time.sleep(1.0)  # 令牌签发时间精确到秒
+        AuthService().change_password(user_id, 'Benchmark123', 'Benchmark456')
+        changed = client.get(url, headers=headers).status_code == 401
+        other, headers = create_benchmark_user('benchmark2')
+        db.session.delete(other)
+        db.session.commit()
+        deleted = client.get(url, headers=headers).status_code == 401
+        print(f"修改密码后旧令牌返回401: {'是' if changed else '否'}，删除用户后返回401: {'是' if deleted else '否'}")
+        failed = failed or not (changed and deleted)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+势力关系传播基准测试
+1. 一个存档的关系变化：矩阵-向量乘积 + 一条upsert，对比逐个势力读取关系表并逐条更新，结果一致
+2. 关系值限制在-100到100，没有记录的势力插入新记录
+3. 多个存档的关系变化：一次矩阵乘积，语句数只随写入的记录数按批增长
+4. 完成任务时与发布势力的关系变化传播到盟友和敌对势力
+5. 势力列表接口与关系计算共用快照中的势力关系矩阵
+校验失败时以非零状态退出
+
+用法: python benchmarks/bench_faction_standing.py
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.mission import Mission, MissionType, PlayerMission
+from app.models.player import PlayerFactionStanding
+from app.models.universe import FactionRelationship
+from app.services.faction_standing import UPSERT_BATCH_SIZE, apply_standing_changes, change_standing
+from app.services.game_save_service import create_new_game_save
+from app.services.mission_scheduler import complete_missions
+from app.services.universe_queries import load_factions
+from app.services.universe_snapshot import get_universe_snapshot, invalidate_universe_snapshot
+from app.utils.query_counter import count_queries
+
+FACTIONS = (14, 200)
+SAVES = 300
+SPILLOVER = 0.5
+
+
+def seed_relationships(factions, seed=7):
+    """约一半的势力对有关系记录，关系等级在-100到100之间"""
+    rng = np.random.default_rng(seed)
+    relationships = [
+        {'faction_id1': i, 'faction_id2': j, 'relationship_level': int(rng.integers(-100, 101)),
+         'at_war': False, 'trade_agreement': False}
+        for i in range(1, factions + 1) for j in range(i + 1, factions + 1) if rng.random() < 0.5
+    ]
+    db.session.execute(db.insert(FactionRelationship.__table__), relationships)
+    db.session.commit()
+    invalidate_universe_snapshot()
+
+
+def standings(game_id):
+    db.session.expire_all()
+    return dict(db.session.execute(
+        db.select(PlayerFactionStanding.faction_id, PlayerFactionStanding.standing_value)
+        .where(PlayerFactionStanding.game_id == game_id)
+    ).all())
+
+
+def naive_change(user_id, game_id, faction_id, delta):
+    """逐个势力读取关系表计算传播后的变化，并逐条读取和更新关系记录"""
+    for other in db.session.execute(db.select(PlayerFactionStanding.faction_id)
+                                    .where(PlayerFactionStanding.game_id == game_id)).scalars().all():
+        if other == faction_id:
+            change = delta
+        else:
+            relationship = FactionRelationship.query.filter(
+                db.or_(db.and_(FactionRelationship.faction_id1 == faction_id,
+                               FactionRelationship.faction_id2 == other),
+                       db.and_(FactionRelationship.faction_id1 == other,
+                               FactionRelationship.faction_id2 == faction_id))
+            ).first()
+            level = relationship.relationship_level if relationship else 0
+            change = delta * SPILLOVER * level / 100
+        change = int(np.rint(change))
+        if change:
+            standing = PlayerFactionStanding.query.filter_by(game_id=game_id, faction_id=other).first()
+            standing.standing_value = max(-100, min(100, standing.standing_value + change))
+    db.session.commit()
+
+
+def bench_single(factions):
+    app = create_benchmark_app(FACTION_STANDING_SPILLOVER=SPILLOVER)
+    with app.app_context():
+        seed_galaxy(10, factions=factions)
+        seed_relationships(factions)
+        user, _ = create_benchmark_user()
+        game_id = create_new_game_save(user.user_id, 'Vector', faction_id=1).game_id
+        naive_game_id = create_new_game_save(user.user_id, 'Naive', faction_id=1).game_id
+        user_id = user.user_id
+        get_universe_snapshot()
+
+        with count_queries() as counter:
+            start = time.perf_counter()
+            change_standing(user_id, game_id, {1: 10})
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+        with count_queries() as naive_counter:
+            start = time.perf_counter()
+            naive_change(user_id, naive_game_id, 1, 10)
+            naive_elapsed = time.perf_counter() - start
+        same = standings(game_id) == standings(naive_game_id)
+        print(f"{factions:>6} 个势力: 矩阵 {elapsed * 1000:.2f}ms / {counter.count} 条SQL，"
+              f"逐个势力 {naive_elapsed * 1000:.1f}ms / {naive_counter.count} 条SQL，结果{'一致' if same else '不一致'}")
+        return same and counter.count == 1
+
+
+def check_standing(app, user_id):
+    results = {}
+    game_id = create_new_game_save(user_id, 'Clamp', faction_id=1).game_id
+    matrix = get_universe_snapshot().faction_matrix
+    ally = next(faction_id for faction_id in matrix.faction_ids.tolist()
+                if faction_id != 1 and matrix.relationship(1, faction_id) >= 50)
+    enemy = next(faction_id for faction_id in matrix.faction_ids.tolist()
+                 if matrix.relationship(1, faction_id) <= -50)
+
+    # 盟友关系提高，敌对势力关系降低
+    changes = change_standing(user_id, game_id, {1: 20})
+    db.session.commit()
+    results['盟友关系提高、敌对势力关系降低'] = changes[1] == 20 and changes[ally] > 0 and changes[enemy] < 0
+
+    # 关系值上下限
+    PlayerFactionStanding.query.filter_by(game_id=game_id, faction_id=1).update({'standing_value': 95})
+    db.session.commit()
+    change_standing(user_id, game_id, {1: 20})
+    db.session.commit()
+    results['关系值不超过100'] = standings(game_id)[1] == 100
+    change_standing(user_id, game_id, {1: -100, ally: -100})
+    change_standing(user_id, game_id, {1: -100, ally: -100})
+    db.session.commit()
+    results['关系值不低于-100'] = standings(game_id)[1] == -100
+
+    # 没有记录的势力插入新记录
+    PlayerFactionStanding.query.filter_by(game_id=game_id, faction_id=ally).delete()
+    db.session.commit()
+    changes = change_standing(user_id, game_id, {1: 10})
+    db.session.commit()
+    results['没有记录时插入'] = (standings(game_id).get(ally) == changes[ally]
+                           and PlayerFactionStanding.query.filter_by(game_id=game_id).count() == len(matrix.factions))
+
+    # 多个存档
+    game_ids = [create_new_game_save(user_id, f'Batch {i}', faction_id=1).game_id for i in range(SAVES)]
+    deltas = {(user_id, game_id): {1 + i % len(matrix.factions): 5 + i % 7} for i, game_id in enumerate(game_ids)}
+    with count_queries() as counter:
+        start = time.perf_counter()
+        changes = apply_standing_changes(deltas)
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+    written = sum(len(save_changes) for save_changes in changes.values())
+    batches = -(-written // UPSERT_BATCH_SIZE)
+    results['多个存档一次写入'] = counter.count == batches and all(
+        standings(game_id)[faction_id] == (25 if faction_id == 1 else 0) + change
+        for game_id, save_changes in list(changes.items())[:20] for faction_id, change in save_changes.items()
+    )
+    print(f"  {SAVES} 个存档: {elapsed * 1000:.1f}ms，写入 {written} 条记录，SQL语句 {counter.count} 条")
+
+    # 完成任务：与发布任务的空间站所属势力的关系（空间站1属于势力2）
+    game_id = game_ids[0]
+    before = standings(game_id)
+    station_faction = get_universe_snapshot().stations[1]['controlling_faction_id']
+    db.session.add(MissionType(type_id=1, name='货物运输', category='delivery', base_reward=1000))
+    db.session.add(Mission(mission_id=1, type_id=1, title='Escort', giver_station_id=1, reward_credits=500,
+                           reward_reputation=8, difficulty_level=1))
+    db.session.add(PlayerMission(user_id=user_id, game_id=game_id, mission_id=1, status='active',
+                                 start_time=datetime.utcnow(), current_progress=0, total_steps=1))
+    db.session.commit()
+    player_mission_id = PlayerMission.query.filter_by(game_id=game_id).one().player_mission_id
+    completed = complete_missions([player_mission_id])
+    after = standings(game_id)
+    mission_changes = completed[0]['standing_changes']
+    results['完成任务改变势力关系'] = (mission_changes.get(station_faction) == 8 and len(mission_changes) > 1 and all(
+        after[faction_id] == max(-100, min(100, before[faction_id] + change))
+        for faction_id, change in mission_changes.items()
+    ))
+
+    # 势力列表接口
+    _, headers = create_benchmark_user('faction_user')
+    client = app.test_client()
+    client.get('/api/universe/factions', headers=headers)
+    with count_queries() as counter:
+        response = client.get('/api/universe/factions', headers=headers)
+    results['势力列表来自关系矩阵'] = ([faction['faction_id'] for faction in response.json['factions']]
+                                == [faction['faction_id'] for faction in load_factions()]
+                                and counter.count == 0)
+
+    for name, ok in results.items():
+        print(f"  {name}: {'通过' if ok else '失败'}")
+    return all(results.values())
+
+
+def main():
+    ok = all([bench_single(factions) for factions in FACTIONS])
+    app = create_benchmark_app(FACTION_STANDING_SPILLOVER=SPILLOVER)
+    with app.app_context():
+        seed_galaxy(10, factions=14)
+        seed_relationships(14)
+        user, _ = create_benchmark_user()
+        print('势力关系校验:')
+        ok = check_standing(app, user.user_id) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
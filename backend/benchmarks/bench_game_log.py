@@ -0,0 +1,132 @@
+"""
+游戏日志管道基准测试
+1. 记录日志的调用耗时：进入队列（后台批量写入） vs 每条同步INSERT并提交
+2. 队列容量不足时各背压策略的接收/丢弃数量
+3. 深度翻页：键集分页 vs OFFSET分页，并校验键集分页遍历全部日志且无重复
+写入数量或分页校验失败时以非零状态退出
+
+用法: python benchmarks/bench_game_log.py
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_log import GameLog
+from app.services.game_log_service import GameLogService, POLICIES, read_game_logs
+from app.services.game_save_service import create_new_game_save
+
+EVENTS = 20000
+PAGE_SIZE = 50
+PAGED_LOGS = 100000
+
+
+def setup():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(10)
+        user, _ = create_benchmark_user()
+        user_id = user.user_id
+        game_id = create_new_game_save(user_id, 'Save').game_id
+    return app, user_id, game_id
+
+
+def bench_enqueue():
+    app, user_id, game_id = setup()
+    with app.app_context():
+        service = GameLogService(app, maxsize=EVENTS, flush_interval=0.05)
+        service.start()
+        start = time.perf_counter()
+        for i in range(EVENTS):
+            service.log(user_id, game_id, 'combat', f'event {i}')
+        queued = time.perf_counter() - start
+        service.stop()
+
+        start = time.perf_counter()
+        for i in range(EVENTS // 10):
+            db.session.add(GameLog(user_id=user_id, game_id=game_id, log_type='combat', message=f'sync {i}'))
+            db.session.commit()
+        synchronous = (time.perf_counter() - start) * 10
+
+        written = GameLog.query.filter_by(game_id=game_id, log_type='combat').count() - EVENTS // 10
+    print(f"记录 {EVENTS} 条日志: 队列 {queued / EVENTS * 1e6:.1f}µs/条，"
+          f"同步提交 {synchronous / EVENTS * 1e6:.1f}µs/条，后台写入 {written} 条")
+    return written == EVENTS
+
+
+def bench_policies():
+    print(f"\n队列容量1000、写入线程每批后暂停时突发 {EVENTS} 条日志:")
+    for policy in POLICIES:
+        app, user_id, game_id = setup()
+        with app.app_context():
+            service = GameLogService(app, maxsize=1000, batch_size=200, flush_interval=0.05, policy=policy,
+                                     block_timeout=0.001)
+            write = service._write
+
+            def slow_write(batch):
+                write(batch)
+                time.sleep(0.01)
+
+            service._write = slow_write
+            service.start()
+            start = time.perf_counter()
+            for i in range(EVENTS):
+                service.log(user_id, game_id, 'combat', f'event {i}')
+            elapsed = time.perf_counter() - start
+            service.stop()
+            stats = service.stats
+        print(f"  {policy:<12} 接收 {stats['accepted']:>6}  丢弃 {stats['dropped']:>6}  写入 {stats['written']:>6}"
+              f"  调用方耗时 {elapsed * 1000:>6.0f}ms")
+
+
+def bench_paging():
+    app, user_id, game_id = setup()
+    with app.app_context():
+        base = datetime(3000, 1, 1)
+        # 每两条日志共享同一时间戳，验证 log_id 作为并列时的次序
+        db.session.execute(db.insert(GameLog.__table__), [
+            {'user_id': user_id, 'game_id': game_id, 'log_type': 'trade', 'message': f'log {i}',
+             'created_at': base + timedelta(seconds=i // 2)}
+            for i in range(PAGED_LOGS)
+        ])
+        db.session.commit()
+
+        seen, cursor, pages = set(), None, 0
+        start = time.perf_counter()
+        while True:
+            logs, cursor = read_game_logs(user_id, game_id, limit=PAGE_SIZE, before=cursor)
+            seen.update(log['log_id'] for log in logs)
+            pages += 1
+            if cursor is None:
+                break
+        keyset_total = time.perf_counter() - start
+        valid = len(seen) == GameLog.query.filter_by(game_id=game_id).count()
+
+        depth = PAGED_LOGS // PAGE_SIZE - 1
+        start = time.perf_counter()
+        db.session.execute(
+            db.select(GameLog.log_id)
+            .where(GameLog.user_id == user_id, GameLog.game_id == game_id)
+            .order_by(GameLog.created_at.desc(), GameLog.log_id.desc())
+            .offset(depth * PAGE_SIZE).limit(PAGE_SIZE)
+        ).all()
+        offset_last = time.perf_counter() - start
+
+    print(f"\n{PAGED_LOGS} 条日志、每页 {PAGE_SIZE} 条:")
+    print(f"  键集分页遍历 {pages} 页: 平均每页 {keyset_total / pages * 1000:.2f}ms，"
+          f"{'无遗漏无重复' if valid else '结果不完整'}")
+    print(f"  OFFSET分页第 {depth} 页: {offset_last * 1000:.2f}ms")
+    return valid
+
+
+def main():
+    ok = bench_enqueue()
+    bench_policies()
+    ok = bench_paging() and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+心跳延迟写入基准测试
+多个存档交替发送心跳（游玩时长和统计增量），统计心跳请求的SQL语句数、写回时的语句数，
+并校验写回后的累计值与上报总和一致；统计增量只接受有上限的非负整数，
+单个存档写回失败时不影响其他存档。心跳产生SQL或校验失败时以非零状态退出
+
+用法: python benchmarks/bench_heartbeat.py
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_save import GameSave
+from app.models.player import PlayerStatistic
+from app.services.activity_buffer import get_activity_buffer
+from app.services.game_save_service import create_new_game_save
+from app.utils.query_counter import count_queries
+
+SAVES = 20
+HEARTBEATS = 2000
+
+
+def check_validation_and_isolation(client, headers, game_ids):
+    """非整数、超过上限的统计增量返回400；一个存档的UPDATE失败时其他存档照常写回"""
+    url = f'/api/game-saves/{game_ids[0]}/heartbeat'
+    rejected = all(
+        client.post(url, headers=headers, json={'statistics': {'enemies_defeated': value}}).status_code == 400
+        for value in (1.5, 1e300, 10 ** 12, -1, True)
+    )
+    print(f"统计增量校验: {'通过' if rejected else '失败'}")
+
+    # 触发器使第一个存档的UPDATE失败
+    db.session.execute(db.text(
+        f"CREATE TRIGGER fail_save BEFORE UPDATE ON game_saves WHEN OLD.game_id = {game_ids[0]} "
+        "BEGIN SELECT RAISE(ABORT, 'fail'); END"
+    ))
+    db.session.commit()
+    before = dict(db.session.query(GameSave.game_id, GameSave.total_playtime)
+                  .filter(GameSave.game_id.in_(game_ids)))
+    for game_id in game_ids:
+        client.post(f'/api/game-saves/{game_id}/heartbeat', headers=headers, json={'playtime_seconds': 10})
+    buffer = get_activity_buffer()
+    flushed = buffer.flush()
+    db.session.execute(db.text('DROP TRIGGER fail_save'))
+    db.session.commit()
+    db.session.expunge_all()
+    after = dict(db.session.query(GameSave.game_id, GameSave.total_playtime)
+                 .filter(GameSave.game_id.in_(game_ids)))
+    isolated = (flushed == len(game_ids) - 1 and not buffer._pending
+                and after[game_ids[0]] == before[game_ids[0]]
+                and all(after[game_id] == (before[game_id] or 0) + 10 for game_id in game_ids[1:]))
+    print(f"单个存档写回失败不影响其他存档: {'通过' if isolated else '失败'}")
+    return rejected and isolated
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(20)
+        user, headers = create_benchmark_user()
+        game_ids = [create_new_game_save(user.user_id, f'Save {i}').game_id for i in range(SAVES)]
+        client = app.test_client()
+
+        # 预热：存档归属缓存
+        for game_id in game_ids:
+            client.post(f'/api/game-saves/{game_id}/heartbeat', headers=headers, json={})
+
+        payload = {'playtime_seconds': 30, 'statistics': {'enemies_defeated': 1, 'total_distance_traveled': 3}}
+        with count_queries() as counter:
+            start = time.perf_counter()
+            for i in range(HEARTBEATS):
+                response = client.post(f'/api/game-saves/{game_ids[i % SAVES]}/heartbeat',
+                                       headers=headers, json=payload)
+                if response.status_code != 202:
+                    raise RuntimeError(f'心跳返回 {response.status_code}: {response.get_data(as_text=True)}')
+            elapsed = time.perf_counter() - start
+        heartbeat_statements = counter.count
+
+        with count_queries() as counter:
+            start = time.perf_counter()
+            flushed = get_activity_buffer().flush()
+            flush_time = time.perf_counter() - start
+        flush_statements = counter.count
+
+        per_save = HEARTBEATS // SAVES
+        db.session.expunge_all()
+        saves = GameSave.query.filter(GameSave.game_id.in_(game_ids)).all()
+        statistics = PlayerStatistic.query.filter(PlayerStatistic.game_id.in_(game_ids)).all()
+        valid = (
+            all(save.total_playtime == per_save * 30 for save in saves)
+            and all(stat.enemies_defeated == per_save for stat in statistics)
+            and all(float(stat.total_distance_traveled) == per_save * 3 for stat in statistics)
+            and all(stat.total_playtime_minutes == per_save * 30 // 60 for stat in statistics)
+        )
+
+    print(f"心跳 {HEARTBEATS} 次（{SAVES} 个存档）: {elapsed * 1000:.0f}ms，"
+          f"每次 {elapsed / HEARTBEATS * 1e6:.0f}µs，SQL语句 {heartbeat_statements} 条")
+    print(f"写回 {flushed} 个存档: {flush_time * 1000:.1f}ms，SQL语句 {flush_statements} 条")
+    print(f"校验: {'通过' if valid else '失败'}")
+
+    with app.app_context():
+        valid = check_validation_and_isolation(client, headers, game_ids) and valid
+
+    if heartbeat_statements or not valid:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
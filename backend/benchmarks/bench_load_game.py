@@ -0,0 +1,88 @@
+"""
+存档加载基准测试
+在不同规模的存档（势力关系、任务、发现记录、装备和货物数量不同）上请求加载接口，
+统计SQL语句数和耗时。SQL语句数必须与存档数据量无关，不一致时以非零状态退出
+
+用法: python benchmarks/bench_load_game.py
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.mission import PlayerMission
+from app.models.player import PlayerDiscovery
+from app.models.ship import PlayerShip, ShipCargoItem, ShipEquipment, ShipModel
+from app.services.game_save_service import create_new_game_save
+from app.utils.query_counter import count_queries
+
+# 每个存档的 任务 / 发现 / 装备和货物 数量
+SIZES = (5, 200, 2000)
+REPEAT = 5
+
+
+def seed_save(user_id, size):
+    """创建存档并添加指定数量的任务、发现记录、装备和货物"""
+    game_save = create_new_game_save(user_id, f'Save {size}', faction_id=1)
+    game_id = game_save.game_id
+    ship = PlayerShip.query.filter_by(game_id=game_id, is_active=True).one()
+    db.session.add_all(PlayerMission(user_id=user_id, game_id=game_id, mission_id=i, total_steps=3)
+                       for i in range(size))
+    db.session.add_all(PlayerDiscovery(user_id=user_id, game_id=game_id, discovery_type='anomaly', object_id=i)
+                       for i in range(size))
+    db.session.add_all(ShipEquipment(ship_id=ship.ship_id, game_id=game_id, equipment_id=i, slot_number=i % 8)
+                       for i in range(size))
+    db.session.add_all(ShipCargoItem(ship_id=ship.ship_id, game_id=game_id, commodity_id=i, quantity=1)
+                       for i in range(size))
+    db.session.commit()
+    return game_id
+
+
+def measure(size, fields=None):
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(50)
+        db.session.add(ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1,
+                                 cargo_capacity=50, price=0))
+        db.session.commit()
+        user, headers = create_benchmark_user()
+        game_id = seed_save(user.user_id, size)
+        client = app.test_client()
+        url = f'/api/game-saves/{game_id}/load' + (f'?fields={fields}' if fields else '')
+
+        # 预热：进程级宇宙快照只在首次请求时加载
+        client.post(url, headers=headers)
+
+        best = None
+        for _ in range(REPEAT):
+            db.session.expunge_all()
+            with count_queries() as counter:
+                start = time.perf_counter()
+                response = client.post(url, headers=headers)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} 返回 {response.status_code}: {response.get_data(as_text=True)}')
+            best = elapsed if best is None else min(best, elapsed)
+        return counter.count, len(response.get_data()), best
+
+
+def main():
+    failed = False
+    for fields in (None, 'active_ship,location'):
+        print(f"\nfields={fields or '全部'}")
+        print(f"{'数据量':>8}{'SQL语句数':>10}{'响应字节':>10}{'耗时':>12}")
+        statement_counts = set()
+        for size in SIZES:
+            statements, length, elapsed = measure(size, fields)
+            statement_counts.add(statements)
+            print(f"{size:>8}{statements:>10}{length:>10}{elapsed * 1000:>10.1f}ms")
+        failed = failed or len(statement_counts) != 1
+
+    if failed:
+        print("\nSQL语句数随存档数据量变化")
+        sys.exit(1)
+    print("\nSQL语句数与存档数据量无关")
+
+
+if __name__ == '__main__':
+    main()
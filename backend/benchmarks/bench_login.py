@@ -0,0 +1,147 @@
+"""
+登录吞吐基准测试
+1. 不同PBKDF2迭代次数下单核每秒可验证的密码数（即每核每秒登录数的上限）
+2. 通过 /api/login 的端到端登录吞吐
+3. 修改迭代次数后，登录成功时透明地按新参数重新计算哈希
+4. 登录风暴（多个线程同时登录）期间，游戏请求线程上一个小任务的延迟、成功登录的延迟，
+   以及超过并发上限被拒绝（503）的登录数，对比不限制和限制并发的计算池
+重新计算哈希校验失败时以非零状态退出
+
+用法: python benchmarks/bench_login.py
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+from common import create_benchmark_app, create_benchmark_user
+from app import db
+from app.services.password_pool import PasswordPool, PasswordPoolBusy
+from app.utils.security import hash_password, validate_password
+
+PASSWORD = 'Benchmark123'
+ITERATIONS = (600000, 260000, 100000, 50000)
+LOGINS = 20
+STORM_THREADS = 8
+STORM_SECONDS = 2.0
+
+
+def verify_rate(app, iterations, rounds=10):
+    """单线程每秒验证次数"""
+    with app.test_request_context():
+        app.config['PASSWORD_HASH_ITERATIONS'] = iterations
+        stored = hash_password(PASSWORD)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            validate_password(stored, PASSWORD)
+        return rounds / (time.perf_counter() - start)
+
+
+def login_throughput(app, client):
+    start = time.perf_counter()
+    for _ in range(LOGINS):
+        response = client.post('/api/login', json={'username': 'benchmark', 'password': PASSWORD})
+        if response.status_code != 200:
+            raise RuntimeError(f'登录返回 {response.status_code}: {response.get_data(as_text=True)}')
+    return LOGINS / (time.perf_counter() - start)
+
+
+def check_rehash(app, client, user):
+    """修改迭代次数后登录一次，哈希应更新为新参数；再登录一次不应再变化"""
+    app.config['PASSWORD_HASH_ITERATIONS'] = 100000
+    client.post('/api/login', json={'username': 'benchmark', 'password': PASSWORD})
+    db.session.refresh(user)
+    first = user.password_hash
+    client.post('/api/login', json={'username': 'benchmark', 'password': PASSWORD})
+    db.session.refresh(user)
+    return first.startswith('pbkdf2:sha256:100000$') and user.password_hash == first
+
+
+def storm(app, pool):
+    """STORM_THREADS个线程持续登录，同时在主线程测量小任务的延迟"""
+    app.extensions['password_pool'] = pool
+    with app.app_context():
+        stored = hash_password(PASSWORD)
+    stop = threading.Event()
+    counts = {'ok': 0, 'rejected': 0}
+    login_latencies = []
+    lock = threading.Lock()
+
+    def login_loop():
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    validate_password(stored, PASSWORD)
+                    outcome = 'ok'
+                except PasswordPoolBusy:
+                    outcome = 'rejected'
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    counts[outcome] += 1
+                    if outcome == 'ok':
+                        login_latencies.append(elapsed)
+                if outcome == 'rejected':
+                    time.sleep(0.01)  # 客户端收到503后稍后重试
+
+    payload = {'ships': [{'ship_id': i, 'x': i * 1.5, 'name': f'Ship {i}'} for i in range(200)]}
+    threads = [threading.Thread(target=login_loop) for _ in range(STORM_THREADS)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    deadline = time.perf_counter() + STORM_SECONDS
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        json.dumps(payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    pool.shutdown()
+    latencies.sort()
+    return (statistics.median(latencies), latencies[int(len(latencies) * 0.99)],
+            counts['ok'] / STORM_SECONDS, statistics.median(login_latencies), counts['rejected'])
+
+
+def main():
+    cores = os.cpu_count() or 1
+    app = create_benchmark_app(PASSWORD_POOL_MODE='inline')
+    app.extensions['password_pool'] = PasswordPool(mode='inline', max_pending=64)
+    with app.app_context():
+        user, _ = create_benchmark_user()
+        client = app.test_client()
+
+        print(f'CPU核数: {cores}')
+        print('单核验证吞吐（每核每秒登录数上限）:')
+        for iterations in ITERATIONS:
+            print(f'  pbkdf2:sha256:{iterations:<7d} {verify_rate(app, iterations):8.1f} 次/秒')
+
+        app.config['PASSWORD_HASH_ITERATIONS'] = 260000
+        user.set_password(PASSWORD)
+        db.session.commit()
+        rate = login_throughput(app, client)
+        print(f'/api/login 端到端（260000次迭代）: {rate:.1f} 次/秒，每核 {rate / cores:.1f} 次/秒')
+
+        rehashed = check_rehash(app, client, user)
+        print(f'修改迭代次数后登录重新计算哈希: {"正确" if rehashed else "失败"}')
+
+    app.config['PASSWORD_HASH_ITERATIONS'] = 260000
+    print(f'登录风暴（{STORM_THREADS}个线程，{STORM_SECONDS:.0f}秒）: 游戏线程小任务延迟 / 成功登录的吞吐和延迟 / 拒绝数')
+    for label, pool in (
+        ('不限制并发', PasswordPool(mode='inline', max_pending=STORM_THREADS)),
+        ('线程池2 上限2', PasswordPool(mode='thread', workers=2, max_pending=2, wait_timeout=0.05)),
+        ('线程池1 上限1', PasswordPool(mode='thread', workers=1, max_pending=1, wait_timeout=0.05)),
+    ):
+        p50, p99, logins, login_p50, rejected = storm(app, pool)
+        print(f'  {label:<12} p50 {p50:5.2f}ms p99 {p99:5.2f}ms | '
+              f'{logins:5.1f} 次/秒 p50 {login_p50:6.1f}ms | 拒绝 {rejected}')
+
+    if not rehashed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
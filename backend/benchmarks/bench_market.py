@@ -0,0 +1,73 @@
+"""
+市场引擎基准测试
+生成 空间站 × 商品 的市场记录，分别统计加载、向量化推进和批量写回的耗时
+
+用法: python benchmarks/bench_market.py [空间站数] [商品数]
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import Item, MarketPrice
+from app.services.market_engine import load_market, save_market
+from app.utils.query_counter import count_queries
+
+
+def seed_items(item_count):
+    """生成可交易商品"""
+    db.session.bulk_insert_mappings(Item, [
+        {'item_id': i, 'name': f'Commodity {i}', 'item_type': 'commodity',
+         'base_price': 10 + (i * 37) % 490, 'rarity_level': 1 + i % 10}
+        for i in range(1, item_count + 1)
+    ])
+    db.session.commit()
+
+
+def seed_market(game_id, station_count, item_count):
+    """为存档生成每个空间站每种商品的价格记录"""
+    rows = [
+        {'game_id': game_id, 'station_id': station_id, 'item_id': item_id,
+         'buy_price': 100, 'sell_price': 90, 'available_quantity': (station_id * item_id) % 2000,
+         'demand_level': 1 + (station_id + item_id) % 10}
+        for station_id in range(1, station_count + 1)
+        for item_id in range(1, item_count + 1)
+    ]
+    db.session.bulk_insert_mappings(MarketPrice, rows)
+    db.session.commit()
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<24}{(time.perf_counter() - start) * 1000:>10.1f} ms")
+    return result
+
+
+def main():
+    station_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    app = create_benchmark_app()
+
+    with app.app_context():
+        seed_galaxy(station_count)
+        seed_items(item_count)
+        user, _ = create_benchmark_user()
+        game_save = GameSave(user_id=user.user_id, save_name='Benchmark')
+        db.session.add(game_save)
+        db.session.commit()
+        game_id = game_save.game_id
+        seed_market(game_id, station_count, item_count)
+
+        print(f"市场规模: {station_count} 个空间站 × {item_count} 种商品 = {station_count * item_count} 条记录")
+        with count_queries() as counter:
+            state = timed('加载', lambda: load_market(game_id))
+            timed('推进1小时（向量化）', lambda: state.advance(1.0))
+            timed('批量写回', lambda: save_market(state))
+            timed('提交', db.session.commit)
+        print(f"  SQL语句数: {counter.count}")
+
+
+if __name__ == '__main__':
+    main()
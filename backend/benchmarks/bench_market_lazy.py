@@ -0,0 +1,102 @@
+"""
+惰性市场估值基准测试
+市场没有后台推进任务，只有访问市场的存档才会计算。
+分别在少量和大量（默认10万）休眠存档的数据库上，测量活跃存档读取一个空间站市场的耗时，
+并与"定时推进所有存档"的做法估算对比
+
+用法: python benchmarks/bench_market_lazy.py [休眠存档数]
+"""
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from bench_market import seed_items
+from app import db
+from app.models.game_save import GameSave
+from app.models.market import MarketPrice
+from app.services.market_engine import evaluate_market, settle_market
+from app.utils.query_counter import count_queries
+
+STATION_COUNT = 50
+ITEM_COUNT = 20
+# 每个休眠存档保存的市场记录数（一个空间站的部分商品）
+DORMANT_ROWS_PER_SAVE = 2
+REPEAT = 200
+# 估算定时推进所有存档时抽样的存档数
+EAGER_SAMPLE = 200
+
+
+def seed_saves(user_id, count, last_played_at):
+    """批量生成存档及其市场记录，返回第一个存档ID"""
+    first_id = (db.session.query(db.func.max(GameSave.game_id)).scalar() or 0) + 1
+    db.session.bulk_insert_mappings(GameSave, [
+        {'game_id': first_id + i, 'user_id': user_id, 'save_name': f'Save {first_id + i}',
+         'created_at': last_played_at, 'last_played_at': last_played_at}
+        for i in range(count)
+    ])
+    db.session.bulk_insert_mappings(MarketPrice, [
+        {'game_id': first_id + i, 'station_id': 1 + i % STATION_COUNT, 'item_id': 1 + item,
+         'buy_price': 100, 'sell_price': 90, 'available_quantity': 500, 'demand_level': 5,
+         'last_updated': last_played_at}
+        for i in range(count)
+        for item in range(DORMANT_ROWS_PER_SAVE)
+    ])
+    db.session.commit()
+    return first_id
+
+
+def measure(dormant_count):
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(STATION_COUNT)
+        seed_items(ITEM_COUNT)
+        user, _ = create_benchmark_user()
+        user_id = user.user_id
+
+        long_ago = datetime.utcnow() - timedelta(days=90)
+        first_dormant = seed_saves(user_id, dormant_count, long_ago)
+
+        # 活跃存档：所有空间站的所有商品
+        active_id = first_dormant + dormant_count
+        db.session.add(GameSave(game_id=active_id, user_id=user_id, save_name='Active'))
+        db.session.bulk_insert_mappings(MarketPrice, [
+            {'game_id': active_id, 'station_id': station_id, 'item_id': item_id,
+             'buy_price': 100, 'sell_price': 90, 'available_quantity': 300, 'demand_level': 7,
+             'last_updated': datetime.utcnow() - timedelta(hours=5)}
+            for station_id in range(1, STATION_COUNT + 1)
+            for item_id in range(1, ITEM_COUNT + 1)
+        ])
+        db.session.commit()
+
+        timings = []
+        with count_queries() as counter:
+            for i in range(REPEAT):
+                start = time.perf_counter()
+                evaluate_market(active_id, station_ids=[1 + i % STATION_COUNT])
+                timings.append((time.perf_counter() - start) * 1000)
+        queries = counter.count // REPEAT
+
+        # 定时推进：每个存档都要加载、计算并写回
+        sample = min(EAGER_SAMPLE, dormant_count)
+        start = time.perf_counter()
+        for game_id in range(first_dormant, first_dormant + sample):
+            settle_market(game_id)
+        db.session.rollback()
+        eager_per_save = (time.perf_counter() - start) / sample
+
+    return statistics.median(timings), queries, eager_per_save
+
+
+def main():
+    dormant_counts = (1000, int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    print(f"{'休眠存档数':>12}{'访问市场中位耗时':>18}{'SQL/次':>8}{'休眠存档后台开销':>18}{'定时推进一轮(估算)':>20}")
+    for dormant_count in dormant_counts:
+        median_ms, queries, eager_per_save = measure(dormant_count)
+        print(f"{dormant_count:>12,}{median_ms:>16.2f}ms{queries:>8}{'0':>18}"
+              f"{eager_per_save * dormant_count:>19.1f}s")
+
+
+if __name__ == '__main__':
+    main()
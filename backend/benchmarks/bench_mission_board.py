@@ -0,0 +1,160 @@
+"""
+任务板基准测试
+1. 不同星系规模下查看任务板的耗时和SQL语句数（任务板即时生成，语句数与规模无关）
+2. 相同 (存档, 空间站, 时间段) 生成相同的任务板，不同时间段或存档生成不同的任务板
+3. 势力关系限制可接受的最高难度，关系过低时任务板为空
+4. 接受任务：接受后从任务板消失，重复接受和任务板刷新后接受返回409，放弃后不再是进行中的任务
+5. 进行中任务的查询使用 (game_id, status) 索引（SQLite查询计划）
+校验失败时以非零状态退出
+
+用法: python benchmarks/bench_mission_board.py
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.mission import Mission, MissionType
+from app.models.player import PlayerFactionStanding
+from app.models.universe import SpaceStation
+from app.services.game_save_service import create_new_game_save
+from app.services.mission_board import board_bucket, generate_board, load_mission_types
+from app.services.universe_snapshot import invalidate_universe_snapshot
+from app.utils.query_counter import count_queries
+
+SIZES = (50, 500, 2000)
+REQUESTS = 200
+
+
+def seed_missions():
+    """任务类型（与schema_part2.sql的示例数据一致）和空间站1预先编写的任务"""
+    db.session.execute(db.update(SpaceStation.__table__).values(has_mission_board=True))
+    db.session.add_all([
+        MissionType(type_id=1, name='货物运输', category='delivery', base_reward=1000, base_reputation=5,
+                    difficulty_multiplier=1.0),
+        MissionType(type_id=2, name='消灭敌人', category='combat', base_reward=1500, base_reputation=10,
+                    difficulty_multiplier=1.5),
+        MissionType(type_id=3, name='探索未知', category='exploration', base_reward=2000, base_reputation=15,
+                    difficulty_multiplier=1.2),
+        MissionType(type_id=4, name='走私行动', category='smuggling', base_reward=3000, base_reputation=0,
+                    difficulty_multiplier=2.0),
+        MissionType(type_id=5, name='紧急救援', category='rescue', base_reward=2500, base_reputation=20,
+                    difficulty_multiplier=1.8),
+        Mission(type_id=1, title='医疗物资运输', giver_station_id=1, target_station_id=2, target_system_id=2,
+                reward_credits=1000, reward_reputation=5, time_limit_hours=2, difficulty_level=2),
+    ])
+    db.session.commit()
+    invalidate_universe_snapshot()
+
+
+def bench_sizes():
+    print(f"{'星系数':>8}{'SQL语句数':>10}{'耗时':>12}")
+    counts = set()
+    for size in SIZES:
+        app = create_benchmark_app()
+        with app.app_context():
+            seed_galaxy(size)
+            seed_missions()
+            user, headers = create_benchmark_user()
+            game_id = create_new_game_save(user.user_id, 'Board', faction_id=1).game_id
+            client = app.test_client()
+            url = f'/api/game-saves/{game_id}/stations/{size // 2}/missions'
+            client.get(url, headers=headers)
+            with count_queries() as counter:
+                response = client.get(url, headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} 返回 {response.status_code}: {response.get_data(as_text=True)}')
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get(url, headers=headers)
+            elapsed = (time.perf_counter() - start) / REQUESTS
+            counts.add(counter.count)
+            print(f"{size:>8}{counter.count:>10}{elapsed * 1000:>10.2f}ms")
+    return len(counts) == 1
+
+
+def check_board(app):
+    results = {}
+    user, headers = create_benchmark_user('mission_user')
+    game_id = create_new_game_save(user.user_id, 'Missions', faction_id=1).game_id
+    other_game_id = create_new_game_save(user.user_id, 'Other', faction_id=1).game_id
+    client = app.test_client()
+    url = f'/api/game-saves/{game_id}/stations/1/missions'
+
+    # 确定性
+    types = load_mission_types()
+    bucket, _ = board_bucket()
+    first = generate_board(game_id, 1, bucket, types)
+    results['相同种子任务板相同'] = first == generate_board(game_id, 1, bucket, types)
+    results['不同时间段任务板不同'] = ([offer['title'] for offer in first]
+                                    != [offer['title'] for offer in generate_board(game_id, 1, bucket + 1, types)])
+    results['不同存档任务板不同'] = ([offer['title'] for offer in first]
+                                  != [offer['title'] for offer in generate_board(other_game_id, 1, bucket, types)])
+
+    # 势力关系与难度筛选（空间站1属于势力2）
+    board = client.get(url, headers=headers).json
+    results['预先编写的任务在任务板上'] = any(offer['offer_id'] == 'm1' for offer in board['missions'])
+    results['难度不超过关系允许值'] = all(offer['difficulty_level'] <= board['max_difficulty']
+                                     for offer in board['missions'])
+    filtered = client.get(url + '?min_difficulty=3&max_difficulty=3', headers=headers).json['missions']
+    results['按难度筛选'] = all(offer['difficulty_level'] == 3 for offer in filtered)
+    # 新存档与每个势力都有关系记录
+    standing = PlayerFactionStanding.query.filter_by(game_id=game_id, faction_id=2)
+    standing.update({'standing_value': -80})
+    db.session.commit()
+    results['关系过低时任务板为空'] = client.get(url, headers=headers).json['missions'] == []
+    standing.update({'standing_value': 100})
+    db.session.commit()
+    board = client.get(url, headers=headers).json
+    results['关系提高后可接受更高难度'] = board['max_difficulty'] == 10 and len(board['missions']) == len(first) + 1
+
+    # 接受、重复接受、放弃
+    accept_url = f'/api/game-saves/{game_id}/missions'
+    offer = next(offer for offer in board['missions'] if offer['board_key'])
+    response = client.post(accept_url, headers=headers, json={'station_id': 1, 'offer_id': offer['offer_id']})
+    results['接受生成的任务'] = (response.status_code == 201
+                             and response.json['player_mission']['mission']['title'] == offer['title'])
+    results['接受后从任务板消失'] = all(item['offer_id'] != offer['offer_id']
+                                   for item in client.get(url, headers=headers).json['missions'])
+    results['重复接受返回409'] = client.post(accept_url, headers=headers,
+                                        json={'station_id': 1, 'offer_id': offer['offer_id']}).status_code == 409
+    results['任务板刷新后接受返回409'] = client.post(
+        accept_url, headers=headers, json={'station_id': 1, 'offer_id': f'{bucket - 1}-0'}).status_code == 409
+    response = client.post(accept_url, headers=headers, json={'station_id': 1, 'offer_id': 'm1'})
+    results['接受预先编写的任务'] = response.status_code == 201
+    results['预先编写的任务只能接受一次'] = client.post(
+        accept_url, headers=headers, json={'station_id': 1, 'offer_id': 'm1'}).status_code == 409
+
+    active = client.get(accept_url, headers=headers).json['missions']
+    results['进行中的任务'] = len(active) == 2 and all(mission['deadline'] for mission in active)
+    response = client.post(f"{accept_url}/{active[0]['player_mission_id']}/abandon", headers=headers)
+    results['放弃任务'] = (response.status_code == 200
+                        and len(client.get(accept_url, headers=headers).json['missions']) == 1
+                        and len(client.get(accept_url + '?status=abandoned', headers=headers).json['missions']) == 1)
+
+    # 进行中任务的查询计划
+    plan = db.session.execute(db.text(
+        "EXPLAIN QUERY PLAN SELECT player_mission_id FROM player_missions WHERE game_id = :game_id AND status = 'active'"
+    ), {'game_id': game_id}).all()
+    results['使用(game_id, status)索引'] = any('idx_player_mission_game_status' in row[-1] for row in plan)
+
+    for name, ok in results.items():
+        print(f"  {name}: {'通过' if ok else '失败'}")
+    return all(results.values())
+
+
+def main():
+    ok = bench_sizes()
+    print("SQL语句数与星系规模无关" if ok else "SQL语句数随星系规模变化!")
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(50)
+        seed_missions()
+        print('任务板校验:')
+        ok = check_board(app) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+任务期限与完成结算基准测试
+1. 大量进行中的限时任务：调度器加载耗时，以及一次处理全部到期任务的耗时和SQL语句数，
+   对比逐个任务检查截止时间并单独UPDATE
+2. 批量完成任务：游戏币、声望、completed_missions_count和player_statistics与逐个累加的结果一致，
+   语句数与任务数无关
+3. 后台线程运行时本进程接受的任务立即进入调度器，未运行时不保留；完成接口要求当前飞船位于任务目标
+语句数不符合预期或校验失败时以非零状态退出
+
+用法: python benchmarks/bench_mission_expiry.py
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_save import GameSave
+from app.models.mission import Mission, MissionType, PlayerMission
+from app.models.player import PlayerStatistic
+from app.models.ship import PlayerShip, ShipModel
+from app.services.game_save_service import create_new_game_save
+from app.services.mission_scheduler import MissionScheduler, complete_missions, get_mission_scheduler
+from app.services.universe_snapshot import get_universe_snapshot
+from app.utils.query_counter import count_queries
+
+SAVES = 20
+MISSIONS = 20000
+NAIVE_MISSIONS = 1000
+COMPLETIONS = 1000
+BATCH_SIZE = 500
+
+
+def seed(user_id):
+    # 新存档带有初始飞船，完成任务时检查其位置
+    db.session.add(ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1,
+                             cargo_capacity=50, price=0))
+    db.session.add(MissionType(type_id=1, name='货物运输', category='delivery', base_reward=1000))
+    db.session.add_all(
+        Mission(mission_id=i, type_id=1, title=f'Mission {i}', giver_station_id=1, reward_credits=100 * i,
+                reward_reputation=i, time_limit_hours=i, difficulty_level=1)
+        for i in range(1, 5)
+    )
+    db.session.commit()
+    return [create_new_game_save(user_id, f'Save {i}', faction_id=1).game_id for i in range(SAVES)]
+
+
+def insert_missions(user_id, game_ids, count, start_time):
+    """任务的时间限制为1-4小时，开始时间分布在过去的5小时内，约一半已到期"""
+    db.session.execute(db.insert(PlayerMission.__table__), [
+        {'user_id': user_id, 'game_id': game_ids[i % len(game_ids)], 'mission_id': 1 + i % 4, 'status': 'active',
+         'start_time': start_time - timedelta(seconds=(i * 7919) % (5 * 3600)), 'current_progress': 0,
+         'total_steps': 1}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def bench_expiry(app, user_id, game_ids, now):
+    insert_missions(user_id, game_ids, MISSIONS, now)
+    scheduler = MissionScheduler(app, interval=0, batch_size=BATCH_SIZE)
+
+    start = time.perf_counter()
+    with app.app_context():
+        scheduler.sync(full=True)
+    loaded = time.perf_counter() - start
+
+    with count_queries() as counter:
+        start = time.perf_counter()
+        expired = scheduler.tick(now=now)
+        elapsed = time.perf_counter() - start
+    statements = counter.count
+    failed = db.session.query(PlayerMission).filter_by(status='failed').count()
+    overdue = sum(
+        1 for start_time, hours in db.session.query(PlayerMission.start_time, Mission.time_limit_hours)
+        .join(Mission, Mission.mission_id == PlayerMission.mission_id)
+        if start_time + timedelta(hours=hours) <= now
+    )
+    print(f"{MISSIONS} 个进行中的任务: 加载 {loaded * 1000:.1f}ms，剩余 {len(scheduler)} 个待到期")
+    print(f"  到期 {expired} 个: {elapsed * 1000:.1f}ms，SQL语句 {statements} 条")
+
+    # 逐个检查截止时间并单独UPDATE
+    db.session.execute(db.delete(PlayerMission.__table__))
+    db.session.commit()
+    insert_missions(user_id, game_ids, NAIVE_MISSIONS, now)
+    with count_queries() as naive_counter:
+        start = time.perf_counter()
+        naive = 0
+        for player_mission in PlayerMission.query.filter_by(status='active').all():
+            mission = db.session.get(Mission, player_mission.mission_id)
+            if player_mission.start_time + timedelta(hours=mission.time_limit_hours) <= now:
+                player_mission.status = 'failed'
+                db.session.commit()
+                naive += 1
+        naive_elapsed = time.perf_counter() - start
+    print(f"  逐个处理 {NAIVE_MISSIONS} 个任务（到期 {naive} 个）: {naive_elapsed * 1000:.1f}ms，"
+          f"SQL语句 {naive_counter.count} 条")
+
+    batches = -(-expired // BATCH_SIZE)
+    # 每批：查询仍在进行中的任务、UPDATE，以及游戏日志队列满一批时的写入；另有读取新任务的查询
+    valid = expired == failed == overdue
+    print(f"  到期任务校验: {'通过' if valid else '失败'}")
+    return valid and statements <= 3 * batches + 2
+
+
+def bench_completion(app, user_id, game_ids, now):
+    db.session.execute(db.delete(PlayerMission.__table__))
+    db.session.commit()
+    insert_missions(user_id, game_ids, COMPLETIONS, now + timedelta(seconds=5 * 3600))
+    ids = [row[0] for row in db.session.query(PlayerMission.player_mission_id)]
+
+    def totals():
+        db.session.expire_all()
+        saves = {save.game_id: (save.credits, save.reputation, save.completed_missions_count)
+                 for save in GameSave.query.filter(GameSave.game_id.in_(game_ids))}
+        statistics = {row.game_id: (row.missions_completed, float(row.total_credits_earned or 0))
+                      for row in PlayerStatistic.query.filter(PlayerStatistic.game_id.in_(game_ids))}
+        return saves, statistics
+
+    saves_before, statistics_before = totals()
+    expected_saves, expected_statistics = dict(saves_before), dict(statistics_before)
+    for player_mission in PlayerMission.query.all():
+        mission = db.session.get(Mission, player_mission.mission_id)
+        credits, reputation, count = expected_saves[player_mission.game_id]
+        expected_saves[player_mission.game_id] = (credits + int(mission.reward_credits),
+                                                  (reputation or 0) + mission.reward_reputation, (count or 0) + 1)
+        completed, earned = expected_statistics[player_mission.game_id]
+        expected_statistics[player_mission.game_id] = ((completed or 0) + 1, earned + float(mission.reward_credits))
+
+    get_universe_snapshot()
+    with count_queries() as counter:
+        start = time.perf_counter()
+        completed = complete_missions(ids, at=now)
+        elapsed = time.perf_counter() - start
+    saves_after, statistics_after = totals()
+    print(f"批量完成 {len(completed)} 个任务（{SAVES} 个存档）: {elapsed * 1000:.1f}ms，SQL语句 {counter.count} 条")
+    again = complete_missions(ids, at=now)
+    valid = (len(completed) == COMPLETIONS and saves_after == expected_saves
+             and statistics_after == expected_statistics and again == [])
+    print(f"  奖励与统计校验: {'通过' if valid else '失败'}，重复完成: {len(again)} 个")
+    return valid and counter.count <= 7
+
+
+def check_accept_schedules(app, user_id, game_id, headers):
+    """后台线程运行时任务板接受的任务立即进入本进程的调度器，未运行时调度器不保留任何条目"""
+    from app.models.universe import SpaceStation
+    from app.services.universe_snapshot import invalidate_universe_snapshot
+
+    db.session.execute(db.update(SpaceStation.__table__).values(has_mission_board=True))
+    db.session.commit()
+    invalidate_universe_snapshot()
+    client = app.test_client()
+    board = client.get(f'/api/game-saves/{game_id}/stations/1/missions', headers=headers).json
+    accept_url = f'/api/game-saves/{game_id}/missions'
+    scheduler = get_mission_scheduler()
+
+    # 基准测试配置不启动后台线程（与 MISSION_SCHEDULER_IN_PROCESS=0 相同），接受的任务不留在内存中
+    offer = board['missions'][-1]
+    client.post(accept_url, headers=headers, json={'station_id': 1, 'offer_id': offer['offer_id']})
+    idle = len(scheduler) == 0
+    print(f"后台线程未运行时接受的任务不进入调度器: {'通过' if idle else '失败'}")
+
+    # 启动后台线程；持有处理锁，使线程的处理周期不与本线程的数据库操作并发
+    scheduler.interval = 3600
+    scheduler.start()
+    with scheduler._tick_lock:
+        offer = board['missions'][0]
+        response = client.post(accept_url, headers=headers, json={'station_id': 1, 'offer_id': offer['offer_id']})
+        player_mission_id = response.json['player_mission']['player_mission_id']
+        scheduled = player_mission_id in scheduler._deadlines
+        expired = scheduler.expire_due(datetime.utcnow() + timedelta(hours=offer['time_limit_hours'], seconds=1))
+    scheduler.stop()
+    scheduler.interval = 0
+    db.session.expire_all()
+    status = db.session.get(PlayerMission, player_mission_id).status
+    ok = idle and scheduled and expired == 1 and status == 'failed'
+    print(f"接受的任务立即进入调度器并按期限失效: {'通过' if scheduled and expired == 1 and status == 'failed' else '失败'}")
+
+    # 完成接口：未到达目标时返回409，到达后发放奖励
+    offer = next(offer for offer in board['missions'][1:-1] if offer['target_station_id'] not in (None, 1))
+    response = client.post(accept_url, headers=headers,
+                           json={'station_id': 1, 'offer_id': offer['offer_id']})
+    complete_url = (f"/api/game-saves/{game_id}/missions/"
+                    f"{response.json['player_mission']['player_mission_id']}/complete")
+    early = client.post(complete_url, headers=headers).status_code
+    credits = db.session.get(GameSave, game_id).credits
+    db.session.execute(db.update(PlayerShip.__table__).where(PlayerShip.game_id == game_id).values(
+        current_location_type='station', current_location_id=offer['target_station_id']))
+    db.session.commit()
+    response = client.post(complete_url, headers=headers)
+    db.session.expire_all()
+    completed = (early == 409 and response.status_code == 200
+                 and db.session.get(GameSave, game_id).credits == credits + response.json['reward_credits']
+                 and client.post(complete_url, headers=headers).status_code == 409)
+    print(f"到达目标后完成任务并发放奖励: {'通过' if completed else '失败'}")
+    return ok and completed
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(10)
+        user, headers = create_benchmark_user()
+        game_ids = seed(user.user_id)
+        now = datetime.utcnow().replace(microsecond=0)
+        ok = bench_expiry(app, user.user_id, game_ids, now)
+        ok = bench_completion(app, user.user_id, game_ids, now) and ok
+        ok = check_accept_schedules(app, user.user_id, game_ids[0], headers) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
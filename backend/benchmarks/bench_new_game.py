@@ -0,0 +1,60 @@
+"""
+新存档初始化基准测试
+在不同规模的宇宙（空间站 × 商品）上创建新存档，统计SQL语句数、写入行数和耗时。
+SQL语句数必须与规模无关，耗时只随写入行数增长；语句数不一致时以非零状态退出
+
+用法: python benchmarks/bench_new_game.py
+"""
+import sys
+import time
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from bench_market import seed_items
+from app import db
+from app.models.ship import ShipModel
+from app.services.game_save_service import create_new_game_save
+from app.utils.query_counter import count_queries
+
+# (空间站数, 商品数)
+SIZES = ((50, 10), (500, 50), (2000, 100))
+REPEAT = 3
+
+
+def measure(station_count, item_count):
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(station_count)
+        seed_items(item_count)
+        db.session.add(ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1,
+                                 cargo_capacity=50, price=0))
+        db.session.commit()
+        user, _ = create_benchmark_user()
+        user_id = user.user_id
+
+        best = None
+        for i in range(REPEAT):
+            with count_queries() as counter:
+                start = time.perf_counter()
+                create_new_game_save(user_id, f'Save {i}', faction_id=1)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return counter.count, station_count * item_count, best
+
+
+def main():
+    print(f"{'空间站×商品':>14}{'市场行数':>10}{'SQL语句数':>10}{'耗时':>12}{'行/毫秒':>10}")
+    statement_counts = set()
+    for station_count, item_count in SIZES:
+        statements, rows, elapsed = measure(station_count, item_count)
+        statement_counts.add(statements)
+        print(f"{f'{station_count}×{item_count}':>14}{rows:>10}{statements:>10}"
+              f"{elapsed * 1000:>10.1f}ms{rows / (elapsed * 1000):>10.0f}")
+
+    if len(statement_counts) != 1:
+        print("\nSQL语句数随规模变化，初始化存在逐行写入")
+        sys.exit(1)
+    print("\nSQL语句数与规模无关")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+存档二进制导出/导入基准测试
+在不同规模的存档上通过接口导出、再导入为新存档，比较归档与JSON的大小和耗时，
+用tracemalloc统计峰值内存，并校验导入后的数据与源存档一致。
+数据校验失败时以非零状态退出
+
+用法: python benchmarks/bench_save_archive.py
+"""
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from bench_market import seed_items
+from bench_clone import seed_fleet, fleet_signature
+from app import db
+from app.models.market import MarketPrice
+from app.models.ship import ShipModel
+from app.services.game_save_service import create_new_game_save
+from app.services.save_archive import ARCHIVE_TABLES
+
+# (空间站数, 商品数)
+SIZES = ((100, 20), (1000, 50), (2000, 100))
+
+
+def market_signature(game_id):
+    return db.session.execute(
+        db.select(MarketPrice.station_id, MarketPrice.item_id, MarketPrice.buy_price,
+                  MarketPrice.available_quantity, MarketPrice.last_updated)
+        .where(MarketPrice.game_id == game_id)
+        .order_by(MarketPrice.station_id, MarketPrice.item_id)
+    ).all()
+
+
+def json_size(game_id):
+    """同样数据的JSON导出大小和编码耗时（对照）"""
+    start = time.perf_counter()
+    payload = {}
+    for model in ARCHIVE_TABLES:
+        payload[model.__tablename__] = [row.to_dict() for row in model.query.filter_by(game_id=game_id)]
+    size = len(json.dumps(payload).encode('utf-8'))
+    return size, time.perf_counter() - start
+
+
+def roundtrip(client, headers, source_id, export_only=False, archive=None):
+    """通过接口导出存档并导入为新存档；提供archive时跳过导出
+
+    Returns:
+        (归档数据, 新存档ID, 导出耗时, 导入耗时)
+    """
+    export_time = import_time = 0.0
+    if archive is None:
+        start = time.perf_counter()
+        response = client.get(f'/api/game-saves/{source_id}/export', headers=headers)
+        archive = b''.join(response.response)
+        export_time = time.perf_counter() - start
+        if export_only:
+            return archive, None, export_time, 0.0
+
+    start = time.perf_counter()
+    response = client.post('/api/game-saves/import', headers=headers, input_stream=io.BytesIO(archive),
+                           content_type='application/octet-stream', content_length=len(archive))
+    import_time = time.perf_counter() - start
+    if response.status_code != 201:
+        raise RuntimeError(f'导入失败 {response.status_code}: {response.get_data(as_text=True)}')
+    return archive, response.json['game_save']['game_id'], export_time, import_time
+
+
+def measure(station_count, item_count):
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(station_count)
+        seed_items(item_count)
+        db.session.add(ShipModel(model_id=1, name='Starter', ship_class='fighter', manufacturer_id=1,
+                                 cargo_capacity=50, price=0))
+        db.session.commit()
+        user, headers = create_benchmark_user()
+        source_id = create_new_game_save(user.user_id, 'Source', faction_id=1).game_id
+        seed_fleet(source_id, user.user_id, 20)
+        client = app.test_client()
+
+        archive, _, export_time, import_time = roundtrip(client, headers, source_id)
+        # 峰值内存单独统计一轮，tracemalloc会显著拖慢执行
+        tracemalloc.start()
+        roundtrip(client, headers, source_id, export_only=True)
+        _, export_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _, target_id, _, _ = roundtrip(client, headers, source_id, archive=archive)
+        _, import_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        db.session.expunge_all()
+        valid = (market_signature(source_id) == market_signature(target_id)
+                 and fleet_signature(source_id) == fleet_signature(target_id))
+        json_bytes, json_time = json_size(source_id)
+        return {
+            'rows': station_count * item_count,
+            'archive': len(archive),
+            'json': json_bytes,
+            'export': export_time,
+            'json_time': json_time,
+            'import': import_time,
+            'export_peak': export_peak,
+            'import_peak': import_peak,
+            'valid': valid
+        }
+
+
+def main():
+    print(f"{'市场行数':>10}{'归档KB':>10}{'JSON KB':>10}{'导出':>10}{'JSON编码':>10}{'导入':>10}"
+          f"{'导出峰值MB':>12}{'导入峰值MB':>12}{'校验':>6}")
+    failed = False
+    for station_count, item_count in SIZES:
+        r = measure(station_count, item_count)
+        failed = failed or not r['valid']
+        print(f"{r['rows']:>10}{r['archive'] / 1024:>10.0f}{r['json'] / 1024:>10.0f}"
+              f"{r['export'] * 1000:>8.0f}ms{r['json_time'] * 1000:>8.0f}ms{r['import'] * 1000:>8.0f}ms"
+              f"{r['export_peak'] / 2 ** 20:>12.1f}{r['import_peak'] / 2 ** 20:>12.1f}"
+              f"{'通过' if r['valid'] else '失败':>6}")
+
+    if failed:
+        print("\n导入后的数据与源存档不一致")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
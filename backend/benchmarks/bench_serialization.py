@@ -0,0 +1,105 @@
+"""
+JSON序列化微基准
+比较列表接口两种序列化路径的吞吐（行/秒）：
+- ORM实例 + to_dict + 标准库json
+- 列投影Row元组 + FastJSONProvider（有orjson时使用orjson）
+并给出关闭进程级快照时完整请求的吞吐
+
+用法: python benchmarks/bench_serialization.py [行数]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_save import GameSave
+from app.models.universe import StarSystem, SpaceStation
+from app.services import universe_queries
+from app.api.game_saves import GAME_SAVE_PROJECTION
+
+REPEAT = 5
+
+
+def rows_per_second(func, rows):
+    """重复执行取最快一次，返回每秒处理的行数"""
+    best = None
+    for _ in range(REPEAT):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+def seed_game_saves(user, count):
+    """为测试用户生成存档"""
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(GameSave, [
+        {'user_id': user.user_id, 'save_name': f'Save {i}', 'created_at': now, 'last_played_at': now,
+         'credits': 1000 + i, 'current_system_id': 1 + i % 10}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    app = create_benchmark_app(UNIVERSE_SNAPSHOT_ENABLED=False)
+
+    with app.app_context():
+        seed_galaxy(row_count)
+        user, headers = create_benchmark_user()
+        user_id = user.user_id
+        seed_game_saves(user, row_count)
+        client = app.test_client()
+        provider = app.json
+        planet_count_column = universe_queries._planet_count_subquery()
+        print(f"JSON编码器: {'orjson' if provider.available else '标准库json'}，每个列表 {row_count} 行\n")
+
+        cases = [
+            (
+                '/api/universe/systems?show_all=true',
+                lambda: json.dumps([
+                    system.to_dict(planet_count=planet_count)
+                    for system, planet_count in db.session.query(StarSystem, planet_count_column)
+                    .order_by(StarSystem.system_id)
+                ]),
+                lambda: provider.dumps_bytes(universe_queries.load_systems())
+            ),
+            (
+                '/api/universe/stations?show_all=true',
+                lambda: json.dumps([s.to_dict() for s in SpaceStation.query.order_by(SpaceStation.station_id)]),
+                lambda: provider.dumps_bytes(universe_queries.load_stations())
+            ),
+            (
+                '/api/game-saves',
+                lambda: json.dumps([
+                    s.to_dict() for s in GameSave.query.filter_by(user_id=user_id)
+                    .order_by(GameSave.last_played_at.desc())
+                ]),
+                lambda: provider.dumps_bytes(GAME_SAVE_PROJECTION.fetch(
+                    GAME_SAVE_PROJECTION.select().where(GameSave.user_id == user_id)
+                    .order_by(GameSave.last_played_at.desc())
+                ))
+            ),
+        ]
+
+        print(f"{'接口':<40}{'to_dict+json':>16}{'投影+快速编码':>16}{'加速比':>8}{'完整请求':>14}")
+        for url, baseline, fast in cases:
+            baseline_rate = rows_per_second(baseline, row_count)
+            fast_rate = rows_per_second(fast, row_count)
+
+            def request():
+                response = client.get(url, headers=headers)
+                assert response.status_code == 200, response.status_code
+            request_rate = rows_per_second(request, row_count)
+
+            print(f"{url:<40}{baseline_rate:>16,.0f}{fast_rate:>16,.0f}"
+                  f"{fast_rate / baseline_rate:>7.1f}x{request_rate:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+飞船有效属性缓存基准测试
+1. 单艘飞船：每次都连接三张表计算（缓存未命中）与缓存命中的耗时
+2. 一批飞船（自动战斗、车队）一次计算与命中的耗时和SQL语句数
+3. 修改装备状态、安装和拆卸装备、更换型号后缓存的属性随之更新，删除存档后不再返回旧属性
+语句数不符合预期或校验失败时以非零状态退出
+
+用法: python benchmarks/bench_ship_stats.py
+"""
+import sys
+import time
+
+from bench_combat import seed_combat_data
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.models.game_save import GameSave
+from app.models.player import PlayerDiscovery, PlayerFactionStanding
+from app.models.ship import PlayerShip, ShipEquipment
+from app.services.game_save_service import create_new_game_save
+from app.services.ship_stats import get_ship_stats, get_ship_stats_many, invalidate_ship_stats
+from app.utils.query_counter import count_queries
+
+LOOKUPS = 2000
+FLEET_SHIPS = 1000
+
+
+def equip(ship, item_ids):
+    db.session.add_all(ShipEquipment(ship_id=ship.ship_id, game_id=ship.game_id, equipment_id=item_id,
+                                     slot_number=slot)
+                       for slot, item_id in enumerate(item_ids, start=1))
+    db.session.commit()
+
+
+def bench_single(ship_id):
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        invalidate_ship_stats(ship_id)
+        get_ship_stats(ship_id)
+    cold = (time.perf_counter() - start) / LOOKUPS
+
+    get_ship_stats(ship_id)
+    with count_queries() as counter:
+        start = time.perf_counter()
+        for _ in range(LOOKUPS):
+            get_ship_stats(ship_id)
+        warm = (time.perf_counter() - start) / LOOKUPS
+    print(f"单艘飞船: 三表连接 {cold * 1e6:.0f}µs/次，缓存命中 {warm * 1e6:.2f}µs/次（SQL语句 {counter.count} 条）")
+    return counter.count == 0
+
+
+def bench_fleet(game_id, template):
+    db.session.execute(db.insert(PlayerShip.__table__), [
+        {'user_id': template.user_id, 'game_id': game_id, 'model_id': 1 + i % 2, 'ship_status': 'docked'}
+        for i in range(FLEET_SHIPS)
+    ])
+    ship_ids = db.session.execute(
+        db.select(PlayerShip.ship_id).where(PlayerShip.game_id == game_id, PlayerShip.ship_id != template.ship_id)
+    ).scalars().all()
+    db.session.execute(db.insert(ShipEquipment.__table__), [
+        {'ship_id': ship_id, 'game_id': game_id, 'equipment_id': item_id, 'slot_number': slot}
+        for ship_id in ship_ids for slot, item_id in enumerate((1, 2, 3), start=1)
+    ])
+    db.session.commit()
+
+    results = {}
+    for label in ('未命中', '命中'):
+        with count_queries() as counter:
+            start = time.perf_counter()
+            stats = get_ship_stats_many(ship_ids)
+            elapsed = time.perf_counter() - start
+        results[label] = counter.count
+        print(f"{len(ship_ids)} 艘飞船{label}: {elapsed * 1000:.1f}ms，SQL语句 {counter.count} 条")
+    return results == {'未命中': 2, '命中': 0} and len(stats) == len(ship_ids)
+
+
+def check_invalidation(app, headers, ship):
+    results = {}
+    ship_id, user_id = ship.ship_id, ship.user_id
+    before = get_ship_stats(ship_id)
+
+    equipment = ShipEquipment.query.filter_by(ship_id=ship_id, equipment_id=3).first()
+    equipment.equipment_condition = 50
+    db.session.commit()
+    results['装备状态折算'] = get_ship_stats(ship_id).shield_capacity == before.shield_capacity / 2
+
+    equip(ship, (2,))
+    results['安装装备'] = len(get_ship_stats(ship_id).weapons) == len(before.weapons) + 1
+
+    db.session.delete(ShipEquipment.query.filter_by(ship_id=ship_id, equipment_id=4).first())
+    db.session.commit()
+    results['拆卸装备'] = get_ship_stats(ship_id).engine == 0
+
+    ship.model_id = 2
+    db.session.commit()
+    results['更换型号'] = get_ship_stats(ship_id).armor == 60
+
+    # 删除存档依赖数据库的级联删除，不会触发飞船的ORM事件（SQLite未启用外键时手动删除飞船、势力关系和发现记录）；
+    # SQLite会把ID重新分配给新存档的初始飞船，不应命中被删除飞船的属性
+    game_id = ship.game_id
+    db.session.expunge_all()
+    deleted = app.test_client().delete(f'/api/game-saves/{game_id}', headers=headers).status_code == 200
+    db.session.execute(db.delete(ShipEquipment.__table__).where(ShipEquipment.game_id == game_id))
+    db.session.execute(db.delete(PlayerShip.__table__).where(PlayerShip.game_id == game_id))
+    db.session.execute(db.delete(PlayerFactionStanding.__table__).where(PlayerFactionStanding.game_id == game_id))
+    db.session.execute(db.delete(PlayerDiscovery.__table__).where(PlayerDiscovery.game_id == game_id))
+    db.session.commit()
+    other = create_new_game_save(user_id, 'Other', faction_id=1)
+    reused = get_ship_stats(ship_id)
+    results['删除存档'] = deleted and (reused is None or (reused.game_id == other.game_id and reused.weapons == ()))
+
+    for name, ok in results.items():
+        print(f"  {name}: {'通过' if ok else '失败'}")
+    return all(results.values())
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_galaxy(10)
+        seed_combat_data()
+        user, headers = create_benchmark_user()
+        game_save = create_new_game_save(user.user_id, 'Stats', faction_id=1)
+        ship = PlayerShip.query.filter_by(game_id=game_save.game_id).first()
+        equip(ship, (1, 1, 2, 3, 4))
+
+        ok = bench_single(ship.ship_id)
+        ok = bench_fleet(game_save.game_id, ship) and ok
+        print('失效校验:')
+        ok = check_invalidation(app, headers, ship) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
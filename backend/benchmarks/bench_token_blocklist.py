@@ -0,0 +1,118 @@
+"""
+令牌撤销列表基准测试
+1. 撤销列表中有大量令牌时，检查未撤销/已撤销令牌的耗时，对比每次按jti查询revoked_tokens表
+2. 过期的桶被丢弃后内存中的条目数
+3. 端到端：退出登录、修改密码后旧令牌返回401，新令牌可用，重建撤销列表（模拟重启）后撤销仍然有效
+校验失败时以非零状态退出
+
+用法: python benchmarks/bench_token_blocklist.py
+"""
+import sys
+import time
+import uuid
+
+from common import create_benchmark_app, create_benchmark_user
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.services.token_blocklist import TokenBlocklist, get_token_blocklist
+
+REVOKED = 100000
+CHECKS = 100000
+QUERY_CHECKS = 2000
+URL = '/api/game-saves'
+
+
+def payload(jti, exp, sub='1', iat=None):
+    return {'jti': jti, 'exp': exp, 'sub': sub, 'iat': iat if iat is not None else exp - 1800}
+
+
+def bench_checks(app):
+    blocklist = get_token_blocklist()
+    blocklist.sync()
+    now = int(time.time())
+    revoked = [payload(str(uuid.uuid4()), now + 60 + i % 1800, sub=str(i % 1000)) for i in range(REVOKED)]
+    for token in revoked:
+        blocklist.revoke_token(token)
+    db.session.commit()
+    blocklist.revoke_user_tokens(999)
+    db.session.commit()
+
+    valid = [payload(str(uuid.uuid4()), now + 900, sub='5', iat=now + 1) for _ in range(CHECKS)]
+    start = time.perf_counter()
+    false_positive = sum(blocklist.is_revoked(token) for token in valid)
+    miss = (time.perf_counter() - start) / CHECKS
+
+    start = time.perf_counter()
+    detected = sum(blocklist.is_revoked(token) for token in revoked[:CHECKS])
+    hit = (time.perf_counter() - start) / CHECKS
+
+    table = RevokedToken.__table__
+    query = db.select(table.c.revocation_id).where(table.c.jti == db.bindparam('jti'))
+    start = time.perf_counter()
+    for token in valid[:QUERY_CHECKS]:
+        db.session.execute(query, {'jti': token['jti']}).first()
+    by_query = (time.perf_counter() - start) / QUERY_CHECKS
+
+    print(f'撤销列表 {len(blocklist)} 条（{len(blocklist._buckets)} 个桶）')
+    print(f'  未撤销令牌: {miss * 1e6:.2f}µs/次，误判 {false_positive}')
+    print(f'  已撤销令牌: {hit * 1e6:.2f}µs/次，检出 {detected}/{CHECKS}')
+    print(f'  按jti查询数据库: {by_query * 1e6:.1f}µs/次')
+
+    # 令牌全部过期后桶被丢弃
+    expired = TokenBlocklist(app, bucket_seconds=60)
+    for i in range(10000):
+        expired._add_token(str(i), now - 120 + i % 60)
+    before = len(expired)
+    expired._prune()
+    print(f'过期桶丢弃: {before} -> {len(expired)} 条')
+    return detected == CHECKS and false_positive <= CHECKS * 0.02 and len(expired) == 0
+
+
+def check_flow(app):
+    """退出登录、修改密码后旧令牌失效"""
+    user, headers = create_benchmark_user('flow_user')
+    client = app.test_client()
+    results = {}
+
+    login = client.post('/api/auth/login', json={'username': 'flow_user', 'password': 'Benchmark123'}).json
+    access = {'Authorization': f"Bearer {login['access_token']}"}
+    results['登录后可用'] = client.get(URL, headers=access).status_code == 200
+    response = client.post('/api/auth/logout', headers=access, json={'refresh_token': login['refresh_token']})
+    results['退出登录'] = response.status_code == 200
+    response = client.get(URL, headers=access)
+    results['退出后访问令牌401'] = response.status_code == 401 and response.json.get('sub_status') == 46
+    refresh = {'Authorization': f"Bearer {login['refresh_token']}"}
+    results['退出后刷新令牌401'] = client.post('/api/auth/refresh', headers=refresh).status_code == 401
+
+    # 令牌签发时间精确到秒，等到下一秒再修改密码，保证旧令牌在截止时间之前签发
+    time.sleep(1.0)
+    response = client.put('/api/auth/change-password', headers=headers,
+                          json={'current_password': 'Benchmark123', 'new_password': 'Benchmark456'})
+    results['修改密码'] = response.status_code == 200
+    new_access = {'Authorization': f"Bearer {response.json['access_token']}"}
+    results['修改密码后旧令牌401'] = client.get(URL, headers=headers).status_code == 401
+    results['修改密码后新令牌可用'] = client.get(URL, headers=new_access).status_code == 200
+
+    # 模拟重启：新的撤销列表从数据库加载
+    app.extensions['token_blocklist'] = TokenBlocklist(app)
+    results['重启后旧令牌仍401'] = (client.get(URL, headers=access).status_code == 401
+                                   and client.get(URL, headers=headers).status_code == 401)
+    results['重启后新令牌可用'] = client.get(URL, headers=new_access).status_code == 200
+
+    for name, ok in results.items():
+        print(f'  {name}: {"通过" if ok else "失败"}')
+    return all(results.values())
+
+
+def main():
+    app = create_benchmark_app()
+    with app.app_context():
+        ok = bench_checks(app)
+        print('端到端:')
+        ok = check_flow(app) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+检查宇宙API的SQL语句数量不随数据规模增长
+分别在小规模和大规模星系上请求每个接口并统计SQL语句数，数量不一致时以非零状态退出
+
+用法: python benchmarks/check_query_counts.py
+"""
+import sys
+
+from common import create_benchmark_app, seed_galaxy, create_benchmark_user
+from app import db
+from app.services.universe_snapshot import invalidate_universe_snapshot
+from app.utils.query_counter import count_queries
+
+ENDPOINTS = [
+    '/api/universe/systems',
+    '/api/universe/systems?show_all=true',
+    '/api/universe/systems/3',
+    '/api/universe/stations',
+    '/api/universe/stations?system_id=3',
+    '/api/universe/stations/3',
+    '/api/universe/jumpgates',
+    '/api/universe/jumpgates?system_id=3',
+    '/api/universe/factions',
+    '/api/universe/route?from_system_id=3&to_system_id=9'
+]
+
+SIZES = (20, 2000)
+
+
+def measure(system_count, snapshot_enabled):
+    """在指定规模的星系上统计每个接口的SQL语句数"""
+    app = create_benchmark_app(UNIVERSE_SNAPSHOT_ENABLED=snapshot_enabled)
+    counts = {}
+
+    with app.app_context():
+        seed_galaxy(system_count)
+        _, headers = create_benchmark_user()
+        invalidate_universe_snapshot()
+        client = app.test_client()
+
+        # 预热：进程级快照只在首次请求时加载
+        client.get(ENDPOINTS[0], headers=headers)
+
+        for url in ENDPOINTS:
+            # 清空会话的标识映射，避免请求复用已加载的对象
+            db.session.expunge_all()
+            with count_queries() as counter:
+                response = client.get(url, headers=headers)
+            if response.status_code >= 500:
+                raise RuntimeError(f'{url} 返回 {response.status_code}: {response.get_data(as_text=True)}')
+            counts[url] = counter.count
+
+        db.session.remove()
+
+    return counts
+
+
+def main():
+    failed = False
+
+    for snapshot_enabled in (True, False):
+        print(f"\n进程级快照: {'开启' if snapshot_enabled else '关闭'}")
+        results = {size: measure(size, snapshot_enabled) for size in SIZES}
+
+        for url in ENDPOINTS:
+            counts = [results[size][url] for size in SIZES]
+            grows = len(set(counts)) > 1
+            failed = failed or grows
+            status = '增长!' if grows else 'OK'
+            print(f"  {url:<55} " + ' / '.join(str(c) for c in counts) + f"  {status}")
+
+    if failed:
+        print("\n存在SQL语句数随数据量增长的接口")
+        sys.exit(1)
+    print("\n所有接口的SQL语句数与数据规模无关")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+基准测试与检查脚本的公共工具
+使用内存SQLite数据库创建应用实例，并生成指定规模的测试星系
+"""
+import os
+import sys
+
+# 添加backend目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from config import config, TestingConfig
+from app import create_app, db
+
+
+class BenchmarkConfig(TestingConfig):
+    """基准测试配置，默认使用内存SQLite数据库"""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or 'sqlite://'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING')
+    # 每个基准测试会创建多个应用实例，不为每个实例启动后台写回和任务调度线程
+    WRITE_BEHIND_INTERVAL = 0
+    GAME_LOG_FLUSH_INTERVAL = 0
+    MISSION_SCHEDULER_INTERVAL = 0
+
+
+config['benchmark'] = BenchmarkConfig
+
+
+def create_benchmark_app(**overrides):
+    """创建基准测试应用并建立所有表结构
+
+    Returns:
+        Flask应用实例，调用方负责推入应用上下文
+    """
+    app = create_app('benchmark')
+    app.config.update(overrides)
+
+    with app.app_context():
+        # 导入所有模型以便create_all建表
+        from app.models import user, game_save, universe, player, market, ship, mission, game_log, revoked_token, combat  # noqa: F401
+        db.drop_all()
+        db.create_all()
+
+    return app
+
+
+def seed_galaxy(system_count, factions=4):
+    """生成链式连接的测试星系，每个星系包含一个行星、一个空间站和往返跳跃门"""
+    from app.models.universe import StarSystem, Planet, SpaceStation, JumpGate, Faction
+
+    db.session.bulk_insert_mappings(Faction, [
+        {'faction_id': i, 'name': f'Faction {i}'} for i in range(1, factions + 1)
+    ])
+    db.session.bulk_insert_mappings(StarSystem, [
+        {
+            'system_id': i,
+            'name': f'System {i}',
+            'type': ('core', 'mid', 'rim', 'unknown')[i % 4],
+            'is_discovered': i % 3 == 0,
+            'danger_level': 1 + i % 10,
+            'controlling_faction_id': 1 + i % factions,
+            'x_coord': float(i),
+            'y_coord': float(i % 17),
+            'z_coord': float(i % 5)
+        }
+        for i in range(1, system_count + 1)
+    ])
+    db.session.bulk_insert_mappings(Planet, [
+        {'planet_id': i, 'system_id': i, 'name': f'Planet {i}', 'controlling_faction_id': 1 + i % factions}
+        for i in range(1, system_count + 1)
+    ])
+    db.session.bulk_insert_mappings(SpaceStation, [
+        {
+            'station_id': i,
+            'system_id': i,
+            'planet_id': i,
+            'name': f'Station {i}',
+            'controlling_faction_id': 1 + i % factions,
+            'has_shop': True
+        }
+        for i in range(1, system_count + 1)
+    ])
+    gates = []
+    for i in range(1, system_count):
+        gates.append({'name': f'Gate {i}-{i + 1}', 'source_system_id': i, 'destination_system_id': i + 1,
+                      'toll_fee': float(i % 3), 'stability': 5 + i % 6})
+        gates.append({'name': f'Gate {i + 1}-{i}', 'source_system_id': i + 1, 'destination_system_id': i,
+                      'toll_fee': float(i % 3), 'stability': 5 + i % 6})
+    db.session.bulk_insert_mappings(JumpGate, gates)
+    db.session.commit()
+
+
+def create_benchmark_user(username='benchmark'):
+    """创建测试用户，返回 (用户, 认证请求头)"""
+    from app.models.user import User
+
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('Benchmark123')
+    db.session.add(user)
+    db.session.commit()
+
+    access_token = create_access_token(
+        identity=str(user.user_id),
+        additional_claims={'username': user.username, 'email': user.email}
+    )
+    return user, {'Authorization': f'Bearer {access_token}'}
@@ -12,6 +12,18 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     
+    # 密码哈希参数：修改后旧哈希会在用户下次登录成功时按新参数重新计算
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '260000'))
+    PASSWORD_SALT_LENGTH = 16
+    
+    # 密码计算池：模式（inline / thread / process）、池大小、同时进行（含排队）的计算数上限，
+    # 以及达到上限时的最长等待秒数（超时返回503）
+    PASSWORD_POOL_MODE = os.environ.get('PASSWORD_POOL_MODE', 'thread')
+    PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', '2'))
+    PASSWORD_POOL_MAX_PENDING = 16
+    PASSWORD_POOL_WAIT_TIMEOUT = 2.0
+    
     # 应用配置
     DEBUG = False
     TESTING = False
@@ -23,6 +35,83 @@ class Config:
     INITIAL_CREDITS = 1000.00
     INITIAL_SYSTEM_ID = 1
     
+    # JWT撤销列表：按令牌过期时间分桶的宽度（秒）、布隆过滤器容量和误判率，
+    # 以及读取其他进程撤销记录的间隔（秒，多进程部署时撤销的生效延迟）
+    TOKEN_BLOCKLIST_BUCKET_SECONDS = 60
+    TOKEN_BLOCKLIST_BLOOM_CAPACITY = 100000
+    TOKEN_BLOCKLIST_BLOOM_ERROR_RATE = 0.01
+    TOKEN_BLOCKLIST_SYNC_INTERVAL = 30
+    
+    # 受保护接口的用户存在状态缓存：最多缓存的用户数，以及过期秒数（多进程部署时删除用户的生效延迟）
+    CURRENT_USER_CACHE_SIZE = 4096
+    CURRENT_USER_CACHE_TTL = 60
+    
+    # 宇宙静态数据使用进程级快照，关闭后每次请求都从数据库加载
+    UNIVERSE_SNAPSHOT_ENABLED = True
+    
+    # 存档发现记录缓存：最多缓存的存档数，以及多进程部署时的过期秒数
+    DISCOVERY_CACHE_SIZE = 1024
+    DISCOVERY_CACHE_TTL = 300
+    
+    # 航线规划：星系数量不超过该值时预计算全源最短路
+    ROUTE_PRECOMPUTE_MAX_SYSTEMS = 300
+    
+    # 飞船有效属性缓存：最多缓存的飞船数，以及多进程部署时其他进程修改装备的生效延迟（秒）
+    SHIP_STATS_CACHE_SIZE = 8192
+    SHIP_STATS_CACHE_TTL = 300
+    
+    # 任务板：刷新间隔秒数（同一时间段内任务板不变）、每次生成的任务数、目标距空间站的最大跳数，
+    # 以及每个存档同时进行的任务数上限
+    MISSION_BOARD_REFRESH_SECONDS = 3600
+    MISSION_BOARD_SIZE = 8
+    MISSION_TARGET_MAX_JUMPS = 4
+    MISSION_MAX_ACTIVE = 10
+    
+    # 任务到期调度：是否在Web进程内运行（由mission_worker.py单独运行时关闭）、处理间隔秒数、
+    # 每条UPDATE标记的任务数，以及从数据库完整重建的间隔秒数
+    MISSION_SCHEDULER_IN_PROCESS = os.environ.get('MISSION_SCHEDULER_IN_PROCESS', '1') != '0'
+    MISSION_SCHEDULER_INTERVAL = 5
+    MISSION_SCHEDULER_BATCH_SIZE = 500
+    MISSION_SCHEDULER_FULL_SYNC_INTERVAL = 300
+    
+    # 势力关系变化的传播系数：与某势力的关系变化d时，与其他势力的关系变化 d × 系数 × 两势力关系等级/100
+    FACTION_STANDING_SPILLOVER = 0.5
+    
+    # 新存档的初始飞船型号
+    STARTER_SHIP_MODEL_ID = 1
+    
+    # 贸易路线缓存：最多缓存的查询数，以及过期秒数（惰性估值的价格会随时间缓慢变化）
+    TRADE_ROUTE_CACHE_SIZE = 256
+    TRADE_ROUTE_CACHE_TTL = 60
+    
+    # 宇宙接口响应缓存：最多缓存的响应数，以及是否向支持的客户端返回gzip压缩版本
+    RESPONSE_CACHE_SIZE = 512
+    RESPONSE_CACHE_GZIP = True
+    
+    # 活动数据（最后游玩时间、游玩时长、统计计数）延迟写入：写回间隔秒数、待写回存档数上限，
+    # 以及单次心跳允许上报的最大游玩秒数和每个统计项的最大增量
+    WRITE_BEHIND_INTERVAL = 5
+    WRITE_BEHIND_MAX_PENDING = 1000
+    HEARTBEAT_MAX_SECONDS = 300
+    HEARTBEAT_MAX_STATISTIC_DELTA = 1000000
+    
+    # 游戏事件日志：队列容量、每批写入行数、最长写入间隔（秒），
+    # 以及队列满时的策略（drop_oldest / block / sample）和策略参数
+    GAME_LOG_QUEUE_SIZE = 10000
+    GAME_LOG_BATCH_SIZE = 500
+    GAME_LOG_FLUSH_INTERVAL = 1.0
+    GAME_LOG_POLICY = os.environ.get('GAME_LOG_POLICY', 'drop_oldest')
+    GAME_LOG_BLOCK_TIMEOUT = 0.05
+    GAME_LOG_SAMPLE_THRESHOLD = 0.5
+    GAME_LOG_SAMPLE_RATE = 0.1
+    
+    # 存档导出的压缩方式：none / zlib / lz4（未安装lz4时退回zlib）
+    SAVE_ARCHIVE_COMPRESSION = 'zlib'
+    
+    # 日志：级别，以及输出INFO/DEBUG日志的请求采样率（0~1）
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+    
     @staticmethod
     def init_app(app):
         pass
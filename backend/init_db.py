@@ -65,8 +65,25 @@ def init_db():
             print(f"数据库初始化失败: {e}")
             return False
 
-def import_game_data():
-    """导入游戏初始数据"""
+def get_sql_dir():
+    """获取项目database目录路径"""
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    project_root = os.path.dirname(base_dir)
+    return os.path.join(project_root, 'database')
+
+def get_migration_files():
+    """按文件名顺序获取database/migrations下的迁移SQL文件"""
+    migrations_dir = os.path.join(get_sql_dir(), 'migrations')
+    if not os.path.isdir(migrations_dir):
+        return []
+    return [
+        os.path.join(migrations_dir, name)
+        for name in sorted(os.listdir(migrations_dir))
+        if name.endswith('.sql')
+    ]
+
+def execute_sql_files(sql_files):
+    """连接配置中的数据库并按顺序执行SQL文件"""
     from app import create_app
     
     # 创建应用实例获取配置
@@ -77,18 +94,6 @@ def import_game_data():
         db_uri = app.config['SQLALCHEMY_DATABASE_URI']
         db_info = parse_db_uri(db_uri)
         
-        # 构建SQL文件路径
-        base_dir = os.path.abspath(os.path.dirname(__file__))
-        project_root = os.path.dirname(base_dir)
-        sql_dir = os.path.join(project_root, 'database')
-        
-        # 按顺序执行SQL文件
-        sql_files = [
-            os.path.join(sql_dir, 'schema_part1.sql'),
-            os.path.join(sql_dir, 'schema_part2.sql'),
-            os.path.join(sql_dir, 'schema_part3.sql')
-        ]
-        
         print(f"正在连接到MySQL服务器: {db_info['host']}:{db_info['port']}")
         try:
             conn = pymysql.connect(
@@ -119,13 +124,38 @@ def import_game_data():
                 conn.commit()
             
             conn.close()
-            print("游戏数据导入完成！")
             return True
             
         except Exception as e:
-            print(f"游戏数据导入失败: {e}")
+            print(f"执行SQL文件失败: {e}")
             return False
 
+def import_game_data():
+    """导入游戏初始数据，并应用所有迁移"""
+    sql_dir = get_sql_dir()
+    
+    # 按顺序执行SQL文件
+    sql_files = [
+        os.path.join(sql_dir, 'schema_part1.sql'),
+        os.path.join(sql_dir, 'schema_part2.sql'),
+        os.path.join(sql_dir, 'schema_part3.sql')
+    ] + get_migration_files()
+    
+    if execute_sql_files(sql_files):
+        print("游戏数据导入完成！")
+        return True
+    return False
+
+def apply_migrations():
+    """对已有数据库应用database/migrations下的迁移
+    
+    迁移语句可重复执行，已存在的索引会报错并被跳过
+    """
+    if execute_sql_files(get_migration_files()):
+        print("数据库迁移完成！")
+        return True
+    return False
+
 if __name__ == '__main__':
     if len(sys.argv) > 1:
         if sys.argv[1] == 'init':
@@ -136,7 +166,11 @@ if __name__ == '__main__':
             print("导入游戏数据...")
             if import_game_data():
                 print("游戏数据导入成功!")
+        elif sys.argv[1] == 'migrate':
+            print("应用数据库迁移...")
+            if apply_migrations():
+                print("数据库迁移成功!")
         else:
-            print("未知命令。使用 'init' 初始化数据库或 'import' 导入游戏数据。")
+            print("未知命令。使用 'init' 初始化数据库、'import' 导入游戏数据或 'migrate' 应用迁移。")
     else:
-        print("请指定操作命令： python init_db.py [init|import]")
+        print("请指定操作命令： python init_db.py [init|import|migrate]")
@@ -0,0 +1,55 @@
+"""
+Freelancer游戏 - 任务到期调度进程
+与Web进程分开运行任务调度器：按截止时间批量把超时的任务标记为失败。
+单独运行时Web进程应设置 MISSION_SCHEDULER_IN_PROCESS=0，只保留一个调度器
+
+用法:
+    python mission_worker.py                # 持续运行，Ctrl+C 或 SIGTERM 退出
+    python mission_worker.py --once         # 处理一次后退出（例如由cron调用）
+    python mission_worker.py --interval 10  # 指定处理间隔（秒）
+"""
+import argparse
+import os
+import signal
+import sys
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+# 本进程自己运行调度器，创建应用时不启动后台线程
+os.environ['MISSION_SCHEDULER_IN_PROCESS'] = '0'
+
+from app import create_app
+from app.services.mission_scheduler import MissionScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='任务到期调度进程')
+    parser.add_argument('--once', action='store_true', help='处理一次后退出')
+    parser.add_argument('--interval', type=float, default=None, help='处理间隔（秒），默认使用配置')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_CONFIG') or 'development')
+    scheduler = MissionScheduler(
+        app,
+        interval=args.interval or app.config.get('MISSION_SCHEDULER_INTERVAL') or 5,
+        batch_size=app.config.get('MISSION_SCHEDULER_BATCH_SIZE', 500),
+        full_sync_interval=app.config.get('MISSION_SCHEDULER_FULL_SYNC_INTERVAL', 300)
+    )
+
+    if args.once:
+        expired = scheduler.tick()
+        print(f"{expired} 个任务已超时")
+        return
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    print(f"任务调度进程已启动，处理间隔 {scheduler.interval} 秒")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    print("任务调度进程已退出")
+
+
+if __name__ == '__main__':
+    main()
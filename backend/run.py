@@ -20,7 +20,8 @@ migrate = Migrate(app, db)
 def make_shell_context():
     """为Flask shell命令添加上下文"""
     from app.models.user import User
-    return dict(db=db, User=User)
+    from app.services.universe_snapshot import reload_universe_snapshot
+    return dict(db=db, User=User, reload_universe_snapshot=reload_universe_snapshot)
 
 if __name__ == '__main__':
     # 启动Web服务器
@@ -0,0 +1,9 @@
+-- 《Freelancer》数据库迁移 001
+-- 为星系列表筛选和跳跃门邻接查询添加索引
+
+-- 星系列表按区域类型和发现状态筛选
+CREATE INDEX idx_system_type_discovered ON star_systems(type, is_discovered);
+
+-- 按源星系/目标星系查找跳跃门
+CREATE INDEX idx_gate_source_system ON jump_gates(source_system_id);
+CREATE INDEX idx_gate_destination_system ON jump_gates(destination_system_id);
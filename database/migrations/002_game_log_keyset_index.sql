@@ -0,0 +1,6 @@
+-- 《Freelancer》数据库迁移 002
+-- 游戏日志按存档分页读取（按时间倒序的键集分页）
+
+-- 覆盖 WHERE user_id = ? AND game_id = ? ORDER BY created_at DESC, log_id DESC
+-- 以及 (created_at, log_id) 游标条件；原有的 idx_user_game 是它的前缀
+CREATE INDEX idx_game_log_keyset ON game_logs(user_id, game_id, created_at, log_id);
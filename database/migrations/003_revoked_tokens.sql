@@ -0,0 +1,11 @@
+-- 《Freelancer》数据库迁移 003
+-- 已撤销的JWT（退出登录、修改密码），进程启动时加载到内存中的撤销列表
+
+CREATE TABLE revoked_tokens (
+    revocation_id INT PRIMARY KEY AUTO_INCREMENT COMMENT '撤销记录ID，主键',
+    jti VARCHAR(36) UNIQUE COMMENT '令牌ID，为空时撤销用户在revoked_at之前签发的全部令牌',
+    user_id INT NOT NULL COMMENT '用户ID',
+    revoked_at DATETIME NOT NULL COMMENT '撤销时间',
+    expires_at DATETIME NOT NULL COMMENT '被撤销令牌的最晚过期时间，之后记录可以删除',
+    INDEX idx_revoked_token_expires (expires_at)
+) COMMENT '已撤销的JWT令牌';
@@ -0,0 +1,9 @@
+-- 《Freelancer》数据库迁移 004
+-- 任务板：按存档、空间站和时间段生成的任务在接受时写入missions表，按存档和状态查找玩家任务
+
+-- 任务板生成的任务标识（存档:空间站:时间段:序号），预先编写的任务为空
+ALTER TABLE missions ADD COLUMN board_key VARCHAR(64) NULL COMMENT '任务板生成的任务标识，预先编写的任务为空';
+CREATE UNIQUE INDEX uq_mission_board_key ON missions(board_key);
+
+-- 覆盖 WHERE game_id = ? AND status = ?（例如进行中的任务），原有的 idx_mission_status 只有状态一列
+CREATE INDEX idx_player_mission_game_status ON player_missions(game_id, status);
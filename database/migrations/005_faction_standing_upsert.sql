@@ -0,0 +1,9 @@
+-- 《Freelancer》数据库迁移 005
+-- 势力关系变化按 (game_id, faction_id) 批量upsert，每个存档与每个势力只保留一条关系记录
+
+-- 删除重复记录，保留最早的一条
+DELETE s1 FROM player_faction_standing s1
+JOIN player_faction_standing s2
+  ON s1.game_id = s2.game_id AND s1.faction_id = s2.faction_id AND s1.standing_id > s2.standing_id;
+
+CREATE UNIQUE INDEX uq_player_faction_standing ON player_faction_standing(game_id, faction_id);
@@ -0,0 +1,10 @@
+-- 《Freelancer》数据库迁移 006
+-- 每个存档对同一对象只保留一条发现记录，多个进程同时记录同一发现时由唯一索引拒绝重复
+
+-- 删除重复记录，保留最早的一条
+DELETE d1 FROM player_discoveries d1
+JOIN player_discoveries d2
+  ON d1.game_id = d2.game_id AND d1.discovery_type = d2.discovery_type AND d1.object_id = d2.object_id
+  AND d1.discovery_id > d2.discovery_id;
+
+CREATE UNIQUE INDEX uq_player_discovery ON player_discoveries(game_id, discovery_type, object_id);
@@ -191,6 +191,30 @@ const universeService = {
       });
   },
   
+  /**
+   * 规划两个星系之间的航线
+   * @param {Number} fromSystemId 起点星系ID
+   * @param {Number} toSystemId 终点星系ID
+   * @param {String} mode 规划模式：shortest（最短）、cheapest（最便宜）、safest（最安全）
+   * @returns {Promise} 返回航线数据
+   */
+  getRoute(fromSystemId, toSystemId, mode = 'shortest') {
+    const params = new URLSearchParams({
+      from_system_id: fromSystemId,
+      to_system_id: toSystemId,
+      mode
+    });
+    
+    return universeApi.get(`/route?${params.toString()}`)
+      .then(response => {
+        if (response.data.success) {
+          return response.data.route;
+        } else {
+          throw new Error(response.data.error || '规划航线失败');
+        }
+      });
+  },
+  
   /**
    * 获取所有势力
    * @returns {Promise} 返回势力数据